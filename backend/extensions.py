@@ -1,7 +1,60 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
+import os
+import threading
 import docker
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
-client = docker.from_env()
\ No newline at end of file
+
+# Every request thread (DOCKORA_THREADS, see gunicorn.conf.py) may need a connection at once;
+# the overflow covers background jobs and the connections advisory locks hold.
+DB_POOL_SIZE = int(os.environ.get('DOCKORA_DB_POOL_SIZE', os.environ.get('DOCKORA_THREADS', 64)))
+DB_MAX_OVERFLOW = int(os.environ.get('DOCKORA_DB_MAX_OVERFLOW', 16))
+DB_POOL_TIMEOUT = float(os.environ.get('DOCKORA_DB_POOL_TIMEOUT', 30))
+
+DOCKER_TIMEOUT = float(os.environ.get('DOCKORA_DOCKER_TIMEOUT', 60))
+DOCKER_SLOW_TIMEOUT = float(os.environ.get('DOCKORA_DOCKER_SLOW_TIMEOUT', 600))
+DOCKER_POOL_SIZE = int(os.environ.get('DOCKORA_DOCKER_POOL_SIZE', 32))
+DOCKER_STREAM_POOL_SIZE = int(os.environ.get('DOCKORA_DOCKER_STREAM_POOL_SIZE', 128))
+# Pinning the API version skips the version probe docker.from_env() otherwise makes when a client is created.
+DOCKER_API_VERSION = os.environ.get('DOCKORA_DOCKER_API_VERSION') or None
+
+class LazyDockerClient:
+    """
+    A docker.DockerClient that is only created (and the daemon only contacted) on first
+    use, so importing the app never blocks on the Docker socket. Attribute access is
+    forwarded to the real client.
+    """
+    def __init__(self, timeout, max_pool_size):
+        self.timeout = timeout
+        self.max_pool_size = max_pool_size
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = docker.from_env(version=DOCKER_API_VERSION, timeout=self.timeout, max_pool_size=self.max_pool_size)
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+# Short request/response calls (listing, inspect, start/stop, ...).
+client = LazyDockerClient(timeout=DOCKER_TIMEOUT, max_pool_size=DOCKER_POOL_SIZE)
+# Long-lived streams (events, stats, followed logs, pulls) each hold a connection for as long as
+# they run, so they get their own pool and no read timeout instead of starving the RPC pool.
+stream_client = LazyDockerClient(timeout=None, max_pool_size=DOCKER_STREAM_POOL_SIZE)
+
+_timeout_clients = {}
+_timeout_clients_lock = threading.Lock()
+
+def docker_client(timeout, max_pool_size=4):
+    """Returns a shared client for calls that need a different timeout, e.g. df or prune on big hosts."""
+    with _timeout_clients_lock:
+        lazy_client = _timeout_clients.get((timeout, max_pool_size))
+        if lazy_client is None:
+            lazy_client = _timeout_clients[(timeout, max_pool_size)] = LazyDockerClient(timeout=timeout, max_pool_size=max_pool_size)
+    return lazy_client
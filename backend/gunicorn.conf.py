@@ -0,0 +1,29 @@
+import os
+
+# Production entry point: gunicorn -c gunicorn.conf.py app:app
+bind = os.environ.get('DOCKORA_BIND', '0.0.0.0:5000')
+
+# Samplers, caches and log fan-out live in each worker's memory, so a single worker with
+# many threads is the default. Streaming routes (log tails, deployments, SSH) each hold a
+# thread for as long as the client is connected, hence the generous thread count. The
+# database pool is sized from the same setting (DOCKORA_DB_POOL_SIZE in extensions.py).
+workers = int(os.environ.get('DOCKORA_WORKERS', 1))
+worker_class = os.environ.get('DOCKORA_WORKER_CLASS', 'gthread') # 'gevent' also works if gevent is installed
+threads = int(os.environ.get('DOCKORA_THREADS', 64))
+worker_connections = int(os.environ.get('DOCKORA_WORKER_CONNECTIONS', 1000)) # gevent only
+
+timeout = int(os.environ.get('DOCKORA_WORKER_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('DOCKORA_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = os.environ.get('DOCKORA_ACCESS_LOG', '-')
+errorlog = '-'
+
+def post_worker_init(worker):
+    # Background threads must be started after the fork, inside each worker.
+    from helpers.background import start_background_services
+    start_background_services(worker.wsgi)
+
+def worker_exit(server, worker):
+    from helpers.background import stop_background_services
+    stop_background_services()
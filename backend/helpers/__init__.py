@@ -1,2 +1,2 @@
 # Removed: from .main_helpers import create_user_home_dirs, cleanup_trash, get_user_and_base_path, resolve_user_path, resolve_path_for_user
-from .container_helpers import parse_cpu_limit, parse_memory_limit # New import
\ No newline at end of file
+from .container_helpers import parse_cpu_limit, parse_memory_limit, calculate_stats, fetch_stats_concurrently
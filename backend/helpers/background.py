@@ -0,0 +1,119 @@
+import os
+import threading
+from sqlalchemy import text
+from extensions import db
+from helpers.docker_events import docker_events
+from helpers.container_state import register_container_state_handlers, sync_container_statuses
+from helpers.stats_collector import stats_collector
+from helpers.snapshot_cache import snapshot_cache
+from helpers.network_probe import network_prober
+from helpers.network_sampler import network_sampler
+from helpers.system_sampler import system_sampler
+from helpers.event_bus import register_event_bus_handlers
+from helpers.deploy_jobs import fail_interrupted_jobs, purge_old_jobs
+from helpers.image_inventory import image_inventory
+from helpers.image_service import image_service
+from routes.apps import start_app_refresh_scheduler, register_app_sync_handlers
+
+# Arbitrary constant identifying Dockora's leader lock among Postgres advisory locks.
+LEADER_LOCK_ID = 0x646F636B
+LEADER_RETRY_INTERVAL = float(os.environ.get('DOCKORA_LEADER_RETRY_INTERVAL', 30))
+JOB_SWEEP_INTERVAL = float(os.environ.get('DOCKORA_JOB_SWEEP_INTERVAL', 60))
+
+_state = {'started': False, 'leader_connection': None}
+_state_lock = threading.Lock()
+_shutdown = threading.Event()
+
+def _try_become_leader():
+    """
+    Takes a session-level Postgres advisory lock on a dedicated connection. Whichever process
+    holds it runs the jobs that write to the database; the lock is released automatically
+    if that process dies, so another worker can take over.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return True
+    connection = db.engine.connect()
+    try:
+        acquired = connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": LEADER_LOCK_ID}).scalar()
+    except Exception:
+        connection.close()
+        raise
+    if not acquired:
+        connection.close()
+        return False
+    _state['leader_connection'] = connection
+    return True
+
+def _start_leader_jobs(app):
+    print(f"Process {os.getpid()} is running Dockora's background jobs.")
+    register_container_state_handlers(docker_events)
+    register_app_sync_handlers(docker_events)
+    network_sampler.start_flushing(app)
+    threading.Thread(target=start_app_refresh_scheduler, args=(app,), name='app-refresh-scheduler', daemon=True).start()
+    threading.Thread(target=_sweep_deploy_jobs, args=(app,), name='deploy-job-sweeper', daemon=True).start()
+
+def _sweep_deploy_jobs(app):
+    # Workers can die at any time (crash, max_requests recycling), not only with the whole server.
+    while True:
+        try:
+            with app.app_context():
+                fail_interrupted_jobs()
+                purge_old_jobs()
+        except Exception as e:
+            print(f"Failed to clean up deploy jobs: {e}")
+        if _shutdown.wait(JOB_SWEEP_INTERVAL):
+            return
+
+def _wait_for_leadership(app):
+    while not _shutdown.wait(LEADER_RETRY_INTERVAL):
+        try:
+            with app.app_context():
+                if _try_become_leader():
+                    _start_leader_jobs(app)
+                    # The events stream is already connected, so catch up on state the old leader may have missed.
+                    sync_container_statuses()
+                    return
+        except Exception as e:
+            print(f"Leader election failed: {e}")
+
+def start_background_services(app):
+    """
+    Starts Dockora's background threads in the current process. Samplers and caches run
+    in every process that serves requests, while jobs that write to the database (event
+    driven state tracking, app sync, network usage flushes) run in exactly one process
+    across all workers.
+    """
+    with _state_lock:
+        if _state['started']:
+            return
+        _state['started'] = True
+
+    with app.app_context():
+        is_leader = _try_become_leader()
+    if is_leader:
+        _start_leader_jobs(app)
+    else:
+        threading.Thread(target=_wait_for_leadership, args=(app,), name='leader-election', daemon=True).start()
+
+    stats_collector.register_event_handlers(docker_events)
+    snapshot_cache.register_event_handlers(docker_events)
+    register_event_bus_handlers(docker_events)
+    image_inventory.register_event_handlers(docker_events)
+    docker_events.start(app)
+    stats_collector.start()
+    network_prober.start()
+    network_sampler.start()
+    system_sampler.start()
+    image_inventory.start()
+    image_service.start()
+
+def stop_background_services():
+    """Flushes pending network usage and releases the leader lock so another worker can take over right away."""
+    _shutdown.set()
+    network_sampler.flush()
+    connection = _state.pop('leader_connection', None)
+    if connection:
+        try:
+            connection.close()
+        except Exception as e:
+            print(f"Failed to release leader lock: {e}")
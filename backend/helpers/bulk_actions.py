@@ -0,0 +1,113 @@
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from extensions import client
+from helpers.deploy_jobs import deploy_jobs
+from helpers.stack_workspace import prepare_stack_workspace
+
+BULK_DEFAULT_PARALLELISM = int(os.environ.get('DOCKORA_BULK_PARALLELISM', 4))
+BULK_MAX_PARALLELISM = int(os.environ.get('DOCKORA_BULK_MAX_PARALLELISM', 16))
+
+CONTAINER_ACTIONS = {
+    'start': lambda id: client.api.start(id),
+    'stop': lambda id: client.api.stop(id),
+    'restart': lambda id: client.api.restart(id),
+    'pause': lambda id: client.api.pause(id),
+    'unpause': lambda id: client.api.unpause(id),
+    'remove': lambda id: client.api.remove_container(id, force=True),
+}
+COMPOSE_ACTIONS = {
+    'start': ['start'],
+    'stop': ['stop'],
+    'restart': ['restart'],
+    'pause': ['pause'],
+    'unpause': ['unpause'],
+    'remove': ['rm', '--stop', '--force'],
+}
+
+def resolve_containers(ids):
+    """
+    Matches the requested ids against one container list call the way the Docker CLI does:
+    a full id, then an exact name, then an id prefix that only one container has. Returns
+    (found, errors) where found maps each requested id to its summary and errors maps the
+    ids that matched no container, or several, to a message.
+    """
+    summaries = client.api.containers(all=True)
+    found, errors = {}, {}
+    for requested in ids:
+        matches = [c for c in summaries if c['Id'] == requested] or \
+            [c for c in summaries if f"/{requested}" in (c.get('Names') or [])] or \
+            [c for c in summaries if c['Id'].startswith(requested)]
+        if len(matches) == 1:
+            found[requested] = matches[0]
+        elif matches:
+            errors[requested] = f"Ambiguous id: matches {len(matches)} containers"
+        else:
+            errors[requested] = "Container not found"
+    return found, errors
+
+def plan_bulk_action(containers, stacks):
+    """
+    Splits containers into work units: members of a Dockora-managed stack are batched into
+    one compose call per stack (so compose handles their ordering), everything else is
+    acted on per container. `stacks` maps stack names to their Stack rows.
+    """
+    units, stack_members = [], {}
+    for summary in containers:
+        labels = summary.get('Labels') or {}
+        project, service = labels.get('com.docker.compose.project'), labels.get('com.docker.compose.service')
+        if project in stacks and service:
+            stack_members.setdefault(project, []).append(summary)
+        else:
+            units.append(('container', summary))
+    for project, members in stack_members.items():
+        stack = stacks[project]
+        units.append(('stack', (project, stack.compose_content, stack.env_content, members)))
+    return units
+
+def _result(summary, action, error=None):
+    return {
+        "id": summary['Id'][:12],
+        "name": (summary.get('Names') or ['/'])[0].lstrip('/'),
+        "action": action,
+        "success": error is None,
+        "error": error,
+    }
+
+def _run_container(action, summary):
+    try:
+        CONTAINER_ACTIONS[action](summary['Id'])
+        return [_result(summary, action)]
+    except Exception as e:
+        return [_result(summary, action, str(e))]
+
+def _run_stack(app, action, project, compose_content, env_content, members):
+    services = sorted({m['Labels']['com.docker.compose.service'] for m in members})
+    # The app context is for the stack lock, which holds a database connection on Postgres.
+    with app.app_context():
+        try:
+            # Waits for any deploy job running on the stack, which would rewrite its workspace.
+            with deploy_jobs.stack_lock(project):
+                workspace = prepare_stack_workspace(project, compose_content, env_content)
+                result = subprocess.run(
+                    ['docker', 'compose', '-p', project] + COMPOSE_ACTIONS[action] + services,
+                    cwd=workspace, capture_output=True, text=True,
+                )
+            error = None if result.returncode == 0 else (result.stderr or result.stdout).strip()
+        except Exception as e:
+            error = str(e)
+    return [_result(m, action, error) for m in members]
+
+def run_bulk_action(app, units, action, parallelism=BULK_DEFAULT_PARALLELISM):
+    """Runs the work units concurrently and yields per-container results as each unit finishes."""
+    executor = ThreadPoolExecutor(max_workers=max(1, min(parallelism, BULK_MAX_PARALLELISM)), thread_name_prefix='bulk-action')
+    try:
+        futures = [
+            executor.submit(_run_stack, app, action, *payload) if kind == 'stack' else executor.submit(_run_container, action, payload)
+            for kind, payload in units
+        ]
+        for future in as_completed(futures):
+            yield from future.result()
+    finally:
+        # If the client goes away, drop the units that haven't started yet.
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,135 @@
+import threading
+import time
+from sqlalchemy import select, literal
+from sqlalchemy.dialects.postgresql import insert
+from extensions import client, db
+from models import User, Notification, ContainerStatus
+from helpers.event_bus import event_bus
+
+EVENT_STATUSES = {
+    'create': 'created',
+    'start': 'running',
+    'unpause': 'running',
+    'pause': 'paused',
+    'die': 'exited',
+}
+
+# Docker sends "kill" right before "die" when a container is stopped on purpose (docker stop, restart, compose down).
+EXPECTED_STOP_WINDOW = 30
+_recent_kills = {}
+_recent_kills_lock = threading.Lock()
+
+NOTIFICATION_DEDUP_BUCKET = 60 # seconds
+
+def notify_admins_container_stopped(container_id, container_name):
+    """
+    Notifies every admin in a single INSERT ... SELECT. Notifications carry a dedup key
+    (container, event type and time bucket), so repeats within the same bucket are
+    dropped by the unique (user_id, dedup_key) index instead of a per-admin lookup.
+    Returns the inserted notifications.
+    """
+    bucket = int(time.time() // NOTIFICATION_DEDUP_BUCKET)
+    admin_ids = select(
+        User.id,
+        literal(f"Container '{container_name}' stopped unexpectedly."),
+        literal('warning'),
+        literal(f"container:{container_id}:stopped:{bucket}"),
+    ).where(User.role == 'admin')
+    table = Notification.__table__
+    statement = insert(table).from_select(
+        ['user_id', 'message', 'type', 'dedup_key'], admin_ids
+    ).on_conflict_do_nothing(index_elements=['user_id', 'dedup_key']).returning(
+        table.c.id, table.c.user_id, table.c.message, table.c.type, table.c.is_read, table.c.created_at
+    )
+    # Only rows that were actually inserted come back; the caller publishes them once committed.
+    return db.session.execute(statement).fetchall()
+
+def publish_notifications(rows):
+    for row in rows:
+        event_bus.publish('notifications', {
+            "id": row.id,
+            "message": row.message,
+            "type": row.type,
+            "is_read": row.is_read,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+        }, user_ids={row.user_id})
+
+def sync_container_statuses():
+    """
+    Full resync of the ContainerStatus table with Docker. Runs whenever the events stream
+    (re)connects, to catch up on anything that happened while nobody was listening.
+    """
+    containers = client.api.containers(all=True)
+    statuses_from_db = {cs.id: cs for cs in ContainerStatus.query.all()}
+    current_container_ids = set()
+    new_notifications = []
+
+    for c in containers:
+        short_id = c['Id'][:12]
+        name = c['Names'][0].lstrip('/') if c.get('Names') else short_id
+        current_status = c.get('State', '')
+        current_container_ids.add(short_id)
+
+        db_status_obj = statuses_from_db.get(short_id)
+        previous_status = db_status_obj.status if db_status_obj else None
+        if previous_status and 'running' in previous_status and 'exited' in current_status:
+            new_notifications.extend(notify_admins_container_stopped(short_id, name))
+
+        if db_status_obj:
+            if db_status_obj.status != current_status:
+                db_status_obj.status = current_status
+        else:
+            db.session.add(ContainerStatus(id=short_id, status=current_status))
+
+    stale_ids = set(statuses_from_db.keys()) - current_container_ids
+    if stale_ids:
+        ContainerStatus.query.filter(ContainerStatus.id.in_(stale_ids)).delete(synchronize_session=False)
+
+    db.session.commit()
+    publish_notifications(new_notifications)
+
+def handle_container_event(event):
+    """
+    Applies a single container event to ContainerStatus and Notification.
+    Application rows are kept in sync separately by the app synchronizer.
+    """
+    action = event.get('Action', '')
+    short_id = event.get('id', '')[:12]
+    attributes = event.get('Actor', {}).get('Attributes', {})
+    name = attributes.get('name', short_id)
+
+    if action == 'kill':
+        with _recent_kills_lock:
+            _recent_kills[short_id] = time.time()
+        return
+
+    if action == 'destroy':
+        ContainerStatus.query.filter_by(id=short_id).delete(synchronize_session=False)
+        db.session.commit()
+        return
+
+    status = EVENT_STATUSES.get(action)
+    if not status:
+        return
+
+    new_notifications = []
+    if action == 'die':
+        with _recent_kills_lock:
+            now = time.time()
+            killed_at = _recent_kills.pop(short_id, None)
+            for stale_id in [i for i, t in _recent_kills.items() if now - t > EXPECTED_STOP_WINDOW]:
+                del _recent_kills[stale_id]
+        if not killed_at or now - killed_at > EXPECTED_STOP_WINDOW:
+            new_notifications = notify_admins_container_stopped(short_id, name)
+
+    container_status = ContainerStatus.query.get(short_id)
+    if container_status:
+        container_status.status = status
+    else:
+        db.session.add(ContainerStatus(id=short_id, status=status))
+    db.session.commit()
+    publish_notifications(new_notifications)
+
+def register_container_state_handlers(listener):
+    listener.on_connect(sync_container_statuses)
+    listener.on(['create', 'start', 'unpause', 'pause', 'die', 'kill', 'destroy'], handle_container_event)
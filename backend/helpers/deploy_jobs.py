@@ -0,0 +1,197 @@
+import codecs
+import os
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import psutil
+from sqlalchemy import text
+from extensions import db
+from models import DeployJob, Stack
+from helpers.stack_workspace import prepare_stack_workspace
+from helpers.stack_updates import record_stack_revision
+
+DEPLOY_JOBS_DIR = os.environ.get('DOCKORA_JOBS_DIR', '/data/jobs')
+DEPLOY_MAX_WORKERS = int(os.environ.get('DOCKORA_DEPLOY_WORKERS', 2))
+DEPLOY_JOB_RETENTION_DAYS = float(os.environ.get('DOCKORA_JOB_RETENTION_DAYS', 14))
+JOB_POLL_INTERVAL = 0.5
+FINISHED_STATUSES = ('succeeded', 'failed')
+# Arbitrary constant identifying per-stack locks among Postgres advisory locks.
+STACK_LOCK_CLASS = 0x737461
+
+def process_owner_id(pid=None):
+    """Identifies a process across workers and restarts; the start time guards against reused pids."""
+    pid = pid or os.getpid()
+    return f"{socket.gethostname()}:{pid}:{int(psutil.Process(pid).create_time())}"
+
+def owner_is_alive(owner):
+    try:
+        hostname, pid, _ = owner.split(':')
+        return hostname == socket.gethostname() and process_owner_id(int(pid)) == owner
+    except (AttributeError, ValueError, psutil.Error):
+        return False
+
+def job_log_path(job_id):
+    return os.path.join(DEPLOY_JOBS_DIR, f"{job_id}.log")
+
+def serialize_job(job):
+    log_path = job_log_path(job.id)
+    return {
+        "id": job.id,
+        "stack_name": job.stack_name,
+        "action": job.action,
+        "status": job.status,
+        "exit_code": job.exit_code,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "log_size": os.path.getsize(log_path) if os.path.exists(log_path) else 0,
+    }
+
+class DeployJobRunner:
+    """
+    Runs stack deployments outside the request that asked for them. Jobs are recorded in
+    DeployJob and run on a bounded thread pool; a per-stack lock makes jobs for the same
+    stack run one after another, across worker processes too. Compose output goes to a log file under DEPLOY_JOBS_DIR,
+    so any number of clients can follow a job, disconnect and reattach, even from another
+    worker process.
+    """
+    def __init__(self, max_workers=DEPLOY_MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='deploy-job')
+        self._stack_locks = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stack_lock(self, stack_name):
+        """
+        Lock held while a stack is being changed; anything else that runs compose for the stack
+        should take it too. Threads of this process queue on a local lock, and on Postgres a
+        session-level advisory lock on a dedicated connection keeps other workers out.
+        """
+        with self._lock:
+            local_lock = self._stack_locks.setdefault(stack_name, threading.Lock())
+        with local_lock:
+            if db.engine.dialect.name != 'postgresql':
+                yield
+                return
+            key = {"class": STACK_LOCK_CLASS, "name": stack_name}
+            with db.engine.connect() as connection:
+                connection.execute(text("SELECT pg_advisory_lock(:class, hashtext(:name))"), key)
+                try:
+                    yield
+                finally:
+                    connection.execute(text("SELECT pg_advisory_unlock(:class, hashtext(:name))"), key)
+
+    def enqueue(self, app, stack_name, compose_content, env_content, user_id=None):
+        """Records a queued deploy job and schedules it. Returns the job id."""
+        os.makedirs(DEPLOY_JOBS_DIR, exist_ok=True)
+        job = DeployJob(stack_name=stack_name, action='deploy', created_by=user_id, owner=process_owner_id())
+        db.session.add(job)
+        db.session.commit()
+        open(job_log_path(job.id), 'a').close()
+        self._executor.submit(self._run, app, job.id, stack_name, compose_content, env_content, user_id)
+        return job.id
+
+    def _run(self, app, job_id, stack_name, compose_content, env_content, user_id):
+        with app.app_context():
+            try:
+                with self.stack_lock(stack_name):
+                    self._update(job_id, status='running', started_at=datetime.utcnow())
+                    exit_code = self._deploy(job_id, stack_name, compose_content, env_content)
+                    if exit_code == 0:
+                        stack = Stack.query.filter_by(name=stack_name).first()
+                        if stack:
+                            stack.compose_content, stack.env_content = compose_content, env_content
+                        else:
+                            stack = Stack(name=stack_name, compose_content=compose_content, env_content=env_content)
+                            db.session.add(stack)
+                            db.session.flush()
+                        record_stack_revision(stack, compose_content, env_content, user_id)
+                        db.session.commit()
+                    self._update(job_id, status='succeeded' if exit_code == 0 else 'failed', exit_code=exit_code, finished_at=datetime.utcnow())
+            except Exception as e:
+                db.session.rollback()
+                print(f"Deploy job {job_id} failed: {e}")
+                self._update(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+            finally:
+                db.session.remove()
+
+    def _deploy(self, job_id, stack_name, compose_content, env_content):
+        workspace = prepare_stack_workspace(stack_name, compose_content, env_content)
+        with open(job_log_path(job_id), 'a', buffering=1) as log:
+            process = subprocess.Popen(
+                ['docker', 'compose', '-p', stack_name, 'up', '-d', '--remove-orphans'],
+                cwd=workspace,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+            return process.wait()
+
+    def _update(self, job_id, **fields):
+        DeployJob.query.filter_by(id=job_id).update(fields)
+        db.session.commit()
+
+deploy_jobs = DeployJobRunner()
+
+def fail_interrupted_jobs():
+    """
+    Marks jobs left queued or running by a process that no longer exists (a restarted server
+    or a crashed or recycled worker) as failed. Jobs of live workers are left alone.
+    """
+    unfinished = DeployJob.query.filter(DeployJob.status.notin_(FINISHED_STATUSES)).all()
+    interrupted = [job.id for job in unfinished if not owner_is_alive(job.owner)]
+    if interrupted:
+        DeployJob.query.filter(DeployJob.id.in_(interrupted), DeployJob.status.notin_(FINISHED_STATUSES)).update(
+            {'status': 'failed', 'error': 'Interrupted: the worker running it has stopped.', 'finished_at': datetime.utcnow()},
+            synchronize_session=False,
+        )
+    db.session.commit()
+
+def purge_old_jobs(retention_days=DEPLOY_JOB_RETENTION_DAYS):
+    """
+    Deletes jobs that finished more than `retention_days` ago, with their log files, so the
+    job directory doesn't grow forever. Logs go first: if deleting the rows fails, the next
+    sweep tries again instead of leaving logs nothing points at.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    expired = [job_id for (job_id,) in db.session.query(DeployJob.id).filter(
+        DeployJob.status.in_(FINISHED_STATUSES), DeployJob.finished_at < cutoff,
+    ).all()]
+    for job_id in expired:
+        try:
+            os.remove(job_log_path(job_id))
+        except FileNotFoundError:
+            pass
+    if expired:
+        DeployJob.query.filter(DeployJob.id.in_(expired)).delete(synchronize_session=False)
+    db.session.commit()
+    return len(expired)
+
+def follow_job_log(job_id, offset=0):
+    """
+    Yields the job's log from the given byte offset, then keeps following it until the
+    job has finished and the whole log has been sent. The job row is re-read between
+    polls, so this works for jobs running in another worker process.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    with open(job_log_path(job_id), 'rb') as log:
+        log.seek(offset)
+        while True:
+            chunk = decoder.decode(log.read())
+            if chunk:
+                yield chunk
+                continue
+            status = db.session.query(DeployJob.status).filter_by(id=job_id).scalar()
+            # End the read transaction so the connection isn't held while waiting.
+            db.session.rollback()
+            if status in FINISHED_STATUSES or status is None:
+                # Pick up anything written between the last read and the status change.
+                chunk = decoder.decode(log.read(), final=True)
+                if chunk:
+                    yield chunk
+                return
+            time.sleep(JOB_POLL_INTERVAL)
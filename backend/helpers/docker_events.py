@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import defaultdict
+from extensions import stream_client, db
+
+class DockerEventListener:
+    """
+    Follows the Docker events stream in a background thread and dispatches container and
+    image events to the handlers registered for their type and action (e.g. 'start',
+    'die', 'destroy' for containers, 'pull' or 'delete' for images).
+    Handlers registered with on_connect run every time the stream is (re)established,
+    so they can resync whatever may have been missed while disconnected.
+    """
+    def __init__(self, reconnect_delay=5):
+        self.reconnect_delay = reconnect_delay
+        self._handlers = defaultdict(list)
+        self._connect_handlers = []
+        self._app = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    def on(self, actions, handler, event_type='container'):
+        if isinstance(actions, str):
+            actions = [actions]
+        for action in actions:
+            self._handlers[(event_type, action)].append(handler)
+
+    def on_connect(self, handler):
+        self._connect_handlers.append(handler)
+
+    def start(self, app):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._app = app
+        threading.Thread(target=self._run, name='docker-events', daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                events = stream_client.events(decode=True, filters={'type': ['container', 'image']})
+                for handler in self._connect_handlers:
+                    self._call(handler)
+                for event in events:
+                    action = event.get('Action', '')
+                    # Exec and health events arrive as e.g. "exec_start: sh" or "health_status: healthy".
+                    base_action = action.split(':', 1)[0]
+                    event_type = event.get('Type', 'container')
+                    for handler in self._handlers.get((event_type, base_action), []) + self._handlers.get((event_type, '*'), []):
+                        self._call(handler, event)
+            except Exception as e:
+                print(f"Docker events stream interrupted: {e}")
+            time.sleep(self.reconnect_delay)
+
+    def _call(self, handler, *args):
+        with self._app.app_context():
+            try:
+                handler(*args)
+            except Exception as e:
+                print(f"Docker event handler {handler.__name__} failed: {e}")
+                db.session.rollback()
+
+docker_events = DockerEventListener()
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import docker
+import paramiko
+from docker.transport.sshconn import SSHHTTPAdapter
+from extensions import client, stream_client, DOCKER_API_VERSION
+from models import DockerHost, SystemSetting
+from helpers.snapshot_cache import Snapshot
+
+LOCAL_HOST = 'local'
+DOCKER_HOSTS_DIR = '/data/docker-hosts'
+DOCKER_HOST_TIMEOUT = float(os.environ.get('DOCKORA_DOCKER_HOST_TIMEOUT', 15))
+DOCKER_HOST_POOL_SIZE = int(os.environ.get('DOCKORA_DOCKER_HOST_POOL_SIZE', 8))
+FAN_OUT_WORKERS = int(os.environ.get('DOCKORA_DOCKER_HOST_FAN_OUT_WORKERS', 16))
+HOST_SCHEMES = ('tcp', 'ssh')
+SSH_SETTING_KEYS = ('ssh_username', 'ssh_port', 'ssh_password')
+HOST_ERRORS_HEADER = 'X-Dockora-Host-Errors'
+
+class PasswordSSHHTTPAdapter(SSHHTTPAdapter):
+    """
+    docker-py's paramiko transport, completed with the SSH settings (username, port and
+    password) for whatever the host URL leaves out, so hosts don't need key auth. Like the
+    SSH console, unknown host keys are accepted.
+    """
+    def __init__(self, base_url, ssh_settings, timeout, max_pool_size, connect_timeout=None):
+        self.ssh_settings = ssh_settings
+        self.connect_timeout = connect_timeout or timeout
+        super().__init__(base_url, timeout=timeout, max_pool_size=max_pool_size)
+
+    def _create_paramiko_client(self, base_url):
+        super()._create_paramiko_client(base_url)
+        parsed = urllib.parse.urlparse(base_url)
+        if parsed.username is None and self.ssh_settings.get('ssh_username'):
+            self.ssh_params['username'] = self.ssh_settings['ssh_username']
+        if parsed.port is None and self.ssh_settings.get('ssh_port'):
+            self.ssh_params['port'] = int(self.ssh_settings['ssh_port'])
+        if self.ssh_settings.get('ssh_password'):
+            self.ssh_params['password'] = self.ssh_settings['ssh_password']
+        self.ssh_params['timeout'] = self.connect_timeout
+        self.ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+def load_ssh_settings():
+    settings = SystemSetting.query.filter(SystemSetting.key.in_(SSH_SETTING_KEYS)).all()
+    return {s.key: s.value for s in settings if s.value}
+
+def validate_host_url(url):
+    """Returns an error message for URLs we can't connect to, or None."""
+    parsed = urllib.parse.urlparse(url or '')
+    if parsed.scheme not in HOST_SCHEMES or not parsed.hostname:
+        return "URL must look like tcp://host:2376 or ssh://user@host."
+    if parsed.scheme == 'tcp' and not parsed.port:
+        return "tcp:// URLs need a port (usually 2376 with TLS, 2375 without)."
+    return None
+
+def host_address(url):
+    return urllib.parse.urlparse(url).hostname
+
+def _tls_config(host):
+    """Writes the host's PEMs to its own directory (docker-py wants file paths) and returns a TLSConfig."""
+    cert_dir = os.path.join(DOCKER_HOSTS_DIR, str(host.id))
+    os.makedirs(cert_dir, mode=0o700, exist_ok=True)
+    paths = {}
+    for name, content in (('ca.pem', host.ca_cert), ('cert.pem', host.client_cert), ('key.pem', host.client_key)):
+        if not content:
+            continue
+        path = paths[name] = os.path.join(cert_dir, name)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+    client_cert = (paths['cert.pem'], paths['key.pem']) if 'cert.pem' in paths and 'key.pem' in paths else None
+    return docker.TLSConfig(client_cert=client_cert, ca_cert=paths.get('ca.pem'), verify=host.tls_verify)
+
+def build_host_client(host, ssh_settings, stream=False):
+    """
+    Connects a docker.DockerClient to a registered host over TCP (optionally TLS) or SSH.
+    A `stream` client has no read timeout, for followed logs (like extensions.stream_client).
+    """
+    connect_timeout = host.timeout or DOCKER_HOST_TIMEOUT
+    timeout = None if stream else connect_timeout
+    if host.url.startswith('ssh://'):
+        # Let docker-py set up its SSH plumbing without connecting (shell_out defers that),
+        # then swap in the paramiko adapter that knows the password.
+        host_client = docker.DockerClient(
+            base_url=host.url, version=DOCKER_API_VERSION or docker.constants.DEFAULT_DOCKER_API_VERSION,
+            timeout=timeout, use_ssh_client=True, max_pool_size=DOCKER_HOST_POOL_SIZE,
+        )
+        adapter = PasswordSSHHTTPAdapter(host.url, ssh_settings, timeout, DOCKER_HOST_POOL_SIZE, connect_timeout)
+        host_client.api._custom_adapter = adapter
+        host_client.api.mount('http+docker://ssh', adapter)
+        if not DOCKER_API_VERSION:
+            host_client.api._version = host_client.api._retrieve_server_version()
+        return host_client
+
+    base_url = host.url.replace('tcp://', 'https://' if host.tls else 'http://', 1)
+    return docker.DockerClient(
+        base_url=base_url, version=DOCKER_API_VERSION or 'auto', timeout=timeout,
+        tls=_tls_config(host) if host.tls else False, max_pool_size=DOCKER_HOST_POOL_SIZE,
+    )
+
+def serialize_host(host):
+    return {
+        "id": host.id,
+        "name": host.name,
+        "url": host.url,
+        "tls": host.tls,
+        "tls_verify": host.tls_verify,
+        "has_ca_cert": bool(host.ca_cert),
+        "has_client_cert": bool(host.client_cert and host.client_key),
+        "enabled": host.enabled,
+        "timeout": host.timeout or DOCKER_HOST_TIMEOUT,
+        "created_at": host.created_at.isoformat() + 'Z' if host.created_at else None,
+    }
+
+class DockerHostRegistry:
+    """
+    Keeps one client per registered remote Docker host (and a stream client for hosts whose
+    logs are followed), built on first use and rebuilt
+    when the host's settings (or the SSH settings it relies on) change, and runs queries
+    against every enabled host at once. The local daemon is always the host 'local'.
+    """
+    def __init__(self, max_workers=FAN_OUT_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='docker-host')
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(host, ssh_settings):
+        fields = [host.url, host.tls, host.tls_verify, host.ca_cert, host.client_cert, host.client_key, host.timeout]
+        if host.url.startswith('ssh://'):
+            fields.append(sorted(ssh_settings.items()))
+        return hashlib.sha256(json.dumps(fields, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, host, ssh_settings=None, stream=False):
+        """Returns the client (or stream client) for a DockerHost row, connecting it if needed."""
+        ssh_settings = load_ssh_settings() if ssh_settings is None else ssh_settings
+        fingerprint = self._fingerprint(host, ssh_settings)
+        key = (host.id, stream)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry and entry[0] == fingerprint:
+                return entry[1]
+        host_client = build_host_client(host, ssh_settings, stream)
+        with self._lock:
+            stale = self._clients.get(key)
+            self._clients[key] = (fingerprint, host_client)
+        if stale:
+            self._close(stale[1])
+        return host_client
+
+    def client_for(self, name, stream=False):
+        """
+        Returns the client for a host name ('local' or a registered host), or None if there
+        is no such host. `stream` picks the client without a read timeout.
+        """
+        if not name or name == LOCAL_HOST:
+            return stream_client if stream else client
+        host = DockerHost.query.filter_by(name=name, enabled=True).first()
+        return self.get(host, stream=stream) if host else None
+
+    def invalidate(self, host_id, remove_certs=False):
+        with self._lock:
+            entries = [self._clients.pop((host_id, stream), None) for stream in (False, True)]
+        for entry in entries:
+            if entry:
+                self._close(entry[1])
+        if remove_certs:
+            shutil.rmtree(os.path.join(DOCKER_HOSTS_DIR, str(host_id)), ignore_errors=True)
+
+    @staticmethod
+    def _close(host_client):
+        try:
+            host_client.close()
+        except Exception as e:
+            print(f"Failed to close Docker host client: {e}")
+
+    def fan_out(self, local_fn, remote_fn):
+        """
+        Runs local_fn() for the local daemon and remote_fn(host, client) for every enabled
+        remote host concurrently. Each remote host gets its own timeout; a host that fails
+        or doesn't answer in time is reported instead of failing the whole query.
+        Returns (results, errors), both keyed by host name, in registration order.
+        Must be called within an app context (host rows are read from the database).
+        """
+        hosts = DockerHost.query.filter_by(enabled=True).order_by(DockerHost.id).all()
+        if not hosts:
+            # Single-host setups behave exactly as before: local errors propagate.
+            return {LOCAL_HOST: local_fn()}, {}
+        ssh_settings = load_ssh_settings() if any(h.url.startswith('ssh://') for h in hosts) else {}
+
+        def run_remote(host):
+            return remote_fn(host, self.get(host, ssh_settings))
+
+        started = time.monotonic()
+        futures = [(host.name, host.timeout or DOCKER_HOST_TIMEOUT, self._executor.submit(run_remote, host)) for host in hosts]
+        results, errors = {}, {}
+        try:
+            results[LOCAL_HOST] = local_fn()
+        except Exception as e:
+            errors[LOCAL_HOST] = str(e)
+
+        for name, timeout, future in futures:
+            remaining = max(0.0, started + timeout - time.monotonic())
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                # The call keeps its worker until the host's client timeout ends it.
+                errors[name] = f"No answer within {timeout:g}s."
+            except Exception as e:
+                errors[name] = str(e)
+        return results, errors
+
+def merged_snapshot(results, errors):
+    """
+    Flattens per-host lists into one list whose items carry their host's name. Hosts that
+    failed are listed as {name: error} JSON in the X-Dockora-Host-Errors header, so the
+    response stays a plain list for existing clients.
+    """
+    items = [{**item, "host": host} for host, host_items in results.items() for item in host_items]
+    return Snapshot(items, {HOST_ERRORS_HEADER: json.dumps(errors)} if errors else {})
+
+docker_hosts = DockerHostRegistry()
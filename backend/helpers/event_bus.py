@@ -0,0 +1,93 @@
+import queue
+import threading
+
+EVENT_QUEUE_SIZE = 256
+
+class EventSubscription:
+    def __init__(self, topics, user_id):
+        self.topics = set(topics)
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self._dropped = set()
+
+    def push(self, topic, data, snapshot=None):
+        """
+        Queues an event without blocking. `snapshot` is the full retained state of the topic:
+        once a delta of that topic has been dropped, the next delivery sends the snapshot
+        instead so the client catches up on the fields it missed.
+        """
+        if topic in self._dropped and snapshot is not None:
+            data = snapshot
+        try:
+            self.queue.put_nowait((topic, data))
+            self._dropped.discard(topic)
+        except queue.Full:
+            # The client has stopped reading; drop events rather than block publishers.
+            self._dropped.add(topic)
+
+class EventBus:
+    """
+    In-process publish/subscribe hub behind the /api/events push channel.
+    Retained topics (metrics) keep their last full state: publishers send the full state,
+    subscribers receive only the fields that changed, and new subscribers start with the
+    full retained state. Other topics are plain event streams. Events can be limited to
+    specific users (e.g. notifications).
+    """
+    def __init__(self):
+        self._subscriptions = set()
+        self._retained = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics, user_id=None):
+        subscription = EventSubscription(topics, user_id)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            for topic in subscription.topics:
+                if topic in self._retained:
+                    subscription.push(topic, dict(self._retained[topic]))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, topic, data, retain=False, user_ids=None):
+        snapshot = None
+        with self._lock:
+            if retain:
+                previous = self._retained.get(topic, {})
+                delta = {key: value for key, value in data.items() if previous.get(key) != value}
+                if not delta:
+                    return
+                snapshot = self._retained[topic] = {**previous, **data}
+                data = delta
+            subscribers = [s for s in self._subscriptions if topic in s.topics and (user_ids is None or s.user_id in user_ids)]
+        for subscription in subscribers:
+            subscription.push(topic, data, snapshot)
+
+    def has_subscribers(self, topic):
+        with self._lock:
+            return any(topic in s.topics for s in self._subscriptions)
+
+event_bus = EventBus()
+
+CONTAINER_EVENT_STATUSES = {
+    'create': 'created',
+    'start': 'running',
+    'unpause': 'running',
+    'pause': 'paused',
+    'die': 'exited',
+    'destroy': 'removed',
+}
+
+def publish_container_event(event):
+    action = event.get('Action', '')
+    event_bus.publish('containers', {
+        "id": event.get('id', '')[:12],
+        "name": event.get('Actor', {}).get('Attributes', {}).get('name'),
+        "action": action,
+        "status": CONTAINER_EVENT_STATUSES.get(action),
+    })
+
+def register_event_bus_handlers(listener):
+    listener.on(list(CONTAINER_EVENT_STATUSES) + ['rename'], publish_container_event)
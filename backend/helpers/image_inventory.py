@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from extensions import docker_client, DOCKER_SLOW_TIMEOUT
+
+IMAGE_INVENTORY_INTERVAL = float(os.environ.get('DOCKORA_IMAGE_INVENTORY_INTERVAL', 300))
+# Container churn changes which images are in use; batch it into one refresh.
+IMAGE_INVENTORY_DEBOUNCE = float(os.environ.get('DOCKORA_IMAGE_INVENTORY_DEBOUNCE', 10))
+
+def is_dangling(image):
+    return not [tag for tag in image.get('RepoTags') or [] if tag != '<none>:<none>']
+
+def build_inventory(df):
+    """Turns a `docker system df` response into per-image usage and a summary."""
+    containers_by_image = {}
+    for c in df.get('Containers') or []:
+        containers_by_image.setdefault(c.get('ImageID'), []).append({
+            "id": c['Id'][:12],
+            "name": (c.get('Names') or ['/'])[0].lstrip('/'),
+            "state": c.get('State'),
+        })
+
+    images = []
+    for image in df.get('Images') or []:
+        size = image.get('Size') or 0
+        # SharedSize is -1 when the daemon didn't compute it.
+        shared_size = max(image.get('SharedSize') or 0, 0)
+        containers = containers_by_image.get(image['Id'], [])
+        images.append({
+            "id": image['Id'].replace("sha256:", "")[:12],
+            "tags": [tag for tag in image.get('RepoTags') or [] if tag != '<none>:<none>'],
+            "size": size,
+            "shared_size": shared_size,
+            "unique_size": size - shared_size,
+            "created": image.get('Created'),
+            "containers": containers,
+            "dangling": is_dangling(image),
+            "unused": not containers,
+        })
+    images.sort(key=lambda i: i["unique_size"], reverse=True)
+
+    unused = [i for i in images if i["unused"]]
+    summary = {
+        "count": len(images),
+        "layers_size": df.get('LayersSize') or 0,
+        "dangling_count": sum(1 for i in images if i["dangling"]),
+        "unused_count": len(unused),
+        # Layers shared with images still in use stay on disk, so only unique sizes count.
+        "reclaimable_size": sum(i["unique_size"] for i in unused),
+        "dangling_reclaimable_size": sum(i["unique_size"] for i in unused if i["dangling"]),
+    }
+    return images, summary
+
+def list_host_images(host_client):
+    """
+    Per-image usage for a remote Docker host. Built from the image and container lists
+    instead of df, which is too slow to run per request; shared sizes are unknown, so
+    each image counts in full.
+    """
+    images, _ = build_inventory({
+        'Images': host_client.api.images(),
+        'Containers': host_client.api.containers(all=True),
+    })
+    return images
+
+class ImageInventory:
+    """
+    Caches the image inventory built from client.df(), which is slow on hosts with many
+    images. A background thread refreshes it periodically and shortly after containers
+    are created or removed; requests always read the cached copy.
+    """
+    def __init__(self, interval=IMAGE_INVENTORY_INTERVAL):
+        self.interval = interval
+        self._images = []
+        self._summary = {}
+        self._updated_at = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._run, name='image-inventory', daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Image inventory refresh failed: {e}")
+            if self._wake.wait(self.interval):
+                time.sleep(IMAGE_INVENTORY_DEBOUNCE)
+                self._wake.clear()
+
+    def refresh(self):
+        # Concurrent callers wait for the refresh in progress instead of running df again.
+        if not self._refresh_lock.acquire(blocking=False):
+            with self._refresh_lock:
+                return
+        try:
+            images, summary = build_inventory(docker_client(DOCKER_SLOW_TIMEOUT).df())
+            with self._lock:
+                self._images, self._summary, self._updated_at = images, summary, time.time()
+        finally:
+            self._refresh_lock.release()
+
+    def request_refresh(self, event=None):
+        self._wake.set()
+
+    def register_event_handlers(self, listener):
+        listener.on(['create', 'destroy'], self.request_refresh)
+        # Images pulled, tagged or removed outside Dockora (CLI, compose, watchtower).
+        listener.on(['pull', 'tag', 'untag', 'delete', 'load', 'import'], self.request_refresh, event_type='image')
+
+    def snapshot(self):
+        """Returns the cached inventory, building it first if nothing has been cached yet."""
+        if self._updated_at is None:
+            self.refresh()
+        with self._lock:
+            return {"images": self._images, "summary": self._summary, "updated_at": self._updated_at}
+
+image_inventory = ImageInventory()
@@ -0,0 +1,272 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import docker
+from extensions import client, stream_client
+from helpers.image_inventory import image_inventory
+
+PULL_CONCURRENCY = int(os.environ.get('DOCKORA_PULL_CONCURRENCY', 3))
+PULL_HISTORY_SIZE = 50
+PULL_QUEUE_SIZE = 1000
+UPDATE_CHECK_INTERVAL = float(os.environ.get('DOCKORA_IMAGE_UPDATE_INTERVAL', 6 * 3600))
+UPDATE_CHECK_CONCURRENCY = int(os.environ.get('DOCKORA_IMAGE_UPDATE_CONCURRENCY', 4))
+FINISHED_PULL_STATUSES = ('succeeded', 'failed')
+
+class PullTask:
+    """
+    One image pull. Keeps per-layer progress and fans progress events out to viewers.
+    Follow-up work registered with add_done_callback (e.g. creating the container the
+    image was pulled for) runs before the task counts as done; what a callback returns,
+    or the error it raises, is kept as the task's result.
+    """
+    def __init__(self, image):
+        self.id = str(uuid.uuid4())
+        self.image = image
+        self.status = 'queued'
+        self.error = None
+        self.result = None
+        self.result_error = None
+        self.layers = {}
+        self.created_at = time.time()
+        self.finished_at = None
+        self._done = False
+        self._callbacks = []
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def to_dict(self):
+        with self._lock:
+            total = sum(layer.get('total') or 0 for layer in self.layers.values())
+            current = sum(layer.get('current') or 0 for layer in self.layers.values())
+            return {
+                "id": self.id,
+                "image": self.image,
+                "status": self.status,
+                "error": self.error,
+                "result": self.result,
+                "result_error": self.result_error,
+                "done": self._done,
+                "layers": {layer_id: dict(layer) for layer_id, layer in self.layers.items()},
+                "progress": round(current / total * 100, 1) if total else None,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+
+    def _done_event(self):
+        return {"type": "done", "status": self.status, "error": self.error, "result": self.result, "result_error": self.result_error}
+
+    def subscribe(self):
+        """Returns a queue primed with the current state; it ends with a 'done' event."""
+        subscription = queue.Queue(maxsize=PULL_QUEUE_SIZE)
+        subscription.put({"type": "snapshot", **self.to_dict()})
+        with self._lock:
+            if self._done:
+                subscription.put(self._done_event())
+            else:
+                self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                # A slow viewer misses intermediate progress; the final event is still delivered below.
+                pass
+
+    def _progress(self, event):
+        if 'error' in event:
+            raise docker.errors.APIError(event['error'])
+        layer_id = event.get('id')
+        detail = event.get('progressDetail') or {}
+        if not layer_id or event.get('status', '').startswith(('Pulling from', 'Digest:', 'Status:')):
+            self._publish({"type": "status", "status": event.get('status')})
+            return
+        with self._lock:
+            layer = self.layers.setdefault(layer_id, {})
+            layer["status"] = event.get('status')
+            if detail.get('total'):
+                layer["current"], layer["total"] = detail.get('current', 0), detail['total']
+            elif event.get('status') in ('Download complete', 'Pull complete') and layer.get('total'):
+                layer["current"] = layer["total"]
+        self._publish({"type": "progress", "layer": layer_id, "status": event.get('status'), "current": detail.get('current'), "total": detail.get('total')})
+
+    def _run_callback(self, callback):
+        try:
+            result = callback(self)
+            if result is not None:
+                self.result = result
+        except Exception as e:
+            print(f"Pull callback for {self.image} failed: {e}")
+            self.result_error = str(e)
+
+    def _finish(self, status, error=None):
+        with self._lock:
+            self.status, self.error = status, error
+        self._publish({"type": "status", "status": status})
+        # Viewers only get "done" once the follow-up work has finished, so they learn its outcome too.
+        while True:
+            with self._lock:
+                callbacks, self._callbacks = self._callbacks, []
+                if not callbacks:
+                    self._done, self.finished_at = True, time.time()
+                    subscribers, self._subscribers = self._subscribers, set()
+                    done_event = self._done_event()
+                    break
+            for callback in callbacks:
+                self._run_callback(callback)
+        for subscription in subscribers:
+            try:
+                subscription.put(done_event, timeout=5)
+            except queue.Full:
+                pass
+
+    def add_done_callback(self, callback):
+        """Runs callback(task) once the pull has finished, right away if the task is already done."""
+        with self._lock:
+            if not self._done:
+                self._callbacks.append(callback)
+                return
+        self._run_callback(callback)
+
+class ImageService:
+    """
+    Pulls images in the background with bounded concurrency (a pull already in progress
+    for the same image is shared), and periodically compares the images of running
+    containers with their registries by digest so update checks never pull in a request.
+    """
+    def __init__(self, pull_concurrency=PULL_CONCURRENCY, update_interval=UPDATE_CHECK_INTERVAL):
+        self.update_interval = update_interval
+        self._executor = ThreadPoolExecutor(max_workers=pull_concurrency, thread_name_prefix='image-pull')
+        self._tasks = OrderedDict()
+        self._active = {}
+        self._updates = {}
+        self._updates_checked_at = None
+        self._check_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._run_update_checks, name='image-update-check', daemon=True).start()
+
+    def pull(self, image):
+        """Queues a pull of the image (or joins the one in progress) and returns its PullTask."""
+        with self._lock:
+            task = self._active.get(image)
+            if task:
+                return task
+            task = self._active[image] = PullTask(image)
+            self._tasks[task.id] = task
+            while len(self._tasks) > PULL_HISTORY_SIZE:
+                oldest_id, oldest = next(iter(self._tasks.items()))
+                if oldest.status not in FINISHED_PULL_STATUSES:
+                    break
+                del self._tasks[oldest_id]
+        self._executor.submit(self._pull, task)
+        return task
+
+    def _pull(self, task):
+        task.status = 'pulling'
+        try:
+            for event in stream_client.api.pull(task.image, stream=True, decode=True):
+                task._progress(event)
+        except Exception as e:
+            self._release(task)
+            task._finish('failed', str(e))
+            return
+        self._release(task)
+        task._finish('succeeded')
+        image_inventory.request_refresh()
+        if task.image in self._updates:
+            # The new image is local now; re-check so the badge reflects it.
+            self._wake.set()
+
+    def _release(self, task):
+        with self._lock:
+            if self._active.get(task.image) is task:
+                del self._active[task.image]
+
+    def get_task(self, task_id):
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def tasks(self):
+        with self._lock:
+            tasks = list(self._tasks.values())
+        return [task.to_dict() for task in reversed(tasks)]
+
+    def _run_update_checks(self):
+        while True:
+            try:
+                self.check_updates()
+            except Exception as e:
+                print(f"Image update check failed: {e}")
+            self._wake.wait(self.update_interval)
+            self._wake.clear()
+
+    def request_update_check(self):
+        self._wake.set()
+
+    def check_updates(self):
+        """
+        Compares the digest each running container's image reference resolves to in its
+        registry with the digests of the local image. Only manifests are fetched, no layers.
+        """
+        if not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            images = {}
+            for c in client.api.containers():
+                images.setdefault(c['Image'], set()).add(c['ImageID'])
+            with ThreadPoolExecutor(max_workers=UPDATE_CHECK_CONCURRENCY) as executor:
+                results = dict(zip(images, executor.map(lambda item: self._check_image(*item), images.items())))
+            with self._lock:
+                self._updates, self._updates_checked_at = results, time.time()
+        finally:
+            self._check_lock.release()
+
+    def _check_image(self, image, running_image_ids):
+        result = {"image": image, "update_available": None, "pulled": False, "remote_digest": None, "error": None}
+        if image.startswith('sha256:'):
+            result["error"] = "Container was created from an image id, not a reference."
+            return result
+        try:
+            local_digests = set()
+            for image_id in running_image_ids:
+                local_digests.update(d.split('@', 1)[-1] for d in client.api.inspect_image(image_id).get('RepoDigests') or [])
+            if not local_digests:
+                result["error"] = "Image was built locally or never pulled from a registry."
+                return result
+            remote_digest = client.images.get_registry_data(image).id
+            result["remote_digest"] = remote_digest
+            result["update_available"] = remote_digest not in local_digests
+            if result["update_available"]:
+                # A newer image may already have been pulled; recreating the container picks it up.
+                try:
+                    result["pulled"] = client.api.inspect_image(image)['Id'] not in running_image_ids
+                except docker.errors.ImageNotFound:
+                    pass
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    def updates(self):
+        with self._lock:
+            return {"images": list(self._updates.values()), "checked_at": self._updates_checked_at}
+
+image_service = ImageService()
@@ -0,0 +1,149 @@
+import heapq
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from extensions import stream_client
+from helpers.log_helpers import iter_log_lines, split_timestamp, timestamp_sort_key
+
+LOG_BACKLOG = int(os.environ.get('DOCKORA_LOG_BACKLOG', 50))
+LOG_QUEUE_SIZE = int(os.environ.get('DOCKORA_LOG_QUEUE_SIZE', 2000))
+LOG_MERGE_WINDOW = 0.25 # seconds a line waits for earlier-stamped lines from other containers
+LOG_HEARTBEAT = 15
+
+LogEntry = namedtuple('LogEntry', ['sort_key', 'timestamp', 'container_id', 'name', 'line'])
+StreamEnd = namedtuple('StreamEnd', ['container_id'])
+
+class _Upstream:
+    def __init__(self, container_id, name, api):
+        self.container_id = container_id
+        self.name = name
+        self.api = api
+        self.subscribers = set()
+        self.backlog = deque(maxlen=LOG_BACKLOG)
+        self.stream = None
+        self.closed = False
+
+class LogSubscription:
+    """A viewer's queue of log entries from one or more containers."""
+    def __init__(self, container_ids):
+        self.container_ids = set(container_ids)
+        self.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.backlog = []
+        self.dropped = 0
+
+    def push(self, item):
+        try:
+            if isinstance(item, StreamEnd):
+                self.queue.put(item, timeout=5)
+            else:
+                self.queue.put_nowait(item)
+        except queue.Full:
+            # A slow viewer loses lines rather than stalling the shared upstream.
+            self.dropped += 1
+
+    def entries(self, merge_window=LOG_MERGE_WINDOW, heartbeat=LOG_HEARTBEAT):
+        """
+        Yields LogEntry objects merged by timestamp, starting with the backlog.
+        Lines are held for merge_window seconds so lines from other containers that
+        were logged earlier but arrived later can be emitted first. Yields None as a
+        heartbeat when nothing arrived for `heartbeat` seconds. Ends once every
+        container's stream has ended.
+        """
+        yield from self.backlog
+        active = set(self.container_ids)
+        pending = []
+        sequence = itertools.count()
+        while active or pending:
+            try:
+                item = self.queue.get(timeout=merge_window if pending else heartbeat)
+            except queue.Empty:
+                item = None
+            if isinstance(item, StreamEnd):
+                active.discard(item.container_id)
+            elif item is not None:
+                heapq.heappush(pending, (item.sort_key, next(sequence), time.monotonic(), item))
+
+            flush_before = time.monotonic() - merge_window
+            while pending and (not active or pending[0][2] <= flush_before):
+                yield heapq.heappop(pending)[3]
+            if item is None and not pending:
+                yield None
+
+class LogBroker:
+    """
+    Fans Docker log streams out to any number of viewers. Each container has at most
+    one upstream `logs(follow=True)` subscription, shared by every viewer following it,
+    plus a small backlog so viewers joining later still see the recent tail.
+    """
+    def __init__(self):
+        self._upstreams = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, containers, api=None):
+        """
+        Subscribes to a list of (container_id, name) pairs and returns a LogSubscription.
+        `api` is the low-level client of the host they run on (a stream client, without read
+        timeout); the local daemon by default.
+        """
+        subscription = LogSubscription(container_id for container_id, _ in containers)
+        backlog = []
+        to_start = []
+        with self._lock:
+            for container_id, name in containers:
+                upstream = self._upstreams.get(container_id)
+                if not upstream:
+                    upstream = _Upstream(container_id, name, api)
+                    self._upstreams[container_id] = upstream
+                    to_start.append(upstream)
+                upstream.subscribers.add(subscription)
+                backlog.extend(upstream.backlog)
+        subscription.backlog = sorted(backlog, key=lambda entry: entry.sort_key)
+        for upstream in to_start:
+            threading.Thread(target=self._follow, args=(upstream,), name=f'logs-{upstream.container_id}', daemon=True).start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        to_close = []
+        with self._lock:
+            for container_id in subscription.container_ids:
+                upstream = self._upstreams.get(container_id)
+                if not upstream:
+                    continue
+                upstream.subscribers.discard(subscription)
+                if not upstream.subscribers:
+                    upstream.closed = True
+                    del self._upstreams[container_id]
+                    to_close.append(upstream)
+        for upstream in to_close:
+            if upstream.stream:
+                upstream.stream.close()
+
+    def _follow(self, upstream):
+        try:
+            upstream.stream = (upstream.api or stream_client.api).logs(upstream.container_id, stream=True, follow=True, timestamps=True, tail=LOG_BACKLOG)
+            if upstream.closed:
+                upstream.stream.close()
+                return
+            for line in iter_log_lines(upstream.stream):
+                timestamp, text = split_timestamp(line)
+                entry = LogEntry(timestamp_sort_key(timestamp), timestamp, upstream.container_id, upstream.name, text)
+                with self._lock:
+                    upstream.backlog.append(entry)
+                    subscribers = list(upstream.subscribers)
+                for subscription in subscribers:
+                    subscription.push(entry)
+        except Exception as e:
+            if not upstream.closed:
+                print(f"Log stream for container {upstream.container_id} ended: {e}")
+        finally:
+            with self._lock:
+                if self._upstreams.get(upstream.container_id) is upstream:
+                    del self._upstreams[upstream.container_id]
+                subscribers = list(upstream.subscribers)
+            for subscription in subscribers:
+                subscription.push(StreamEnd(upstream.container_id))
+
+log_broker = LogBroker()
@@ -0,0 +1,36 @@
+def iter_log_lines(chunks):
+    """
+    Turns a Docker log stream into complete lines.
+    Docker yields multiplexed frames for regular containers and single bytes for TTY
+    containers, so chunks don't line up with lines; only one partial line is buffered.
+    """
+    pending = b''
+    for chunk in chunks:
+        pending += chunk
+        if b'\n' not in chunk:
+            continue
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            yield line.decode('utf-8', errors='replace')
+    if pending:
+        yield pending.decode('utf-8', errors='replace')
+
+def split_timestamp(line):
+    """
+    Splits a line logged with timestamps=True into (timestamp, text).
+    Returns (None, line) if the line doesn't start with a timestamp.
+    """
+    timestamp, sep, text = line.partition(' ')
+    if not sep or not timestamp[:4].isdigit() or 'T' not in timestamp:
+        return None, line
+    return timestamp, text
+
+def timestamp_sort_key(timestamp):
+    """
+    Docker timestamps are RFC3339Nano, which trims trailing zeros from the fraction,
+    so they only sort correctly as strings once the fraction is padded to 9 digits.
+    """
+    if not timestamp:
+        return ''
+    base, _, fraction = timestamp.rstrip('Z').partition('.')
+    return f"{base}.{fraction.ljust(9, '0')}"
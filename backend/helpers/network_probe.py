@@ -0,0 +1,194 @@
+import os
+import re
+import socket
+import subprocess
+import threading
+import time
+import psutil
+import requests
+from helpers.event_bus import event_bus
+
+PROBE_INTERVALS = {
+    'connectivity': float(os.environ.get('DOCKORA_PROBE_CONNECTIVITY_INTERVAL', 15)),
+    'latency': float(os.environ.get('DOCKORA_PROBE_LATENCY_INTERVAL', 30)),
+    'public_ip': float(os.environ.get('DOCKORA_PROBE_PUBLIC_IP_INTERVAL', 600)),
+    'interfaces': float(os.environ.get('DOCKORA_PROBE_INTERFACES_INTERVAL', 60)),
+}
+
+class NetworkProber:
+    """
+    Runs the slow network probes (connectivity check, ping, public IP lookup, gateway and
+    DNS discovery) in one background thread, each on its own interval, and caches the
+    results so /system/network-stats never blocks on them. Results are also pushed on the
+    retained "network" topic, next to the sampler's transfer rates.
+    """
+    def __init__(self, intervals=PROBE_INTERVALS):
+        self.intervals = intervals
+        self._results = {
+            'connectivity': {"online_status": False},
+            'latency': {"ping_latency": "N/A", "packet_loss": "N/A"},
+            'public_ip': {"public_ip": "N/A", "location": "N/A"},
+            'interfaces': {"local_ip": "N/A", "subnet_mask": "N/A", "gateway": "N/A", "dns_servers": [], "connection_type": "unknown"},
+        }
+        self._errors = {name: [] for name in self._results}
+        self._next_run = {name: 0 for name in self._results}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._run, name='network-prober', daemon=True).start()
+
+    def _run(self):
+        probes = {
+            'connectivity': self._probe_connectivity,
+            'latency': self._probe_latency,
+            'public_ip': self._probe_public_ip,
+            'interfaces': self._probe_interfaces,
+        }
+        while True:
+            now = time.monotonic()
+            ran = False
+            for name, probe in probes.items():
+                if self._next_run[name] > now:
+                    continue
+                ran = True
+                errors = []
+                try:
+                    result = probe(errors)
+                except Exception as e:
+                    result, errors = None, [f"{name} probe failed: {e}"]
+                with self._lock:
+                    if result is not None:
+                        self._results[name] = result
+                    self._errors[name] = errors
+                self._next_run[name] = time.monotonic() + self.intervals[name]
+            if ran:
+                event_bus.publish('network', self.snapshot(), retain=True)
+            time.sleep(max(0.1, min(self._next_run.values()) - time.monotonic()))
+
+    def _is_online(self):
+        with self._lock:
+            return self._results['connectivity']['online_status']
+
+    def _probe_connectivity(self, errors):
+        was_online = self._is_online()
+        try:
+            requests.get('http://www.google.com', timeout=2)
+            online = True
+        except requests.RequestException:
+            errors.append("No internet connection")
+            online = False
+        if online and not was_online:
+            # Coming back online: refresh the probes that depend on connectivity right away.
+            self._next_run['latency'] = 0
+            self._next_run['public_ip'] = 0
+        return {"online_status": online}
+
+    def _probe_latency(self, errors):
+        if not self._is_online():
+            return {"ping_latency": "N/A", "packet_loss": "N/A"}
+        try:
+            ping_output = subprocess.run(['ping', '-c', '4', '-W', '1', '8.8.8.8'], capture_output=True, text=True, check=True)
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            errors.append(f"Ping command failed: {e}")
+            return {"ping_latency": "N/A", "packet_loss": "N/A"}
+
+        ping_latency, packet_loss = "N/A", "N/A"
+        latency_match = re.search(r'min/avg/max/mdev = [\d.]+/([\d.]+)/[\d.]+/[.\d]+ ms', ping_output.stdout)
+        if latency_match:
+            ping_latency = float(latency_match.group(1))
+        else:
+            errors.append("Ping latency not found in output.")
+        loss_match = re.search(r'(\d+)% packet loss', ping_output.stdout)
+        if loss_match:
+            packet_loss = float(loss_match.group(1))
+        else:
+            errors.append("Ping packet loss not found in output.")
+        return {"ping_latency": ping_latency, "packet_loss": packet_loss}
+
+    def _probe_public_ip(self, errors):
+        if not self._is_online():
+            return {"public_ip": "N/A", "location": "N/A"}
+        public_ip, location = "N/A", "N/A"
+        try:
+            geo_res = requests.get('http://ip-api.com/json/?fields=status,message,country,city,query', timeout=2)
+            geo_res.raise_for_status()
+            geo_data = geo_res.json()
+            if geo_data.get('status') == 'success':
+                public_ip = geo_data.get('query', 'N/A')
+                city = geo_data.get('city')
+                country = geo_data.get('country')
+                if city and country:
+                    location = f"{city}, {country}"
+            else:
+                errors.append(f"Public IP/location API returned status: {geo_data.get('status')}")
+        except requests.RequestException as e:
+            errors.append(f"Public IP/location lookup failed: {e}")
+            try:
+                s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                s.connect(("8.8.8.8", 80))
+                public_ip = s.getsockname()[0]
+                s.close()
+            except Exception as e:
+                errors.append(f"Local IP fallback failed: {e}")
+        return {"public_ip": public_ip, "location": location}
+
+    def _probe_interfaces(self, errors):
+        result = {"local_ip": "N/A", "subnet_mask": "N/A", "gateway": "N/A", "dns_servers": [], "connection_type": "unknown"}
+        stats_if = psutil.net_if_stats()
+        addrs = psutil.net_if_addrs()
+        active_interface = None
+
+        for interface, addr_list in addrs.items():
+            if interface in stats_if and stats_if[interface].isup:
+                for addr in addr_list:
+                    if addr.family == socket.AF_INET and not addr.address.startswith("127."):
+                        active_interface = interface
+                        result["local_ip"] = addr.address
+                        result["subnet_mask"] = addr.netmask
+                        break
+            if active_interface:
+                break
+
+        if active_interface:
+            if any(keyword in active_interface.lower() for keyword in ['wlan', 'wi-fi', 'wlp']):
+                result["connection_type"] = 'wifi'
+            elif any(keyword in active_interface.lower() for keyword in ['eth', 'enp', 'ethernet']):
+                result["connection_type"] = 'lan'
+
+            try:
+                gateway_output = subprocess.run(['ip', 'route', 'show', 'default'], capture_output=True, text=True, check=True)
+                gateway_match = re.search(r'default via (\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', gateway_output.stdout)
+                if gateway_match:
+                    result["gateway"] = gateway_match.group(1)
+                else:
+                    errors.append("Gateway not found in 'ip route show default' output.")
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                errors.append("Failed to get gateway (ip route command failed).")
+
+        if os.path.exists('/etc/resolv.conf'):
+            try:
+                with open('/etc/resolv.conf', 'r') as f:
+                    for line in f:
+                        if line.startswith('nameserver'):
+                            parts = line.split()
+                            if len(parts) > 1:
+                                result["dns_servers"].append(parts[1])
+            except Exception as e:
+                errors.append(f"Failed to read DNS servers: {e}")
+        return result
+
+    def snapshot(self):
+        """Returns the latest cached probe results merged into one dict, plus their errors."""
+        with self._lock:
+            merged = {}
+            for result in self._results.values():
+                merged.update(result)
+            merged["errors"] = [error for errors in self._errors.values() for error in errors]
+            return merged
+
+network_prober = NetworkProber()
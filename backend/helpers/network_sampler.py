@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from datetime import date
+import psutil
+from sqlalchemy import select, literal
+from sqlalchemy.dialects.postgresql import insert
+from extensions import db
+from models import User, NetworkUsage, NetworkUsageMonthly
+from helpers.ring_buffer import RingBuffer
+from helpers.event_bus import event_bus
+
+NET_SAMPLE_INTERVAL = float(os.environ.get('DOCKORA_NET_SAMPLE_INTERVAL', 2))
+NET_HISTORY_SIZE = int(os.environ.get('DOCKORA_NET_HISTORY', 150))
+NET_FLUSH_INTERVAL = float(os.environ.get('DOCKORA_NET_FLUSH_INTERVAL', 60))
+NET_FIELDS = ('timestamp', 'upload_speed', 'download_speed')
+TOTAL_INTERFACE = 'total'
+
+class NetworkSampler:
+    """
+    Reads psutil.net_io_counters(pernic=True) at a fixed interval in one background thread
+    and keeps per-interface upload/download rates in ring buffers. Traffic is also summed
+    into an accumulator that is flushed to NetworkUsage in one batch every flush interval,
+    so how often clients poll no longer affects the numbers or the database writes.
+    """
+    def __init__(self, interval=NET_SAMPLE_INTERVAL, history_size=NET_HISTORY_SIZE):
+        self.interval = interval
+        self.history_size = history_size
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._started = False
+        self._flush_app = None
+        self.session_upload_total = 0
+        self.session_download_total = 0
+        self._pending_upload = 0
+        self._pending_download = 0
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._run, name='network-sampler', daemon=True).start()
+
+    def start_flushing(self, app):
+        """
+        Makes this process persist the traffic it samples from now on. Only the leader process
+        should call this; until then nothing is accumulated, since the previous leader has
+        already recorded that traffic.
+        """
+        with self._lock:
+            self._pending_upload = self._pending_download = 0
+            self._flush_app = app
+
+    def _buffer(self, interface):
+        buffer = self._buffers.get(interface)
+        if buffer is None:
+            buffer = self._buffers[interface] = RingBuffer(self.history_size, NET_FIELDS)
+        return buffer
+
+    def _run(self):
+        previous = psutil.net_io_counters(pernic=True)
+        previous_time = time.monotonic()
+        last_flush = previous_time
+        while True:
+            time.sleep(self.interval)
+            try:
+                current = psutil.net_io_counters(pernic=True)
+                now = time.monotonic()
+                elapsed = now - previous_time or 1
+                total_sent = total_recv = 0
+                with self._lock:
+                    for interface, counters in current.items():
+                        before = previous.get(interface)
+                        # Counters reset when an interface is recreated (e.g. a container's veth), so never go negative.
+                        sent = max(0, counters.bytes_sent - before.bytes_sent) if before else 0
+                        recv = max(0, counters.bytes_recv - before.bytes_recv) if before else 0
+                        total_sent += sent
+                        total_recv += recv
+                        self._buffer(interface).append(timestamp=time.time(), upload_speed=sent / elapsed, download_speed=recv / elapsed)
+                    for interface in set(self._buffers) - set(current) - {TOTAL_INTERFACE}:
+                        del self._buffers[interface]
+                    self._buffer(TOTAL_INTERFACE).append(timestamp=time.time(), upload_speed=total_sent / elapsed, download_speed=total_recv / elapsed)
+                    self.session_upload_total += total_sent
+                    self.session_download_total += total_recv
+                    if self._flush_app:
+                        self._pending_upload += total_sent
+                        self._pending_download += total_recv
+                previous, previous_time = current, now
+                event_bus.publish('network', {
+                    "upload_speed": round(total_sent / elapsed),
+                    "download_speed": round(total_recv / elapsed),
+                    "session_upload_total": self.session_upload_total,
+                    "session_download_total": self.session_download_total,
+                }, retain=True)
+
+                if self._flush_app and now - last_flush >= NET_FLUSH_INTERVAL:
+                    self.flush()
+                    last_flush = now
+            except Exception as e:
+                print(f"Network sampling failed: {e}")
+
+    def flush(self):
+        if not self._flush_app:
+            return
+        with self._lock:
+            uploaded, downloaded = self._pending_upload, self._pending_download
+            self._pending_upload = self._pending_download = 0
+        if not uploaded and not downloaded:
+            return
+        with self._flush_app.app_context():
+            try:
+                record_network_usage(uploaded, downloaded)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Failed to flush network usage: {e}")
+                # Keep the traffic for the next flush rather than losing it.
+                with self._lock:
+                    self._pending_upload += uploaded
+                    self._pending_download += downloaded
+
+    def latest(self, interface=TOTAL_INTERFACE):
+        with self._lock:
+            buffer = self._buffers.get(interface)
+        sample = buffer.latest() if buffer is not None else None
+        return sample or {"timestamp": time.time(), "upload_speed": 0.0, "download_speed": 0.0}
+
+    def history(self, interface=None):
+        """Returns the buffered rate series for one interface, or for all of them keyed by interface."""
+        with self._lock:
+            buffers = dict(self._buffers)
+        if interface:
+            buffer = buffers.get(interface)
+            return buffer.series() if buffer is not None else None
+        return {name: buffer.series() for name, buffer in buffers.items()}
+
+def _upsert_usage(model, period_column, period, uploaded, downloaded):
+    table = model.__table__
+    users = select(
+        User.id,
+        literal(period, type_=db.Date),
+        literal(uploaded, type_=db.BigInteger),
+        literal(downloaded, type_=db.BigInteger),
+    )
+    statement = insert(table).from_select(['user_id', period_column, 'uploaded_bytes', 'downloaded_bytes'], users)
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id', period_column],
+        set_={
+            'uploaded_bytes': table.c.uploaded_bytes + statement.excluded.uploaded_bytes,
+            'downloaded_bytes': table.c.downloaded_bytes + statement.excluded.downloaded_bytes,
+        },
+    )
+    db.session.execute(statement)
+
+def record_network_usage(uploaded, downloaded, day=None):
+    """
+    Adds host traffic to every user's daily NetworkUsage row and monthly rollup row.
+    Each is a single INSERT ... ON CONFLICT DO UPDATE SET bytes = bytes + x, so the
+    increment is atomic and needs no read beforehand.
+    """
+    day = day or date.today()
+    _upsert_usage(NetworkUsage, 'date', day, uploaded, downloaded)
+    _upsert_usage(NetworkUsageMonthly, 'month', day.replace(day=1), uploaded, downloaded)
+    db.session.commit()
+
+network_sampler = NetworkSampler()
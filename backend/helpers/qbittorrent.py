@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+from qbittorrentapi import Client
+
+QBITTORRENT_IDLE_TIMEOUT = float(os.environ.get('DOCKORA_QBITTORRENT_IDLE_TIMEOUT', 600))
+QBITTORRENT_REQUEST_TIMEOUT = float(os.environ.get('DOCKORA_QBITTORRENT_REQUEST_TIMEOUT', 10))
+QBITTORRENT_SYNC_TTL = float(os.environ.get('DOCKORA_QBITTORRENT_SYNC_TTL', 2))
+
+# Torrent states grouped the way qBittorrent's own status filters group them.
+SEEDING_STATES = {'uploading', 'stalledUP', 'checkingUP', 'queuedUP', 'forcedUP'}
+PAUSED_STATES = {'pausedDL', 'pausedUP', 'stoppedDL', 'stoppedUP'}
+TORRENT_FILTERS = {
+    'all': lambda t: True,
+    'downloading': lambda t: t.get('state') in {
+        'downloading', 'metaDL', 'forcedMetaDL', 'stalledDL', 'checkingDL', 'pausedDL', 'stoppedDL', 'queuedDL', 'forcedDL', 'allocating',
+    },
+    'seeding': lambda t: t.get('state') in SEEDING_STATES,
+    'completed': lambda t: t.get('state') in SEEDING_STATES | {'pausedUP', 'stoppedUP'},
+    'paused': lambda t: t.get('state') in PAUSED_STATES,
+    'active': lambda t: t.get('dlspeed', 0) > 0 or t.get('upspeed', 0) > 0,
+    'errored': lambda t: t.get('state') in {'error', 'missingFiles'},
+}
+TORRENT_SORT_FIELDS = {
+    'progress': 'progress', 'name': 'name', 'download_speed': 'dlspeed', 'upload_speed': 'upspeed',
+    'size': 'size', 'downloaded': 'downloaded', 'uploaded': 'uploaded', 'state': 'state', 'added_on': 'added_on', 'eta': 'eta',
+}
+
+def config_hash(config):
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+class TorrentTable:
+    """
+    In-memory copy of a qBittorrent instance's torrent list, kept current with the
+    rid-based /sync/maindata API: after the first full snapshot, each sync only returns
+    the fields that changed and the hashes that were removed. Syncs are rate limited to
+    one per QBITTORRENT_SYNC_TTL, so several tabs polling the widget share one upstream call.
+    """
+    def __init__(self, sync_ttl=QBITTORRENT_SYNC_TTL):
+        self.sync_ttl = sync_ttl
+        self.rid = 0
+        self.torrents = {}
+        self._last_sync = 0
+        self._lock = threading.Lock()
+
+    def sync(self, client):
+        with self._lock:
+            if time.monotonic() - self._last_sync < self.sync_ttl:
+                return
+            maindata = client.sync_maindata(rid=self.rid)
+            if maindata.get('full_update'):
+                self.torrents = {}
+            for torrent_hash, fields in (maindata.get('torrents') or {}).items():
+                self.torrents.setdefault(torrent_hash, {'hash': torrent_hash}).update(fields)
+            for torrent_hash in maindata.get('torrents_removed') or []:
+                self.torrents.pop(torrent_hash, None)
+            self.rid = maindata.get('rid', 0)
+            self._last_sync = time.monotonic()
+
+    def query(self, status_filter='downloading', search=None, sort='progress', reverse=True, offset=0, limit=None):
+        """Returns (page, total) of torrents matching the filter, sorted by one of TORRENT_SORT_FIELDS."""
+        matches = TORRENT_FILTERS[status_filter]
+        sort_field = TORRENT_SORT_FIELDS[sort]
+        search = search.lower() if search else None
+        with self._lock:
+            torrents = [
+                t for t in self.torrents.values()
+                if matches(t) and (not search or search in t.get('name', '').lower())
+            ]
+        if sort_field in ('name', 'state'):
+            torrents.sort(key=lambda t: (t.get(sort_field) or '').lower(), reverse=reverse)
+        else:
+            torrents.sort(key=lambda t: t.get(sort_field) or 0, reverse=reverse)
+        end = offset + limit if limit is not None else None
+        return torrents[offset:end], len(torrents)
+
+class _PooledClient:
+    def __init__(self, client, key):
+        self.client = client
+        self.key = key
+        self.last_used = time.monotonic()
+        self.torrents = TorrentTable()
+
+class QBittorrentClientPool:
+    """
+    Keeps one logged-in qBittorrent client per user, keyed by a hash of their client
+    config, so the downloads widget reuses the session (and its HTTP connections)
+    instead of logging in on every poll. qbittorrentapi logs in again by itself when a
+    request gets a 403 (expired session cookie). A client is replaced when the user's
+    config changes and logged out once it has been idle for QBITTORRENT_IDLE_TIMEOUT.
+    """
+    def __init__(self, idle_timeout=QBITTORRENT_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._clients = {}
+        self._user_locks = {}
+        self._lock = threading.Lock()
+
+    def _user_lock(self, user_id):
+        with self._lock:
+            return self._user_locks.setdefault(user_id, threading.Lock())
+
+    def get(self, user_id, config):
+        """Returns a logged-in client for the given config. Login errors are raised to the caller."""
+        self.evict_idle()
+        key = config_hash(config)
+        with self._user_lock(user_id):
+            with self._lock:
+                pooled = self._clients.get(user_id)
+            if pooled and pooled.key == key:
+                pooled.last_used = time.monotonic()
+                return pooled.client
+
+            parsed_url = urlparse(config.get('url'))
+            client = Client(
+                host=parsed_url.hostname, port=parsed_url.port,
+                username=config.get('username'), password=config.get('password'),
+                REQUESTS_ARGS={'timeout': QBITTORRENT_REQUEST_TIMEOUT},
+            )
+            client.auth_log_in()
+            with self._lock:
+                self._clients[user_id] = _PooledClient(client, key)
+        if pooled:
+            self._close(pooled)
+        return client
+
+    def torrent_table(self, user_id, config):
+        """Returns the user's torrent table, synced with qBittorrent unless it was synced moments ago."""
+        client = self.get(user_id, config)
+        with self._lock:
+            pooled = self._clients.get(user_id)
+        table = pooled.torrents if pooled and pooled.client is client else TorrentTable()
+        table.sync(client)
+        return table
+
+    def invalidate(self, user_id):
+        with self._lock:
+            pooled = self._clients.pop(user_id, None)
+        if pooled:
+            self._close(pooled)
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [user_id for user_id, pooled in self._clients.items() if pooled.last_used < cutoff]
+            evicted = [self._clients.pop(user_id) for user_id in idle]
+        for pooled in evicted:
+            self._close(pooled)
+
+    def _close(self, pooled):
+        try:
+            pooled.client.auth_log_out()
+        except Exception:
+            # The session is being dropped anyway; a failed logout just lets it expire server-side.
+            pass
+
+qbittorrent_clients = QBittorrentClientPool()
@@ -0,0 +1,254 @@
+import copy
+import os
+import socket
+import time
+import uuid
+import docker
+from extensions import client
+
+RECREATE_GATE_TIMEOUT = float(os.environ.get('DOCKORA_RECREATE_GATE_TIMEOUT', 60))
+# Without a healthcheck, the replacement has to stay up this long before it takes over.
+RECREATE_RUNNING_GRACE = float(os.environ.get('DOCKORA_RECREATE_RUNNING_GRACE', 3))
+RECREATE_POLL_INTERVAL = 0.5
+GATES = ('auto', 'health', 'port', 'running', 'none')
+
+class RecreateError(Exception):
+    pass
+
+def _endpoint_config(endpoint, old_id):
+    config = {}
+    aliases = [alias for alias in endpoint.get('Aliases') or [] if not old_id.startswith(alias)]
+    if aliases:
+        config['Aliases'] = aliases
+    for key in ('IPAMConfig', 'Links', 'DriverOpts'):
+        if endpoint.get(key):
+            config[key] = endpoint[key]
+    return config
+
+def _anonymous_volume_binds(attrs):
+    """Keeps the old container's anonymous volumes; a fresh container would otherwise get empty new ones."""
+    host_config = attrs['HostConfig']
+    declared = {bind.split(':')[1] for bind in host_config.get('Binds') or [] if ':' in bind}
+    declared |= {mount.get('Target') for mount in host_config.get('Mounts') or []}
+    return [
+        f"{mount['Name']}:{mount['Destination']}{'' if mount.get('RW', True) else ':ro'}"
+        for mount in attrs.get('Mounts') or []
+        if mount.get('Type') == 'volume' and mount.get('Destination') not in declared
+    ]
+
+def _scaled_memory_swap(old_host_config, memory):
+    """
+    MemorySwap (memory + swap) must stay above Memory, and can't be set without it. Keeps
+    unlimited swap (-1) and the old memory-to-swap ratio; otherwise lets the daemon
+    default it (0, i.e. twice the memory).
+    """
+    old_memory, old_swap = old_host_config.get('Memory') or 0, old_host_config.get('MemorySwap') or 0
+    if not memory:
+        return 0
+    if old_swap == -1:
+        return -1
+    if old_memory > 0 and old_swap > old_memory:
+        return int(memory * old_swap / old_memory)
+    if old_memory > 0 and old_swap == old_memory:
+        # Swap was explicitly disabled.
+        return memory
+    return 0
+
+def build_replacement_config(attrs, port_bindings=None, nano_cpus=None, memory=None):
+    """
+    Builds the raw create body for a replacement container from an inspect result: the
+    full Config and HostConfig, the old container's anonymous volumes, and its network
+    endpoints. Returns (body, extra_networks) where extra_networks must be connected
+    after creation (the create call accepts a single network).
+    """
+    config = copy.deepcopy(attrs['Config'])
+    host_config = copy.deepcopy(attrs['HostConfig'])
+    if config.get('Hostname') == attrs['Id'][:12]:
+        # Docker's default hostname is the container id; let the new one get its own.
+        del config['Hostname']
+
+    if port_bindings is not None:
+        host_config['PortBindings'] = port_bindings
+        config['ExposedPorts'] = {**(config.get('ExposedPorts') or {}), **{port: {} for port in port_bindings}}
+    if nano_cpus is not None:
+        host_config['NanoCpus'] = nano_cpus
+        # The daemon rejects NanoCpus together with a CPU quota, so the new limit replaces both.
+        host_config['CpuQuota'] = host_config['CpuPeriod'] = 0
+    if memory is not None:
+        host_config['Memory'] = memory
+        host_config['MemorySwap'] = _scaled_memory_swap(attrs['HostConfig'], memory)
+    anonymous_binds = _anonymous_volume_binds(attrs)
+    if anonymous_binds:
+        host_config['Binds'] = (host_config.get('Binds') or []) + anonymous_binds
+
+    body = {**config, 'HostConfig': host_config}
+    networks = attrs.get('NetworkSettings', {}).get('Networks') or {}
+    network_mode = host_config.get('NetworkMode') or 'default'
+    endpoints = {name: _endpoint_config(endpoint, attrs['Id']) for name, endpoint in networks.items()}
+    if network_mode in ('host', 'none') or network_mode.startswith('container:') or not endpoints:
+        return body, {}
+    primary = network_mode if network_mode in endpoints else next(iter(endpoints))
+    body['NetworkingConfig'] = {'EndpointsConfig': {primary: endpoints.pop(primary)}}
+    return body, endpoints
+
+def _published_host_ports(port_bindings):
+    return {
+        (binding.get('HostIp') or '', binding.get('HostPort'), port.split('/')[-1])
+        for port, bindings in (port_bindings or {}).items()
+        for binding in bindings or []
+        if binding.get('HostPort')
+    }
+
+def _writable_shared_mounts(attrs):
+    """
+    The replacement mounts the same named volumes, binds and anonymous volumes as the old
+    container, so every writable one would have two writers during the gate.
+    """
+    return [
+        mount.get('Name') or mount.get('Source')
+        for mount in attrs.get('Mounts') or []
+        if mount.get('Type') in ('volume', 'bind') and mount.get('RW', True)
+    ]
+
+def needs_stop_first(attrs, body):
+    """
+    Old and new can't run side by side when they would claim the same host ports or
+    static IPs, or share the host's network stack. Nor when they would both write to the
+    same volume or bind mount: a database or config directory written by two processes
+    at once can be corrupted.
+    """
+    if body['HostConfig'].get('NetworkMode') == 'host':
+        return True
+    if _writable_shared_mounts(attrs):
+        return True
+    if _published_host_ports(attrs['HostConfig'].get('PortBindings')) & _published_host_ports(body['HostConfig'].get('PortBindings')):
+        return True
+    endpoints = (body.get('NetworkingConfig') or {}).get('EndpointsConfig') or {}
+    networks = attrs.get('NetworkSettings', {}).get('Networks') or {}
+    return any((endpoint.get('IPAMConfig') or {}) for endpoint in endpoints.values()) or \
+        any((endpoint.get('IPAMConfig') or {}) for endpoint in networks.values())
+
+def _port_open(addresses, ports):
+    for address in addresses:
+        for port in ports:
+            try:
+                with socket.create_connection((address, port), timeout=1):
+                    return True
+            except OSError:
+                continue
+    return False
+
+def wait_until_ready(container_id, gate, timeout=RECREATE_GATE_TIMEOUT, api=None):
+    """
+    Blocks until the replacement passes its gate: 'health' waits for Docker's healthcheck
+    to report healthy, 'port' for one of its exposed TCP ports to accept connections,
+    'running' for it to stay up for RECREATE_RUNNING_GRACE. 'auto' uses the healthcheck
+    when the container has one and 'running' otherwise. Raises RecreateError on failure.
+    """
+    api = api or client.api
+    deadline = time.monotonic() + timeout
+    running_since = None
+    while True:
+        attrs = api.inspect_container(container_id)
+        state = attrs['State']
+        if not state.get('Running') or state.get('Restarting'):
+            if state.get('Status') == 'exited' or state.get('Restarting'):
+                raise RecreateError(f"Replacement container stopped (exit code {state.get('ExitCode')}).")
+            running_since = None
+        else:
+            running_since = running_since or time.monotonic()
+
+        health = (state.get('Health') or {}).get('Status')
+        effective_gate = gate
+        if gate == 'auto':
+            effective_gate = 'health' if health else 'running'
+        if effective_gate == 'health':
+            if not health:
+                raise RecreateError("Container has no healthcheck to wait for.")
+            if health == 'healthy':
+                return
+            if health == 'unhealthy':
+                raise RecreateError("Replacement container is unhealthy.")
+        elif effective_gate == 'port':
+            ports = [int(p.split('/')[0]) for p in attrs['Config'].get('ExposedPorts') or {} if p.endswith('/tcp')]
+            if not ports:
+                raise RecreateError("Container exposes no TCP port to probe.")
+            addresses = [n['IPAddress'] for n in (attrs['NetworkSettings'].get('Networks') or {}).values() if n.get('IPAddress')]
+            if running_since and _port_open(addresses, ports):
+                return
+        elif running_since and time.monotonic() - running_since >= RECREATE_RUNNING_GRACE:
+            return
+
+        if time.monotonic() >= deadline:
+            raise RecreateError(f"Replacement container was not ready after {int(timeout)}s ({effective_gate} gate).")
+        time.sleep(RECREATE_POLL_INTERVAL)
+
+def recreate_container(container_id, port_bindings=None, nano_cpus=None, memory=None, gate='auto', timeout=RECREATE_GATE_TIMEOUT, api=None):
+    """
+    Replaces a container with a copy of itself (optionally with new ports and limits).
+    The copy is created under a temporary name and, unless old and new would conflict
+    (see needs_stop_first), started and gated while the old container keeps running.
+    Then the names are swapped and the old container removed. Any failure rolls back to
+    the old container. `api` is the low-level client of the container's Docker host (the
+    local daemon by default). Returns (new_container_id, mode).
+    """
+    api = api or client.api
+    attrs = api.inspect_container(container_id)
+    old_id, name = attrs['Id'], attrs['Name'].lstrip('/')
+    body, extra_networks = build_replacement_config(attrs, port_bindings, nano_cpus, memory)
+    stop_first = needs_stop_first(attrs, body)
+    was_running = attrs['State'].get('Running')
+    suffix = uuid.uuid4().hex[:8]
+    temp_name, retired_name = f"{name}-dockora-new-{suffix}", f"{name}-dockora-old-{suffix}"
+
+    new_id = None
+    old_stopped = old_renamed = False
+    try:
+        new_id = api.create_container_from_config(body, name=temp_name)['Id']
+        for network, endpoint in extra_networks.items():
+            ipam = endpoint.get('IPAMConfig') or {}
+            api.connect_container_to_network(
+                new_id, network,
+                ipv4_address=ipam.get('IPv4Address'), ipv6_address=ipam.get('IPv6Address'),
+                aliases=endpoint.get('Aliases'), driver_opt=endpoint.get('DriverOpts'),
+                links=[tuple(link.split(':', 1)) for link in endpoint.get('Links') or []] or None,
+            )
+        if stop_first and was_running:
+            api.stop(old_id)
+            old_stopped = True
+        if was_running:
+            api.start(new_id)
+            if gate != 'none':
+                wait_until_ready(new_id, gate, timeout, api)
+
+        api.rename(old_id, retired_name)
+        old_renamed = True
+        api.rename(new_id, name)
+    except Exception as e:
+        _rollback(api, old_id, name, new_id, old_renamed, old_stopped)
+        if isinstance(e, (RecreateError, docker.errors.APIError)):
+            raise RecreateError(f"Recreate failed and was rolled back: {e}") from e
+        raise
+
+    try:
+        if was_running and not old_stopped:
+            api.stop(old_id)
+        api.remove_container(old_id, force=True)
+    except Exception as e:
+        # The replacement is already serving under the real name; leave the old one for manual cleanup.
+        print(f"Failed to remove replaced container {retired_name}: {e}")
+    return new_id, 'stop-first' if stop_first else 'start-first'
+
+def _rollback(api, old_id, name, new_id, old_renamed, old_stopped):
+    steps = []
+    if new_id:
+        steps.append(lambda: api.remove_container(new_id, force=True))
+    if old_renamed:
+        steps.append(lambda: api.rename(old_id, name))
+    if old_stopped:
+        steps.append(lambda: api.start(old_id))
+    for step in steps:
+        try:
+            step()
+        except Exception as e:
+            print(f"Recreate rollback step failed for {name}: {e}")
@@ -0,0 +1,41 @@
+from array import array
+import threading
+
+class RingBuffer:
+    """
+    Fixed-size ring buffer for numeric samples.
+    Each field is stored in its own preallocated array of doubles, so a buffer costs
+    8 bytes per field per slot no matter how many samples pass through it.
+    """
+    def __init__(self, capacity, fields):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._columns = {field: array('d', [0.0]) * capacity for field in self.fields}
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, **values):
+        with self._lock:
+            for field in self.fields:
+                self._columns[field][self._next] = float(values.get(field, 0.0))
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def latest(self):
+        """Returns the most recent sample as a dict, or None if the buffer is empty."""
+        with self._lock:
+            if not self._size:
+                return None
+            index = (self._next - 1) % self.capacity
+            return {field: self._columns[field][index] for field in self.fields}
+
+    def series(self):
+        """Returns every buffered sample, oldest first, as one list per field."""
+        with self._lock:
+            start = (self._next - self._size) % self.capacity
+            order = [(start + i) % self.capacity for i in range(self._size)]
+            return {field: [self._columns[field][i] for i in order] for field in self.fields}
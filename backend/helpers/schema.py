@@ -0,0 +1,22 @@
+from sqlalchemy import text
+from extensions import db
+
+# db.create_all() only creates missing tables, so columns and indexes added to existing
+# tables are applied here. Every statement must be safe to run on every startup.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE notification ADD COLUMN IF NOT EXISTS dedup_key VARCHAR(255)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_notification_user_dedup ON notification (user_id, dedup_key)",
+    # Backfill monthly rollups for usage recorded before they existed; existing rollups are left alone.
+    """INSERT INTO network_usage_monthly (user_id, month, uploaded_bytes, downloaded_bytes)
+       SELECT user_id, date_trunc('month', date)::date, SUM(uploaded_bytes), SUM(downloaded_bytes)
+       FROM network_usage GROUP BY 1, 2
+       ON CONFLICT (user_id, month) DO NOTHING""",
+    "ALTER TABLE deploy_job ADD COLUMN IF NOT EXISTS owner VARCHAR(100)",
+]
+
+def upgrade_schema():
+    if db.engine.dialect.name != 'postgresql':
+        return
+    with db.engine.begin() as conn:
+        for statement in SCHEMA_UPGRADES:
+            conn.execute(text(statement))
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+from flask import Response, current_app, request
+
+SNAPSHOT_TTL = float(os.environ.get('DOCKORA_SNAPSHOT_TTL', 5))
+
+# A builder returns one of these instead of a bare payload to have extra headers cached and served with it.
+Snapshot = namedtuple('Snapshot', ['payload', 'headers'])
+
+class SnapshotCache:
+    """
+    Shared cache of serialized JSON responses for endpoints that many clients poll.
+    Each entry keeps the encoded body and its ETag, so a cache hit costs neither a Docker
+    or database round trip nor a re-serialization, and a matching If-None-Match gets a 304.
+    Entries expire after their TTL or when invalidated (e.g. by Docker events).
+    """
+    def __init__(self, default_ttl=SNAPSHOT_TTL):
+        self.default_ttl = default_ttl
+        self._entries = {}
+        self._build_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def _fresh_entry(self, key):
+        entry = self._entries.get(key)
+        if entry and entry['expires_at'] > time.monotonic():
+            return entry
+        return None
+
+    def get(self, key, builder, ttl=None):
+        """Returns the cached entry (body, etag, headers) for key, building it with builder() on a miss."""
+        with self._lock:
+            entry = self._fresh_entry(key)
+            if entry:
+                self.hits += 1
+                return entry, True
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        # Only one thread rebuilds a given key; the others wait and reuse its result.
+        with build_lock:
+            with self._lock:
+                entry = self._fresh_entry(key)
+                if entry:
+                    self.hits += 1
+                    return entry, True
+                self.misses += 1
+            payload, headers = builder(), {}
+            if isinstance(payload, Snapshot):
+                payload, headers = payload
+            body = current_app.json.dumps(payload).encode('utf-8')
+            entry = {
+                'body': body,
+                'headers': headers,
+                'etag': hashlib.sha1(body).hexdigest(),
+                'expires_at': time.monotonic() + (self.default_ttl if ttl is None else ttl),
+            }
+            with self._lock:
+                self._entries[key] = entry
+            return entry, False
+
+    def response(self, key, builder, ttl=None):
+        """Serves key as a JSON response with ETag/Cache-Control, or a 304 if the client's copy is current."""
+        entry, hit = self.get(key, builder, ttl)
+        if request.if_none_match.contains(entry['etag']):
+            with self._lock:
+                self.not_modified += 1
+            response = Response(status=304)
+        else:
+            response = Response(entry['body'], mimetype='application/json')
+        response.headers.update(entry['headers'])
+        response.set_etag(entry['etag'])
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+    def invalidate(self, prefix=''):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def handle_container_event(self, event):
+        self.invalidate('containers')
+
+    def register_event_handlers(self, listener):
+        listener.on(['create', 'start', 'die', 'pause', 'unpause', 'rename', 'destroy'], self.handle_container_event)
+
+snapshot_cache = SnapshotCache()
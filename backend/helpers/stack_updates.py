@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from sqlalchemy import func
+from extensions import db
+from models import StackRevision
+from helpers.stack_workspace import STACKS_DIR, COMPOSE_FILE, ENV_FILE, prepare_stack_workspace, stack_workspace_path
+
+# Top-level sections shared between services; when one of them changes, every service is redeployed.
+SHARED_SECTIONS = ('networks', 'volumes', 'configs', 'secrets')
+
+class ComposeError(Exception):
+    pass
+
+def render_compose(name, compose_content, env_content=None):
+    """
+    Returns the fully resolved compose model (`docker compose config --format json`) for
+    the given content. The files are staged in a scratch directory while the project
+    directory is the stack's workspace, so relative paths resolve the same way for the
+    running and the proposed version, and the workspace itself is left untouched.
+    """
+    workspace = stack_workspace_path(name)
+    os.makedirs(STACKS_DIR, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(dir=STACKS_DIR, prefix='.staging-')
+    try:
+        compose_path = os.path.join(staging_dir, COMPOSE_FILE)
+        env_path = os.path.join(staging_dir, ENV_FILE)
+        with open(compose_path, 'w') as f:
+            f.write(compose_content)
+        with open(env_path, 'w') as f:
+            f.write(env_content or '')
+        os.makedirs(workspace, exist_ok=True)
+        result = subprocess.run(
+            ['docker', 'compose', '-p', name, '--project-directory', workspace, '-f', compose_path, '--env-file', env_path, 'config', '--format', 'json'],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise ComposeError(result.stderr.strip() or result.stdout.strip())
+        try:
+            return json.loads(result.stdout)
+        except ValueError as e:
+            raise ComposeError(f"Unexpected output from docker compose config: {e}")
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+def plan_stack_update(current, proposed):
+    """Compares two rendered compose models and returns which services an update has to touch."""
+    current_services = current.get('services') or {}
+    proposed_services = proposed.get('services') or {}
+    changed_sections = [section for section in SHARED_SECTIONS if current.get(section) != proposed.get(section)]
+    added = sorted(set(proposed_services) - set(current_services))
+    removed = sorted(set(current_services) - set(proposed_services))
+    common = set(current_services) & set(proposed_services)
+    changed = sorted(s for s in common if current_services[s] != proposed_services[s])
+    return {
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged": sorted(common - set(changed)),
+        "full_redeploy": bool(changed_sections),
+        "changed_sections": changed_sections,
+    }
+
+def plan_stack_change(stack, compose_content, env_content):
+    """
+    Plans moving a deployed stack to new content. Raises ComposeError only when the new
+    content doesn't render. If the stored content no longer renders (e.g. a file it
+    references is gone), nothing can be diffed, so the plan is a full redeploy.
+    """
+    proposed = render_compose(stack.name, compose_content, env_content)
+    try:
+        current = render_compose(stack.name, stack.compose_content, stack.env_content)
+    except ComposeError as e:
+        return {
+            "added": [],
+            "removed": [],
+            "changed": sorted(proposed.get('services') or {}),
+            "unchanged": [],
+            "full_redeploy": True,
+            "changed_sections": [],
+            "reason": f"The current configuration no longer renders: {e}",
+        }
+    return plan_stack_update(current, proposed)
+
+def compose_up_command(name, plan):
+    command = ['docker', 'compose', '-p', name, 'up', '-d', '--remove-orphans']
+    services = plan["added"] + plan["changed"]
+    if plan["full_redeploy"] or not services:
+        return command
+    # --no-deps keeps compose from touching the unchanged services the targets depend on.
+    return command + ['--no-deps'] + services
+
+def run_compose(name, compose_content, env_content, command):
+    workspace = prepare_stack_workspace(name, compose_content, env_content)
+    result = subprocess.run(command, cwd=workspace, capture_output=True, text=True)
+    return result.returncode, result.stdout + result.stderr
+
+def plan_is_empty(plan):
+    return not (plan["added"] or plan["removed"] or plan["changed"] or plan["full_redeploy"])
+
+def apply_stack_update(stack, compose_content, env_content, user_id=None):
+    """
+    Applies new content to a deployed stack, recreating only the services that changed.
+    The new content is stored (with a revision) only once compose succeeds; on failure
+    the previous content is redeployed. Returns (success, plan, output). Raises
+    ComposeError when the new content doesn't render.
+    """
+    plan = plan_stack_change(stack, compose_content, env_content)
+    if plan_is_empty(plan):
+        # Nothing compose would act on (e.g. only comments or formatting changed).
+        returncode, output = 0, ""
+        prepare_stack_workspace(stack.name, compose_content, env_content)
+    else:
+        returncode, output = run_compose(stack.name, compose_content, env_content, compose_up_command(stack.name, plan))
+
+    if returncode != 0:
+        rollback_code, rollback_output = run_compose(
+            stack.name, stack.compose_content, stack.env_content,
+            ['docker', 'compose', '-p', stack.name, 'up', '-d', '--remove-orphans'],
+        )
+        status = "succeeded" if rollback_code == 0 else f"failed with exit code {rollback_code}"
+        output += f"\n--- Rolled back to the previous revision ({status}) ---\n{rollback_output}"
+        return False, plan, output
+
+    if not stack.revisions:
+        # Keep what was running before the first tracked update so it can be rolled back to.
+        record_stack_revision(stack, stack.compose_content, stack.env_content)
+    stack.compose_content, stack.env_content = compose_content, env_content
+    record_stack_revision(stack, compose_content, env_content, user_id)
+    db.session.commit()
+    return True, plan, output
+
+def record_stack_revision(stack, compose_content, env_content, user_id=None):
+    """Adds the next revision for a stack; the caller commits."""
+    latest = db.session.query(func.max(StackRevision.revision)).filter_by(stack_id=stack.id).scalar() or 0
+    revision = StackRevision(stack=stack, revision=latest + 1, compose_content=compose_content, env_content=env_content, created_by=user_id)
+    db.session.add(revision)
+    db.session.flush()
+    return revision
+
+def serialize_revision(revision):
+    return {
+        "revision": revision.revision,
+        "compose": revision.compose_content,
+        "env": revision.env_content,
+        "created_by": revision.created_by,
+        "created_at": revision.created_at.isoformat() if revision.created_at else None,
+    }
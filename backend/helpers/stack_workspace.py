@@ -0,0 +1,62 @@
+import hashlib
+import os
+import shutil
+import threading
+
+STACKS_DIR = os.environ.get('DOCKORA_STACKS_DIR', '/data/stacks')
+COMPOSE_FILE = 'docker-compose.yml'
+ENV_FILE = '.env'
+HASH_FILE = '.dockora-hash'
+
+_lock = threading.Lock()
+
+def stack_workspace_path(name):
+    if not name or os.path.basename(name) != name or name in ('.', '..'):
+        raise ValueError(f"Invalid stack name: {name!r}")
+    return os.path.join(STACKS_DIR, name)
+
+def content_hash(compose_content, env_content):
+    digest = hashlib.sha256()
+    digest.update(compose_content.encode())
+    digest.update(b'\0')
+    digest.update((env_content or '').encode())
+    return digest.hexdigest()
+
+def _write_atomic(path, content):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def prepare_stack_workspace(name, compose_content, env_content=None):
+    """
+    Returns the stack's persistent working directory under STACKS_DIR, with its compose
+    file and .env in place. The files are only rewritten when their content hash changes,
+    so anything compose keeps next to them (build context, local state) survives between
+    operations.
+    """
+    path = stack_workspace_path(name)
+    expected = content_hash(compose_content, env_content)
+    with _lock:
+        if _read(os.path.join(path, HASH_FILE)) == expected:
+            return path
+        os.makedirs(path, exist_ok=True)
+        _write_atomic(os.path.join(path, COMPOSE_FILE), compose_content)
+        if env_content:
+            _write_atomic(os.path.join(path, ENV_FILE), env_content)
+        elif os.path.exists(os.path.join(path, ENV_FILE)):
+            os.remove(os.path.join(path, ENV_FILE))
+        # Written last, so an interrupted write is redone next time.
+        _write_atomic(os.path.join(path, HASH_FILE), expected)
+    return path
+
+def remove_stack_workspace(name):
+    with _lock:
+        shutil.rmtree(stack_workspace_path(name), ignore_errors=True)
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from extensions import client, stream_client
+from helpers.container_helpers import calculate_stats
+from helpers.event_bus import event_bus
+from helpers.ring_buffer import RingBuffer
+
+STATS_HISTORY_SIZE = int(os.environ.get('DOCKORA_STATS_HISTORY', 120))
+STATS_RECONCILE_INTERVAL = float(os.environ.get('DOCKORA_STATS_RECONCILE_INTERVAL', 60))
+STATS_PUSH_INTERVAL = float(os.environ.get('DOCKORA_STATS_PUSH_INTERVAL', 5))
+STATS_FIELDS = ('timestamp', 'cpu_percent', 'memory_percent', 'memory_usage')
+
+class ContainerStatsCollector:
+    """
+    Keeps one streaming stats subscription per running container and records every
+    sample into a per-container RingBuffer, so readers never have to call Docker.
+    Subscriptions follow Docker start/die events, with a periodic reconcile as a safety net.
+    While anyone follows the "containers" topic, the latest samples are pushed there too.
+    """
+    def __init__(self, history_size=STATS_HISTORY_SIZE):
+        self.history_size = history_size
+        self._buffers = {}
+        self._names = {}
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._reconcile_loop, name='stats-reconciler', daemon=True).start()
+        threading.Thread(target=self._push_loop, name='stats-pusher', daemon=True).start()
+
+    def _reconcile_loop(self):
+        while True:
+            try:
+                self.reconcile()
+            except Exception as e:
+                print(f"Container stats reconcile failed: {e}")
+            time.sleep(STATS_RECONCILE_INTERVAL)
+
+    def _push_loop(self):
+        while True:
+            time.sleep(STATS_PUSH_INTERVAL)
+            if not event_bus.has_subscribers('containers'):
+                continue
+            with self._lock:
+                short_ids = list(self._buffers)
+            stats = {}
+            for short_id in short_ids:
+                sample = self.latest(short_id)
+                if sample:
+                    stats[short_id] = sample
+            if stats:
+                event_bus.publish('containers', {"action": "stats", "stats": stats})
+
+    def reconcile(self):
+        """Subscribes to containers that started and drops the ones that stopped."""
+        running = {c['Id'][:12]: c['Names'][0].lstrip('/') if c.get('Names') else c['Id'][:12] for c in client.api.containers()}
+        with self._lock:
+            known = set(self._subscriptions) | set(self._buffers)
+        for short_id in known - set(running):
+            self.unsubscribe(short_id)
+        for short_id, name in running.items():
+            self.subscribe(short_id, name)
+
+    def subscribe(self, short_id, name=None):
+        with self._lock:
+            if name:
+                self._names[name] = short_id
+            if short_id in self._subscriptions:
+                return
+            buffer = self._buffers.get(short_id)
+            if buffer is None:
+                buffer = self._buffers[short_id] = RingBuffer(self.history_size, STATS_FIELDS)
+            stop_event = threading.Event()
+            self._subscriptions[short_id] = stop_event
+        # The buffer is handed over rather than looked up later, so an unsubscribe racing the
+        # thread's start only stops it instead of leaving it without a buffer.
+        threading.Thread(target=self._follow, args=(short_id, buffer, stop_event), name=f'stats-{short_id}', daemon=True).start()
+
+    def unsubscribe(self, short_id):
+        with self._lock:
+            stop_event = self._subscriptions.pop(short_id, None)
+            self._buffers.pop(short_id, None)
+            for name in [n for n, i in self._names.items() if i == short_id]:
+                del self._names[name]
+        if stop_event:
+            stop_event.set()
+
+    def _follow(self, short_id, buffer, stop_event):
+        if stop_event.is_set():
+            return
+        try:
+            for sample in stream_client.api.stats(short_id, stream=True, decode=True):
+                if stop_event.is_set():
+                    break
+                stats = calculate_stats(sample)
+                buffer.append(timestamp=time.time(), **stats)
+        except Exception as e:
+            print(f"Stats stream for container {short_id} ended: {e}")
+        finally:
+            # The daemon closes the stream when the container stops; forget it so the next reconcile can resubscribe.
+            with self._lock:
+                if self._subscriptions.get(short_id) is stop_event:
+                    del self._subscriptions[short_id]
+
+    def handle_event(self, event):
+        """Follows container start/stop events so subscriptions change without waiting for a reconcile."""
+        short_id = event.get('id', '')[:12]
+        if event.get('Action') == 'start':
+            self.subscribe(short_id, event.get('Actor', {}).get('Attributes', {}).get('name'))
+        else:
+            self.unsubscribe(short_id)
+
+    def register_event_handlers(self, listener):
+        listener.on_connect(self.reconcile)
+        listener.on(['start', 'die', 'destroy'], self.handle_event)
+
+    def _buffer_for(self, id_or_name):
+        with self._lock:
+            short_id = self._names.get(id_or_name, id_or_name[:12])
+            return self._buffers.get(short_id)
+
+    def latest(self, id_or_name):
+        """Returns the most recent stats sample for a container, or None if none has been collected."""
+        buffer = self._buffer_for(id_or_name)
+        if buffer is None:
+            return None
+        sample = buffer.latest()
+        if not sample:
+            return None
+        return {"cpu_percent": sample['cpu_percent'], "memory_percent": sample['memory_percent'], "memory_usage": int(sample['memory_usage'])}
+
+    def history(self, id_or_name):
+        """Returns the buffered series for a container, oldest first, or None if it is not being sampled."""
+        buffer = self._buffer_for(id_or_name)
+        if buffer is None:
+            return None
+        return buffer.series()
+
+stats_collector = ContainerStatsCollector()
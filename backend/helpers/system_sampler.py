@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+import psutil
+from helpers.ring_buffer import RingBuffer
+from helpers.event_bus import event_bus
+
+SYSTEM_SAMPLE_INTERVAL = float(os.environ.get('DOCKORA_SYSTEM_SAMPLE_INTERVAL', 2))
+SYSTEM_HISTORY_SIZE = int(os.environ.get('DOCKORA_SYSTEM_HISTORY', 150))
+SYSTEM_FIELDS = ('timestamp', 'cpu_usage', 'memory_usage_percent', 'memory_used', 'disk_usage_percent', 'disk_used', 'load_1', 'load_5', 'load_15')
+
+class SystemSampler:
+    """
+    Samples CPU (overall and per core), memory, disk and load average in a background
+    thread. CPU percentages are measured between consecutive samples with the
+    non-blocking psutil.cpu_percent(interval=None), so no request ever sleeps for them.
+    """
+    def __init__(self, interval=SYSTEM_SAMPLE_INTERVAL, history_size=SYSTEM_HISTORY_SIZE):
+        self.interval = interval
+        self.history_size = history_size
+        self.core_count = psutil.cpu_count() or 1
+        self._core_fields = ('timestamp',) + tuple(f"cpu{i}" for i in range(self.core_count))
+        self._history = RingBuffer(history_size, SYSTEM_FIELDS)
+        self._core_history = RingBuffer(history_size, self._core_fields)
+        self._latest = None
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        # Prime psutil's CPU counters; the first real sample then covers one full interval.
+        psutil.cpu_percent(interval=None)
+        psutil.cpu_percent(interval=None, percpu=True)
+        threading.Thread(target=self._run, name='system-sampler', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"System sampling failed: {e}")
+
+    def sample(self):
+        now = time.time()
+        cpu_usage = psutil.cpu_percent(interval=None)
+        per_core = psutil.cpu_percent(interval=None, percpu=True)[:self.core_count]
+        memory_info = psutil.virtual_memory()
+        disk_info = psutil.disk_usage('/')
+        load_1, load_5, load_15 = os.getloadavg() if hasattr(os, 'getloadavg') else (0.0, 0.0, 0.0)
+
+        latest = {
+            "cpu_usage": cpu_usage,
+            "cpu_per_core": per_core,
+            "memory_usage_percent": memory_info.percent,
+            "memory_total": memory_info.total,
+            "memory_used": memory_info.used,
+            "disk_usage_percent": disk_info.percent,
+            "disk_total": disk_info.total,
+            "disk_used": disk_info.used,
+            "load_average": [load_1, load_5, load_15],
+            "timestamp": now,
+        }
+        self._history.append(
+            timestamp=now, cpu_usage=cpu_usage, memory_usage_percent=memory_info.percent, memory_used=memory_info.used,
+            disk_usage_percent=disk_info.percent, disk_used=disk_info.used, load_1=load_1, load_5=load_5, load_15=load_15,
+        )
+        self._core_history.append(timestamp=now, **{f"cpu{i}": value for i, value in enumerate(per_core)})
+        with self._lock:
+            self._latest = latest
+        event_bus.publish('system', {key: value for key, value in latest.items() if key != 'timestamp'}, retain=True)
+        return latest
+
+    def latest(self):
+        """Returns the most recent sample, taking one right away if the sampler hasn't produced any yet."""
+        with self._lock:
+            latest = self._latest
+        return latest or self.sample()
+
+    def history(self, per_core=False):
+        series = self._history.series()
+        if per_core:
+            cores = self._core_history.series()
+            series["cpu_per_core"] = [cores[f"cpu{i}"] for i in range(self.core_count)]
+        return series
+
+system_sampler = SystemSampler()
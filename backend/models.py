@@ -27,6 +27,7 @@ class User(db.Model):
     # Removed: received_file_shares = db.relationship('UserFileShare', foreign_keys='UserFileShare.recipient_user_id', backref='recipient', lazy=True, cascade="all, delete-orphan")
     # Removed: sent_file_shares = db.relationship('UserFileShare', foreign_keys='UserFileShare.sharer_user_id', backref='sharer', lazy=True, cascade="all, delete-orphan")
     network_usage = db.relationship('NetworkUsage', backref='user', lazy=True, cascade="all, delete-orphan")
+    network_usage_monthly = db.relationship('NetworkUsageMonthly', backref='user', lazy=True, cascade="all, delete-orphan")
     tasks = db.relationship('Task', backref='user', lazy=True, cascade="all, delete-orphan")
 
 
@@ -73,6 +74,9 @@ class Notification(db.Model):
     type = db.Column(db.String(50), nullable=False, default='info') # e.g., 'info', 'warning', 'error'
     is_read = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    dedup_key = db.Column(db.String(255), nullable=True) # e.g., "container:<id>:stopped:<time bucket>"
+
+    __table_args__ = (db.Index('ix_notification_user_dedup', 'user_id', 'dedup_key', unique=True),)
 
 class Stack(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -81,6 +85,31 @@ class Stack(db.Model):
     env_content = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+    revisions = db.relationship('StackRevision', backref='stack', lazy=True, cascade="all, delete-orphan", order_by='StackRevision.revision')
+
+class StackRevision(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    stack_id = db.Column(db.Integer, db.ForeignKey('stack.id'), nullable=False)
+    revision = db.Column(db.Integer, nullable=False)
+    compose_content = db.Column(db.Text, nullable=False)
+    env_content = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('stack_id', 'revision', name='_stack_revision_uc'),)
+
+class DeployJob(db.Model):
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    stack_name = db.Column(db.String(255), nullable=False, index=True)
+    action = db.Column(db.String(50), nullable=False, default='deploy')
+    status = db.Column(db.String(20), nullable=False, default='queued') # 'queued', 'running', 'succeeded', 'failed'
+    exit_code = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    owner = db.Column(db.String(100), nullable=True) # hostname:pid:start time of the process running it
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
 
 # Removed: ShareLink, SharedItem, UserFileShare models
 
@@ -104,6 +133,19 @@ class SystemSetting(db.Model):
     key = db.Column(db.String(100), unique=True, nullable=False)
     value = db.Column(db.Text, nullable=True)
 
+class DockerHost(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    url = db.Column(db.String(255), nullable=False) # tcp://host:2376 or ssh://user@host:22
+    tls = db.Column(db.Boolean, default=False, nullable=False)
+    tls_verify = db.Column(db.Boolean, default=True, nullable=False)
+    ca_cert = db.Column(db.Text, nullable=True)
+    client_cert = db.Column(db.Text, nullable=True)
+    client_key = db.Column(db.Text, nullable=True)
+    enabled = db.Column(db.Boolean, default=True, nullable=False)
+    timeout = db.Column(db.Float, nullable=True) # Seconds; None uses DOCKORA_DOCKER_HOST_TIMEOUT
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class NetworkUsage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -113,6 +155,15 @@ class NetworkUsage(db.Model):
 
     __table_args__ = (db.UniqueConstraint('user_id', 'date', name='_user_date_uc'),)
 
+class NetworkUsageMonthly(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    month = db.Column(db.Date, nullable=False) # First day of the month
+    uploaded_bytes = db.Column(db.BigInteger, default=0, nullable=False)
+    downloaded_bytes = db.Column(db.BigInteger, default=0, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'month', name='_user_month_uc'),)
+
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -1,93 +1,169 @@
 from flask import Blueprint, jsonify, current_app, session, request
 from extensions import db, client
-from models import Application, User
+from models import Application, User, app_user_share
 from decorators import login_required, admin_required
+from helpers.snapshot_cache import snapshot_cache
+from helpers.docker_hosts import docker_hosts, merged_snapshot, host_address, LOCAL_HOST
+import os
 import time
+import threading
 import docker
 # Removed: from helpers import cleanup_trash
 
 apps_bp = Blueprint('apps', __name__)
 
-def refresh_apps_from_docker():
+CORE_APP_NAMES = ['dockora-frontend', 'dockora-backend', 'dockora-db']
+APP_FIELDS = ('name', 'status', 'stack_name', 'ports')
+APP_FULL_SYNC_INTERVAL = float(os.environ.get('DOCKORA_APP_FULL_SYNC_INTERVAL', 30 * 60))
+APP_SYNC_DEBOUNCE = 1.0
+APPS_SNAPSHOT_TTL = float(os.environ.get('DOCKORA_APPS_SNAPSHOT_TTL', 30))
+
+_pending_container_ids = set()
+_pending_lock = threading.Lock()
+_sync_requested = threading.Event()
+
+def app_fields_from_container(c):
+    """
+    Builds the Application fields for a container, or returns None if the container
+    shouldn't be listed as an app (core Dockora containers or no published ports).
+    """
+    # Use HostConfig.PortBindings to get port mappings even for stopped containers
+    ports_attr = c.attrs.get('HostConfig', {}).get('PortBindings', {})
+    if not ports_attr or c.name in CORE_APP_NAMES:
+        return None
+
+    port_mappings = []
+    for container_port, host_bindings in ports_attr.items():
+        if host_bindings:
+            for binding in host_bindings:
+                host_ip = binding.get('HostIp', '0.0.0.0')
+                host_port = binding.get('HostPort', '')
+                if host_ip in ['', '::']: host_ip = '0.0.0.0'
+                if host_port:
+                    port_mappings.append(f"{host_ip}:{host_port}->{container_port}")
+
+    if not port_mappings:
+        return None
+
+    display_name = c.name
+    if display_name.startswith('dockora-'):
+        display_name = display_name[8:]
+
+    return {
+        "container_id": c.short_id,
+        "name": display_name,
+        "status": c.status,
+        "stack_name": c.labels.get('com.docker.compose.project'),
+        "ports": port_mappings,
+    }
+
+def refresh_apps_from_docker(container_ids=None):
     """
     Core logic to synchronize the Application table with Docker containers.
+    Existing rows are preloaded in one query and only rows that actually changed are
+    written, using bulk inserts, updates and deletes. Pass container_ids to sync just
+    those containers (e.g. in response to Docker events) instead of every container.
     """
     with current_app.app_context():
         try:
-            containers = client.containers.list(all=True)
-            core_app_names = ['dockora-frontend', 'dockora-backend', 'dockora-db']
-            existing_db_ids = {app.container_id for app in Application.query.all()}
-            current_docker_ids = set()
-
-            for c in containers:
-                # Use HostConfig.PortBindings to get port mappings even for stopped containers
-                ports_attr = c.attrs.get('HostConfig', {}).get('PortBindings', {})
-                if not ports_attr or c.name in core_app_names:
-                    continue
-
-                current_docker_ids.add(c.short_id)
-
-                port_mappings = []
-                for container_port, host_bindings in ports_attr.items():
-                    if host_bindings:
-                        for binding in host_bindings:
-                            host_ip = binding.get('HostIp', '0.0.0.0')
-                            host_port = binding.get('HostPort', '')
-                            if host_ip in ['', '::']: host_ip = '0.0.0.0'
-                            if host_port:
-                                port_mappings.append(f"{host_ip}:{host_port}->{container_port}")
-                
-                if not port_mappings:
-                    continue
-
-                display_name = c.name
-                if display_name.startswith('dockora-'):
-                    display_name = display_name[8:]
-
-                app = Application.query.filter_by(container_id=c.short_id).first()
-                if app:
-                    app.name = display_name
-                    app.status = c.status
-                    app.stack_name = c.labels.get('com.docker.compose.project')
-                    app.ports = port_mappings
-                else:
-                    new_app = Application(
-                        container_id=c.short_id,
-                        name=display_name,
-                        status=c.status,
-                        stack_name=c.labels.get('com.docker.compose.project'),
-                        ports=port_mappings
-                    )
-                    db.session.add(new_app)
-            
-            stale_ids = existing_db_ids - current_docker_ids
+            desired = {}
+            if container_ids is None:
+                for c in client.containers.list(all=True):
+                    fields = app_fields_from_container(c)
+                    if fields: desired[c.short_id] = fields
+                scope = None
+            else:
+                scope = set(container_ids)
+                for container_id in scope:
+                    try:
+                        c = client.containers.get(container_id)
+                    except docker.errors.NotFound:
+                        continue
+                    fields = app_fields_from_container(c)
+                    if fields: desired[c.short_id] = fields
+
+            query = db.session.query(Application.id, Application.container_id, *[getattr(Application, f) for f in APP_FIELDS])
+            if scope is not None:
+                query = query.filter(Application.container_id.in_(scope))
+            existing = {row.container_id: row for row in query}
+
+            inserts = [fields for container_id, fields in desired.items() if container_id not in existing]
+            updates = []
+            for container_id, fields in desired.items():
+                row = existing.get(container_id)
+                if row and any(getattr(row, f) != fields[f] for f in APP_FIELDS):
+                    updates.append({"id": row.id, **{f: fields[f] for f in APP_FIELDS}})
+            stale_ids = [row.id for container_id, row in existing.items() if container_id not in desired]
+
+            if inserts:
+                db.session.bulk_insert_mappings(Application, inserts)
+            if updates:
+                db.session.bulk_update_mappings(Application, updates)
             if stale_ids:
-                Application.query.filter(Application.container_id.in_(stale_ids)).delete(synchronize_session=False)
+                db.session.execute(app_user_share.delete().where(app_user_share.c.application_id.in_(stale_ids)))
+                Application.query.filter(Application.id.in_(stale_ids)).delete(synchronize_session=False)
 
-            db.session.commit()
+            if inserts or updates or stale_ids:
+                db.session.commit()
+                snapshot_cache.invalidate('apps')
         except Exception as e:
             print(f"An unexpected error occurred during app refresh: {e}")
             db.session.rollback()
 
+def request_app_sync(container_id):
+    """Queues a container for the next incremental app sync run by the scheduler thread."""
+    with _pending_lock:
+        _pending_container_ids.add(container_id[:12])
+    _sync_requested.set()
+
+def handle_app_container_event(event):
+    request_app_sync(event.get('id', ''))
+
+def register_app_sync_handlers(listener):
+    listener.on(['create', 'start', 'die', 'pause', 'unpause', 'rename', 'destroy'], handle_app_container_event)
+
+def list_host_apps(host, host_client):
+    """
+    Apps running on a remote Docker host, read live from its containers. Ports bound to
+    all interfaces are reported with the host's address so links point at that machine.
+    """
+    address = host_address(host.url)
+    apps = []
+    for c in host_client.containers.list(all=True):
+        fields = app_fields_from_container(c)
+        if not fields: continue
+        apps.append({
+            "id": fields["container_id"],
+            "name": fields["name"],
+            "status": fields["status"],
+            "stack_name": fields["stack_name"],
+            "ports": [port.replace('0.0.0.0:', f"{address}:", 1) for port in fields["ports"]],
+        })
+    return apps
+
+def build_app_list(user_id):
+    user = User.query.get(user_id)
+
+    def local_apps():
+        apps = Application.query.all() if user.role == 'admin' else user.shared_apps
+        return [{
+            "id": app.container_id,
+            "name": app.name,
+            "status": app.status,
+            "stack_name": app.stack_name,
+            "ports": app.ports,
+        } for app in apps]
+
+    if user.role != 'admin':
+        # Sharing works on the synced local apps, so only admins see remote hosts' apps.
+        return merged_snapshot({LOCAL_HOST: local_apps()}, {})
+    return merged_snapshot(*docker_hosts.fan_out(local_apps, list_host_apps))
+
 @apps_bp.route("/apps", methods=["GET"])
 @login_required
 def list_apps():
     user_id = session.get('user_id')
-    user = User.query.get(user_id)
-
-    if user.role == 'admin':
-        apps = Application.query.all()
-    else:
-        apps = user.shared_apps
-
-    result = [{
-        "id": app.container_id,
-        "name": app.name,
-        "status": app.status,
-        "stack_name": app.stack_name,
-        "ports": app.ports,
-    } for app in apps]
-    return jsonify(result)
+    return snapshot_cache.response(f"apps:user:{user_id}", lambda: build_app_list(user_id), ttl=APPS_SNAPSHOT_TTL)
 
 @apps_bp.route("/apps/refresh", methods=["POST"])
 @login_required
@@ -119,6 +195,7 @@ def share_app(container_id):
         app.shared_with.append(user)
     
     db.session.commit()
+    snapshot_cache.invalidate('apps')
     return jsonify({"message": f"App '{app.name}' sharing updated."})
 
 def start_app_refresh_scheduler(app):
@@ -126,10 +203,24 @@ def start_app_refresh_scheduler(app):
         print("Starting initial app data population...")
         refresh_apps_from_docker()
         print("Initial app data populated.")
+    last_full_sync = time.time()
 
     while True:
-        time.sleep(5 * 60) # 5 minutes
-        with app.app_context():
-            print("Performing scheduled app data refresh...")
-            refresh_apps_from_docker()
-            print("Scheduled app data refresh complete.")
\ No newline at end of file
+        timeout = max(0, APP_FULL_SYNC_INTERVAL - (time.time() - last_full_sync))
+        if _sync_requested.wait(timeout=timeout):
+            # Let bursts of events (e.g. a whole stack coming up) settle into one sync.
+            time.sleep(APP_SYNC_DEBOUNCE)
+            _sync_requested.clear()
+            with _pending_lock:
+                container_ids = set(_pending_container_ids)
+                _pending_container_ids.clear()
+            if container_ids:
+                with app.app_context():
+                    refresh_apps_from_docker(container_ids)
+
+        if time.time() - last_full_sync >= APP_FULL_SYNC_INTERVAL:
+            with app.app_context():
+                print("Performing scheduled app data refresh...")
+                refresh_apps_from_docker()
+                print("Scheduled app data refresh complete.")
+            last_full_sync = time.time()
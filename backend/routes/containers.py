@@ -1,57 +1,59 @@
-from flask import Blueprint, jsonify, request, Response, stream_with_context
+from flask import Blueprint, jsonify, request, session, current_app, Response, stream_with_context
 import docker
 import subprocess
-import tempfile
-import shutil
-import os
-from datetime import datetime, timedelta
-from extensions import client, db
-from models import User, Notification, Stack, ContainerStatus
+import json
+import math
+import queue
+import re
+from datetime import datetime, timezone
+from extensions import client, stream_client, docker_client, DOCKER_SLOW_TIMEOUT, db
+from models import Stack, StackRevision
 from decorators import admin_required
-from helpers.container_helpers import parse_cpu_limit, parse_memory_limit # Updated import
+from helpers.container_helpers import parse_cpu_limit, parse_memory_limit, fetch_stats_concurrently, empty_stats # Updated import
+from helpers.stats_collector import stats_collector
+from helpers.snapshot_cache import snapshot_cache
+from helpers.log_broker import log_broker
+from helpers.log_helpers import iter_log_lines, split_timestamp
+from helpers.deploy_jobs import deploy_jobs
+from helpers.stack_workspace import prepare_stack_workspace, remove_stack_workspace
+from helpers.image_inventory import image_inventory, list_host_images
+from helpers.recreate import recreate_container as recreate_with_gate, RecreateError, GATES as RECREATE_GATES, RECREATE_GATE_TIMEOUT
+from helpers.image_service import image_service
+from helpers.bulk_actions import CONTAINER_ACTIONS, BULK_DEFAULT_PARALLELISM, resolve_containers, plan_bulk_action, run_bulk_action
+from helpers.stack_updates import ComposeError, plan_stack_change, apply_stack_update, serialize_revision
+from helpers.docker_hosts import docker_hosts, merged_snapshot, LOCAL_HOST
+from routes.jobs import job_stream_response
 
 containers_bp = Blueprint('containers', __name__)
 
-@containers_bp.route("/containers", methods=["GET"])
-@admin_required
-def list_containers():
-    containers = client.containers.list(all=True)
-    
-    statuses_from_db = {cs.id: cs for cs in ContainerStatus.query.all()}
-    current_container_ids = {c.short_id for c in containers}
+LOG_SEARCH_DEFAULT_LIMIT = 100
+LOG_SEARCH_MAX_LIMIT = 5000
 
-    for c in containers:
-        db_status_obj = statuses_from_db.get(c.short_id)
-        previous_status = db_status_obj.status if db_status_obj else None
-        current_status = c.status
-        
-        if previous_status and 'running' in previous_status and 'exited' in current_status:
-            admins = User.query.filter_by(role='admin').all()
-            for admin in admins:
-                recent_notif = Notification.query.filter(
-                    Notification.user_id == admin.id,
-                    Notification.message.like(f"%Container '{c.name}' stopped unexpectedly.%"),
-                    Notification.created_at > datetime.utcnow() - timedelta(minutes=1)
-                ).first()
-                if not recent_notif:
-                    notif = Notification(
-                        user_id=admin.id,
-                        message=f"Container '{c.name}' stopped unexpectedly.",
-                        type='warning'
-                    )
-                    db.session.add(notif)
-        
-        if db_status_obj:
-            db_status_obj.status = current_status
-        else:
-            new_status = ContainerStatus(id=c.short_id, status=current_status)
-            db.session.add(new_status)
+def requested_host(stream=False):
+    """
+    The Docker host a request acts on (?host=, the local daemon by default) and its client,
+    or None for a host that doesn't exist. `stream` picks the client without read timeout.
+    """
+    host = request.args.get('host', LOCAL_HOST)
+    return host, docker_hosts.client_for(host, stream=stream)
+
+def unknown_host(host):
+    return jsonify({"error": f"Unknown Docker host '{host}'"}), 404
 
-    stale_ids = set(statuses_from_db.keys()) - current_container_ids
-    if stale_ids:
-        ContainerStatus.query.filter(ContainerStatus.id.in_(stale_ids)).delete(synchronize_session=False)
+def build_container_list(include_stats=True, host_client=None):
+    """Lists the local containers, or a remote host's when given its client (without collected stats history)."""
+    containers = (host_client or client).containers.list(all=True)
 
-    db.session.commit()
+    all_stats = {}
+    if include_stats:
+        missing = []
+        for c in containers:
+            if c.status != 'running': continue
+            sample = stats_collector.latest(c.short_id) if host_client is None else None
+            if sample: all_stats[c.short_id] = sample
+            else: missing.append(c)
+        # Containers the background collector hasn't sampled yet (e.g. just started) are fetched directly.
+        all_stats.update(fetch_stats_concurrently(missing, host_client.api if host_client else None))
 
     result = []
     for c in containers:
@@ -78,72 +80,147 @@ def list_containers():
             elif memory_limit_bytes >= 1024**2: memory_limit = f"{memory_limit_bytes / 1024**2:.2f} MB"
             else: memory_limit = f"{memory_limit_bytes / 1024:.2f} KB"
 
-        stats = {"cpu_percent": 0, "memory_percent": 0, "memory_usage": 0}
-        if c.status == 'running':
-            try:
-                s = c.stats(stream=False)
-                cpu_delta = s['cpu_stats']['cpu_usage']['total_usage'] - s['precpu_stats']['cpu_usage']['total_usage']
-                system_cpu_delta = s['cpu_stats']['system_cpu_usage'] - s['precpu_stats']['system_cpu_usage']
-                if system_cpu_delta > 0.0 and cpu_delta > 0.0:
-                    number_cpus = s['cpu_stats']['online_cpus']
-                    stats['cpu_percent'] = (cpu_delta / system_cpu_delta) * number_cpus * 100.0
-                if 'usage' in s['memory_stats'] and 'limit' in s['memory_stats']:
-                    mem_usage, mem_limit = s['memory_stats']['usage'], s['memory_stats']['limit']
-                    if mem_limit > 0:
-                        stats['memory_percent'] = (mem_usage / mem_limit) * 100.0
-                        stats['memory_usage'] = mem_usage
-            except (KeyError, ZeroDivisionError): pass
-
         result.append({
             "id": c.short_id, "name": c.name, "status": c.status,
             "image": c.image.tags[0] if c.image.tags else c.image.short_id,
             "ports": port_mappings, "cpus": cpus, "memory_limit": memory_limit,
-            "stats": stats, "stack_name": c.labels.get('com.docker.compose.project')
+            "stats": all_stats.get(c.short_id, empty_stats()), "stack_name": c.labels.get('com.docker.compose.project')
         })
-    return jsonify(result)
+    return result
+
+@containers_bp.route("/containers", methods=["GET"])
+@admin_required
+def list_containers():
+    """
+    Lists containers from the local daemon and every enabled remote Docker host, queried
+    concurrently. Each container has a "host"; hosts that failed or timed out are listed
+    in the X-Dockora-Host-Errors header.
+    """
+    include_stats = request.args.get('stats', 'true').lower() not in ('false', '0', 'no')
+    key = 'containers' if include_stats else 'containers:no-stats'
+    return snapshot_cache.response(key, lambda: merged_snapshot(*docker_hosts.fan_out(
+        lambda: build_container_list(include_stats),
+        lambda host, host_client: build_container_list(include_stats, host_client),
+    )))
+
+@containers_bp.route("/containers/<id>/stats/history", methods=["GET"])
+@admin_required
+def get_stats_history(id):
+    history = stats_collector.history(id)
+    if history is None: return jsonify({"error": "No stats collected for this container. Is it running?"}), 404
+    return jsonify(history)
 
 @containers_bp.route("/containers/create", methods=["POST"])
 @admin_required
 def create_container():
+    """
+    Runs a container right away when its image is local and returns {id, name}. Otherwise
+    the image is pulled in the background and the container started once the pull succeeds;
+    the response is 202 {pull_id, image, status}, to follow on /images/pulls/<id>/stream,
+    whose final "done" event carries the created container ({id, name}) as "result" or why
+    it couldn't be created as "result_error". createContainer in the frontend's api.js does
+    this and resolves with {id, name} either way.
+    """
     data = request.get_json()
     image, name = data.get("image"), data.get("name")
     if not image: return jsonify({"error": "Image is required"}), 400
+    try:
+        client.api.inspect_image(image)
+    except docker.errors.ImageNotFound:
+        def run_when_pulled(task):
+            if task.status == 'succeeded':
+                container = client.containers.run(image, name=name, detach=True)
+                return {"id": container.short_id, "name": container.name}
+
+        task = image_service.pull(image)
+        task.add_done_callback(run_when_pulled)
+        return jsonify({"pull_id": task.id, "image": image, "status": task.status}), 202
+    except Exception as e: return jsonify({"error": str(e)}), 500
     try:
         container = client.containers.run(image, name=name, detach=True)
         return jsonify({"id": container.short_id, "name": container.name})
-    except docker.errors.ImageNotFound:
-        try:
-            client.images.pull(image)
-            container = client.containers.run(image, name=name, detach=True)
-            return jsonify({"id": container.short_id, "name": container.name})
-        except Exception as e: return jsonify({"error": str(e)}), 500
     except Exception as e: return jsonify({"error": str(e)}), 500
 
+@containers_bp.route("/containers/bulk", methods=["POST"])
+@admin_required
+def bulk_container_action():
+    """
+    Runs one action on many containers concurrently ({ids, action, parallelism}) and
+    streams a result per container as NDJSON as soon as it is known, followed by a
+    summary line. Members of the same Dockora stack are handled in one compose call.
+    """
+    data = request.get_json() or {}
+    ids, action = data.get('ids') or [], data.get('action')
+    if action not in CONTAINER_ACTIONS:
+        return jsonify({"error": f"Invalid action. Use one of: {', '.join(CONTAINER_ACTIONS)}."}), 400
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"error": "ids must be a non-empty list"}), 400
+    if not all(isinstance(requested, str) and requested for requested in ids):
+        return jsonify({"error": "ids must be non-empty strings"}), 400
+    try:
+        parallelism = int(data.get('parallelism', BULK_DEFAULT_PARALLELISM))
+    except (TypeError, ValueError):
+        return jsonify({"error": "parallelism must be an integer"}), 400
+
+    try:
+        found, unresolved = resolve_containers(ids)
+    except Exception as e: return jsonify({"error": str(e)}), 500
+    # The same container may be requested under several ids.
+    containers = list({c['Id']: c for c in found.values()}.values())
+    projects = {(c.get('Labels') or {}).get('com.docker.compose.project') for c in containers} - {None}
+    stacks = {stack.name: stack for stack in Stack.query.filter(Stack.name.in_(projects)).all()} if projects else {}
+    units = plan_bulk_action(containers, stacks)
+    app = current_app._get_current_object()
+
+    def generate():
+        succeeded = failed = 0
+        for requested, error in unresolved.items():
+            failed += 1
+            yield json.dumps({"id": requested, "name": None, "action": action, "success": False, "error": error}) + "\n"
+        for result in run_bulk_action(app, units, action, parallelism):
+            if result["success"]: succeeded += 1
+            else: failed += 1
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"done": True, "succeeded": succeeded, "failed": failed}) + "\n"
+
+    db.session.close()
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @containers_bp.route("/containers/<id>/<action>", methods=["POST"])
 @admin_required
 def manage_container(id, action):
     try:
-        container = client.containers.get(id)
+        host, host_client = requested_host()
+        if host_client is None: return unknown_host(host)
+        container = host_client.containers.get(id)
+        if host != LOCAL_HOST:
+            # Stacks are only managed on the local daemon, so remote containers are acted on directly.
+            if action == "remove": container.remove(force=True)
+            elif action in ("start", "stop", "restart", "pause", "unpause"): getattr(container, action)()
+            else: return jsonify({"error": "Invalid action"}), 400
+            snapshot_cache.invalidate('containers')
+            return jsonify({"success": True})
         actions = {"start": container.start, "stop": container.stop, "restart": container.restart, "pause": container.pause, "unpause": container.unpause}
         if action in actions:
             actions[action]()
         elif action == "remove":
             stack_name = container.labels.get('com.docker.compose.project')
             if stack_name:
-                stack = Stack.query.filter_by(name=stack_name).first()
-                if stack:
-                    temp_dir = tempfile.mkdtemp()
-                    try:
-                        with open(os.path.join(temp_dir, 'docker-compose.yml'), 'w') as f: f.write(stack.compose_content)
-                        if stack.env_content:
-                            with open(os.path.join(temp_dir, '.env'), 'w') as f: f.write(stack.env_content)
-                        subprocess.run(['docker', 'compose', '-p', stack_name, 'down', '--remove-orphans'], cwd=temp_dir, capture_output=True, text=True)
+                # Held from reading the stack to removing its workspace, so a deploy can't recreate
+                # the stack or rewrite the workspace halfway through.
+                with deploy_jobs.stack_lock(stack_name):
+                    stack = Stack.query.filter_by(name=stack_name).first()
+                    if stack:
+                        workspace = prepare_stack_workspace(stack_name, stack.compose_content, stack.env_content)
+                        subprocess.run(['docker', 'compose', '-p', stack_name, 'down', '--remove-orphans'], cwd=workspace, capture_output=True, text=True)
                         db.session.delete(stack)
                         db.session.commit()
-                    finally: shutil.rmtree(temp_dir)
-                else: subprocess.run(['docker', 'compose', '-p', stack_name, 'down', '--remove-orphans'], capture_output=True, text=True)
+                        remove_stack_workspace(stack_name)
+                    else: subprocess.run(['docker', 'compose', '-p', stack_name, 'down', '--remove-orphans'], capture_output=True, text=True)
             else: container.remove(force=True)
         else: return jsonify({"error": "Invalid action"}), 400
+        # Don't wait for the Docker event: the client refetches the list as soon as this returns.
+        snapshot_cache.invalidate('containers')
         return jsonify({"success": True})
     except Exception as e: return jsonify({"error": str(e)}), 500
 
@@ -151,10 +228,13 @@ def manage_container(id, action):
 @admin_required
 def rename_container(id):
     try:
-        container = client.containers.get(id)
+        host, host_client = requested_host()
+        if host_client is None: return unknown_host(host)
+        container = host_client.containers.get(id)
         new_name = request.json.get("name")
         if not new_name: return jsonify({"error": "New name is required"}), 400
         container.rename(new_name)
+        snapshot_cache.invalidate('containers')
         return jsonify({"success": True, "message": f"Container renamed to '{new_name}'"})
     except docker.errors.NotFound: return jsonify({"error": "Container not found"}), 404
     except docker.errors.APIError as e:
@@ -166,138 +246,207 @@ def rename_container(id):
 @admin_required
 def get_logs(id):
     try:
-        container = client.containers.get(id)
+        host, host_client = requested_host()
+        if host_client is None: return unknown_host(host)
+        container = host_client.containers.get(id)
         return jsonify({"logs": container.logs(tail=100).decode("utf-8")})
     except Exception as e: return jsonify({"error": str(e)}), 500
 
+def parse_log_time(value):
+    """
+    Accepts a unix timestamp or an ISO 8601 date/time (UTC unless it has an offset) and returns a
+    unix timestamp. Raises ValueError for anything Docker wouldn't accept (it needs a positive time).
+    """
+    if not value: return None
+    try:
+        timestamp = float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if parsed.tzinfo is None: parsed = parsed.replace(tzinfo=timezone.utc)
+        timestamp = parsed.timestamp()
+    if not math.isfinite(timestamp) or timestamp <= 0:
+        raise ValueError(f"'{value}' is not a time after the epoch")
+    return timestamp
+
+@containers_bp.route("/containers/<id>/logs/search", methods=["GET"])
+@admin_required
+def search_logs(id):
+    grep = request.args.get('grep', '')
+    use_regex = request.args.get('regex', 'false').lower() == 'true'
+    ignore_case = request.args.get('ignore_case', 'true').lower() != 'false'
+    try:
+        since = parse_log_time(request.args.get('since'))
+        until = parse_log_time(request.args.get('until'))
+        limit = min(int(request.args.get('limit', LOG_SEARCH_DEFAULT_LIMIT)), LOG_SEARCH_MAX_LIMIT)
+        if limit < 1: raise ValueError("limit must be at least 1")
+        pattern = re.compile(grep if use_regex else re.escape(grep), re.IGNORECASE if ignore_case else 0)
+    except (ValueError, re.error) as e:
+        return jsonify({"error": f"Invalid search parameters: {e}"}), 400
+
+    stream = None
+    try:
+        host, host_client = requested_host()
+        if host_client is None: return unknown_host(host)
+        host_client.containers.get(id)
+        stream = docker_hosts.client_for(host, stream=True).api.logs(id, stream=True, follow=False, timestamps=True, since=since, until=until)
+        matches = []
+        truncated = False
+        # Lines are read one at a time and only matches are kept, so memory stays flat however large the log is.
+        for line in iter_log_lines(stream):
+            timestamp, text = split_timestamp(line)
+            if pattern.search(text):
+                matches.append({"timestamp": timestamp, "line": text})
+                if len(matches) == limit:
+                    # Stop here rather than read on to prove there is another match; truncated
+                    # means the limit was reached and more matches may exist.
+                    truncated = True
+                    break
+        return jsonify({"matches": matches, "truncated": truncated})
+    except docker.errors.NotFound: return jsonify({"error": "Container not found"}), 404
+    except Exception as e: return jsonify({"error": str(e)}), 500
+    finally:
+        if stream: stream.close()
+
 @containers_bp.route("/containers/<id>/stream-logs", methods=["GET"])
 @admin_required
 def stream_logs(id):
+    host, host_client = requested_host()
+    if host_client is None: return unknown_host(host)
+    host_stream_client = docker_hosts.client_for(host, stream=True)
+
     def generate():
+        subscription = None
         try:
-            container = client.containers.get(id)
-            for line in container.logs(stream=True, follow=True, tail=50):
-                yield line.decode('utf-8')
+            container = host_client.containers.get(id)
+            subscription = log_broker.subscribe([(container.id, container.name)], host_stream_client.api)
+            for entry in subscription.entries(merge_window=0):
+                if entry: yield entry.line + "\n"
         except docker.errors.NotFound:
             yield f"[DOCKORA_STREAM_ERROR]Container '{id}' not found.\n"
         except Exception as e:
             yield f"[DOCKORA_STREAM_ERROR]An error occurred while streaming logs: {str(e)}\n"
+        finally:
+            if subscription: log_broker.unsubscribe(subscription)
 
+    # Log tails stay open for as long as someone watches them; give the connection that
+    # admin_required used back to the pool first.
+    db.session.close()
     return Response(stream_with_context(generate()), mimetype='text/plain')
 
+def stream_merged_logs(containers, api=None):
+    """
+    Streams logs from several containers over one connection as NDJSON, merged by
+    timestamp and tagged with the container each line came from. `api` is the low-level
+    stream client of their Docker host, the local daemon by default.
+    """
+    def generate():
+        subscription = log_broker.subscribe(containers, api)
+        try:
+            for entry in subscription.entries():
+                if entry is None:
+                    yield "\n" # Heartbeat, also lets us notice disconnected clients.
+                    continue
+                yield json.dumps({"container_id": entry.container_id[:12], "name": entry.name, "timestamp": entry.timestamp, "line": entry.line}) + "\n"
+        finally:
+            log_broker.unsubscribe(subscription)
+
+    db.session.close()
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@containers_bp.route("/containers/stream-logs", methods=["GET"])
+@admin_required
+def stream_multiple_logs():
+    ids = [i for i in request.args.get('ids', '').split(',') if i]
+    if not ids: return jsonify({"error": "At least one container id is required"}), 400
+    host, host_client = requested_host()
+    if host_client is None: return unknown_host(host)
+    containers = []
+    for container_id in ids:
+        try:
+            container = host_client.containers.get(container_id)
+        except docker.errors.NotFound:
+            return jsonify({"error": f"Container '{container_id}' not found."}), 404
+        containers.append((container.id, container.name))
+    return stream_merged_logs(containers, docker_hosts.client_for(host, stream=True).api)
+
+@containers_bp.route("/stacks/<name>/stream-logs", methods=["GET"])
+@admin_required
+def stream_stack_logs(name):
+    members = client.api.containers(all=True, filters={'label': f'com.docker.compose.project={name}'})
+    if not members: return jsonify({"error": f"No containers found for stack '{name}'."}), 404
+    return stream_merged_logs([(c['Id'], c['Names'][0].lstrip('/') if c.get('Names') else c['Id'][:12]) for c in members])
+
 def parse_ports(port_strings):
-    port_dict = {}
-    if not port_strings: return None
-    for port_string in port_strings:
+    """Turns ["8080:80", "5353:53/udp"] into raw PortBindings."""
+    port_bindings = {}
+    for port_string in port_strings or []:
         try:
             host_port_str, container_port_str = port_string.split(':')
             container_port, protocol = container_port_str.split('/') if '/' in container_port_str else (container_port_str, 'tcp')
-            port_dict[f"{container_port}/{protocol}"] = int(host_port_str)
+            port_bindings[f"{container_port}/{protocol}"] = [{"HostIp": "", "HostPort": str(int(host_port_str))}]
         except (ValueError, IndexError): continue
-    return port_dict
+    return port_bindings
 
 @containers_bp.route("/containers/<id>/recreate", methods=["POST"])
 @admin_required
 def recreate_container(id):
+    """
+    Recreates a container with new ports and/or limits without downtime where possible:
+    the replacement starts under a temporary name, must pass a readiness gate ("gate":
+    auto, health, port, running or none), and only then takes over the name while the
+    old container is stopped. Falls back to stopping the old container first when both
+    would claim the same host ports, static IPs or the host network, or both write to the
+    same volumes or bind mounts. Rolls back on failure. ?host= picks a remote Docker host.
+    """
+    data = request.get_json() or {}
+    gate = data.get("gate", "auto")
+    if gate not in RECREATE_GATES: return jsonify({"error": f"Invalid gate. Use one of: {', '.join(RECREATE_GATES)}."}), 400
+    host, host_client = requested_host()
+    if host_client is None: return unknown_host(host)
+    # The port gate connects to the container's network addresses, which only this server's daemon exposes to us.
+    if gate == 'port' and host != LOCAL_HOST: return jsonify({"error": "The port gate only works for local containers."}), 400
+    new_cpu_limit_str = data.get("cpu_limit")
+    new_memory_limit_str = data.get("memory_limit")
+
+    # A limit that is provided (even empty) replaces the existing one; an empty memory limit means unlimited.
+    nano_cpus = (parse_cpu_limit(new_cpu_limit_str) or 0) if new_cpu_limit_str is not None else None
+    memory = (parse_memory_limit(new_memory_limit_str) or 0) if new_memory_limit_str is not None else None
+    port_bindings = parse_ports(data["ports"]) if "ports" in data else None
+
     try:
-        container = client.containers.get(id)
-        config, host_config = container.attrs['Config'], container.attrs['HostConfig']
-        
-        data = request.json
-        new_ports = data.get("ports", [])
-        new_cpu_limit_str = data.get("cpu_limit")
-        new_memory_limit_str = data.get("memory_limit")
-
-        # Parse new limits
-        nano_cpus_limit = parse_cpu_limit(new_cpu_limit_str)
-        mem_limit_bytes = parse_memory_limit(new_memory_limit_str)
-
-        # Determine final CPU limit: if new_cpu_limit_str is provided (even empty), use parsed value. Otherwise, use existing.
-        final_nano_cpus = nano_cpus_limit if new_cpu_limit_str is not None else host_config.get('NanoCpus')
-        
-        # Determine final memory limit: if new_memory_limit_str is provided (even empty), use parsed value. Otherwise, use existing.
-        final_mem_limit = mem_limit_bytes if new_memory_limit_str is not None else host_config.get('Memory')
-
-        if final_mem_limit == 0:
-            final_mem_limit = None
-
-        existing_binds = host_config.get('Binds')
-        existing_restart_policy = host_config.get('RestartPolicy')
-        restart_policy_dict = existing_restart_policy if existing_restart_policy else {'Name': 'no'}
-        existing_network_mode = host_config.get('NetworkMode')
-        existing_labels = config.get('Labels')
-
-        new_container = client.containers.run(
-            image=config.get('Image'),
-            name=container.name,
-            command=config.get('Cmd'),
-            entrypoint=config.get('Entrypoint'),
-            environment=config.get('Env'),
-            volumes=existing_binds,
-            restart_policy=restart_policy_dict,
-            network_mode=existing_network_mode,
-            labels=existing_labels,
-            ports=parse_ports(new_ports),
-            nano_cpus=final_nano_cpus,
-            mem_limit=final_mem_limit,
-            detach=True
-        )
-        container.stop()
-        container.remove()
-        return jsonify({"success": True, "id": new_container.short_id})
+        new_id, mode = recreate_with_gate(id, port_bindings=port_bindings, nano_cpus=nano_cpus, memory=memory, gate=gate, timeout=float(data.get("timeout", RECREATE_GATE_TIMEOUT)), api=host_client.api)
+        snapshot_cache.invalidate('containers')
+        return jsonify({"success": True, "id": new_id[:12], "mode": mode})
     except docker.errors.NotFound: return jsonify({"error": "Container not found"}), 404
+    except RecreateError as e: return jsonify({"error": str(e)}), 500
     except Exception as e: return jsonify({"error": str(e)}), 500
 
+@containers_bp.route("/stacks", methods=["POST"])
+@admin_required
+def deploy_stack():
+    """Queues a stack deployment and returns its job id; follow it with /jobs/<id>/stream."""
+    data = request.get_json()
+    name, compose_content, env_content = data.get("name"), data.get("compose"), data.get("env")
+    if not name or not compose_content:
+        return jsonify({"error": "Stack name and compose content are required"}), 400
+    job_id = deploy_jobs.enqueue(current_app._get_current_object(), name, compose_content, env_content, session.get('user_id'))
+    return jsonify({"job_id": job_id}), 202
+
 @containers_bp.route("/stacks/create", methods=["POST"])
 @admin_required
 def create_stack():
+    """
+    Kept for older clients: queues the deployment like POST /stacks and streams its log.
+    The deployment carries on if the client disconnects.
+    """
     data = request.get_json()
     name, compose_content, env_content = data.get("name"), data.get("compose"), data.get("env")
     if not name or not compose_content:
         return Response("Stack name and compose content are required", status=400)
-    
-    temp_dir = tempfile.mkdtemp()
-    
-    def generate():
-        try:
-            with open(os.path.join(temp_dir, 'docker-compose.yml'), 'w') as f:
-                f.write(compose_content)
-            if env_content:
-                with open(os.path.join(temp_dir, '.env'), 'w') as f:
-                    f.write(env_content)
-            
-            process = subprocess.Popen(
-                ['docker', 'compose', '-p', name, 'up', '-d', '--remove-orphans'],
-                cwd=temp_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1
-            )
-            
-            for line in iter(process.stdout.readline, ''):
-                yield line
-            
-            process.wait()
-            
-            if process.returncode == 0:
-                stack = Stack.query.filter_by(name=name).first()
-                if stack:
-                    stack.compose_content, stack.env_content = compose_content, env_content
-                else:
-                    db.session.add(Stack(name=name, compose_content=compose_content, env_content=env_content))
-                db.session.commit()
-                yield "\n[DOCKORA_STREAM_SUCCESS]Deployment finished successfully."
-            else:
-                yield f"\n[DOCKORA_STREAM_ERROR]Deployment failed with exit code {process.returncode}"
-        
-        except Exception as e:
-            yield f"\n[DOCKORA_STREAM_ERROR]An internal error occurred: {str(e)}"
-        
-        finally:
-            shutil.rmtree(temp_dir)
-
-    return Response(stream_with_context(generate()), mimetype='text/plain')
+    job_id = deploy_jobs.enqueue(current_app._get_current_object(), name, compose_content, env_content, session.get('user_id'))
+    response = job_stream_response(job_id)
+    response.headers['X-Job-Id'] = job_id
+    return response
 
 @containers_bp.route("/stacks/<name>", methods=["GET"])
 @admin_required
@@ -308,33 +457,169 @@ def get_stack(name):
 @containers_bp.route("/stacks/<name>", methods=["PUT"])
 @admin_required
 def update_stack(name):
+    """
+    Updates a stack, recreating only the services whose resolved config changed. With
+    ?dry_run=true (or "dry_run": true in the body) only the plan is returned. A failed
+    update is rolled back and the stored content is left as it was.
+    """
     stack = Stack.query.filter_by(name=name).first_or_404(description="Stack not found")
     data = request.get_json()
     compose_content, env_content = data.get("compose"), data.get("env")
     if not compose_content: return jsonify({"error": "Compose content is required"}), 400
-    stack.compose_content, stack.env_content = compose_content, env_content
-    db.session.commit()
-    temp_dir = tempfile.mkdtemp()
+    dry_run = request.args.get('dry_run', '').lower() == 'true' or data.get('dry_run') is True
+    return apply_stack_content(stack, compose_content, env_content, dry_run)
+
+def apply_stack_content(stack, compose_content, env_content, dry_run=False):
     try:
-        with open(os.path.join(temp_dir, 'docker-compose.yml'), 'w') as f: f.write(compose_content)
-        if env_content:
-            with open(os.path.join(temp_dir, '.env'), 'w') as f: f.write(env_content)
-        result = subprocess.run(['docker', 'compose', '-p', name, 'up', '-d', '--remove-orphans'], cwd=temp_dir, capture_output=True, text=True)
-        output = result.stdout + result.stderr
-        if result.returncode != 0: return jsonify({"error": f"Docker Compose failed:\n{output}"}), 500
-        return jsonify({"success": True, "output": output})
+        with deploy_jobs.stack_lock(stack.name):
+            if dry_run:
+                return jsonify({"dry_run": True, "plan": plan_stack_change(stack, compose_content, env_content)})
+            success, plan, output = apply_stack_update(stack, compose_content, env_content, session.get('user_id'))
+        if not success: return jsonify({"error": f"Docker Compose failed:\n{output}", "plan": plan}), 500
+        return jsonify({"success": True, "output": output, "plan": plan})
+    except ComposeError as e: return jsonify({"error": f"Invalid compose configuration:\n{e}"}), 400
     except Exception as e: return jsonify({"error": str(e)}), 500
-    finally: shutil.rmtree(temp_dir)
+
+@containers_bp.route("/stacks/<name>/revisions", methods=["GET"])
+@admin_required
+def list_stack_revisions(name):
+    stack = Stack.query.filter_by(name=name).first_or_404(description="Stack not found")
+    return jsonify([serialize_revision(r) for r in reversed(stack.revisions)])
+
+@containers_bp.route("/stacks/<name>/rollback", methods=["POST"])
+@admin_required
+def rollback_stack(name):
+    """Redeploys a stored revision through the same diff-aware update (dry_run is supported too)."""
+    stack = Stack.query.filter_by(name=name).first_or_404(description="Stack not found")
+    data = request.get_json() or {}
+    revision = StackRevision.query.filter_by(stack_id=stack.id, revision=data.get('revision')).first()
+    if not revision: return jsonify({"error": "Revision not found"}), 404
+    return apply_stack_content(stack, revision.compose_content, revision.env_content, data.get('dry_run') is True)
 
 @containers_bp.route("/images", methods=["GET"])
 @admin_required
 def list_images():
-    return jsonify([{"id": img.short_id.replace("sha256:", ""), "tags": img.tags, "size": img.attrs['Size']} for img in client.images.list()])
+    """Lists images of the local daemon and every enabled remote Docker host, tagged by host like /containers."""
+    try:
+        images, headers = merged_snapshot(*docker_hosts.fan_out(
+            lambda: image_inventory.snapshot()["images"],
+            lambda host, host_client: list_host_images(host_client),
+        ))
+        return jsonify(images), 200, headers
+    except Exception as e: return jsonify({"error": str(e)}), 500
+
+@containers_bp.route("/images/inventory", methods=["GET"])
+@admin_required
+def get_image_inventory():
+    """
+    Per-image disk usage (unique vs shared size), the containers using each image and
+    dangling/unused flags, plus totals. Served from a cache refreshed in the background;
+    ?refresh=true rebuilds it first.
+    """
+    try:
+        if request.args.get('refresh', '').lower() == 'true':
+            image_inventory.refresh()
+        return jsonify(image_inventory.snapshot())
+    except Exception as e: return jsonify({"error": str(e)}), 500
+
+@containers_bp.route("/images/prune", methods=["POST"])
+@admin_required
+def prune_images():
+    """
+    Reclaims image space in one call. With "ids", removes those images; otherwise prunes
+    dangling images, or every unused image when "dangling_only" is false. Acts on the
+    ?host= Docker host, the local daemon by default.
+    """
+    data = request.get_json() or {}
+    ids = data.get('ids')
+    host, host_client = requested_host()
+    if host_client is None: return unknown_host(host)
+    is_local = host == LOCAL_HOST
+    deleted, errors, space_reclaimed = [], [], 0
+    try:
+        if ids:
+            images = image_inventory.snapshot()["images"] if is_local else list_host_images(host_client)
+            sizes = {i["id"]: i["unique_size"] for i in images}
+            for image_id in ids:
+                try:
+                    host_client.images.remove(image_id, force=bool(data.get('force')))
+                    deleted.append(image_id)
+                    # Estimated from the inventory: only an image's unique layers are freed.
+                    prefix = image_id.replace("sha256:", "")[:12]
+                    space_reclaimed += next((size for short_id, size in sizes.items() if short_id.startswith(prefix)), 0)
+                except Exception as e:
+                    errors.append({"id": image_id, "error": str(e)})
+        else:
+            result = (docker_client(DOCKER_SLOW_TIMEOUT) if is_local else host_client).images.prune(filters={'dangling': data.get('dangling_only', True)})
+            deleted = [entry.get('Deleted') or entry.get('Untagged') for entry in result.get('ImagesDeleted') or []]
+            space_reclaimed = result.get('SpaceReclaimed') or 0
+    except Exception as e: return jsonify({"error": str(e)}), 500
+    finally:
+        if is_local: image_inventory.request_refresh()
+    return jsonify({"deleted": deleted, "space_reclaimed": space_reclaimed, "errors": errors})
+
+@containers_bp.route("/images/pull", methods=["POST"])
+@admin_required
+def pull_images():
+    """Queues background pulls for {"images": [...]}; returns a pull id per image."""
+    images = (request.get_json() or {}).get('images') or []
+    if not isinstance(images, list) or not images:
+        return jsonify({"error": "images must be a non-empty list"}), 400
+    tasks = [image_service.pull(image) for image in images]
+    return jsonify({"pulls": [{"id": task.id, "image": task.image, "status": task.status} for task in tasks]}), 202
+
+@containers_bp.route("/images/pulls", methods=["GET"])
+@admin_required
+def list_pulls():
+    return jsonify(image_service.tasks())
+
+@containers_bp.route("/images/pulls/<pull_id>/stream", methods=["GET"])
+@admin_required
+def stream_pull(pull_id):
+    """
+    Streams a pull's progress as NDJSON: a snapshot of the current state first, then
+    per-layer progress and status lines, and a final "done" event.
+    """
+    task = image_service.get_task(pull_id)
+    if not task: return jsonify({"error": "Pull not found"}), 404
+
+    def generate():
+        subscription = task.subscribe()
+        try:
+            while True:
+                try:
+                    event = subscription.get(timeout=15)
+                except queue.Empty:
+                    yield "\n" # Heartbeat, also lets us notice disconnected clients.
+                    continue
+                yield json.dumps(event) + "\n"
+                if event["type"] == "done":
+                    return
+        finally:
+            task.unsubscribe(subscription)
+
+    db.session.close()
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@containers_bp.route("/images/updates", methods=["GET"])
+@admin_required
+def get_image_updates():
+    """Latest result of the scheduled registry digest check for running containers' images."""
+    return jsonify(image_service.updates())
+
+@containers_bp.route("/images/updates/check", methods=["POST"])
+@admin_required
+def check_image_updates():
+    image_service.request_update_check()
+    return jsonify({"message": "Update check started."}), 202
 
 @containers_bp.route("/images/<id>", methods=["DELETE"])
 @admin_required
 def remove_image(id):
     try:
-        client.images.remove(id, force=True)
+        host, host_client = requested_host()
+        if host_client is None: return unknown_host(host)
+        host_client.images.remove(id, force=True)
+        if host == LOCAL_HOST: image_inventory.request_refresh()
         return jsonify({"success": True})
-    except Exception as e: return jsonify({"error": str(e)}), 500
\ No newline at end of file
+    except Exception as e: return jsonify({"error": str(e)}), 500
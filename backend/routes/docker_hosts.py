@@ -0,0 +1,105 @@
+from flask import Blueprint, jsonify, request
+from extensions import db
+from models import DockerHost
+from decorators import admin_required
+from helpers.docker_hosts import docker_hosts, serialize_host, validate_host_url, LOCAL_HOST
+from helpers.snapshot_cache import snapshot_cache
+
+docker_hosts_bp = Blueprint('docker_hosts', __name__)
+
+HOST_TEXT_FIELDS = ('ca_cert', 'client_cert', 'client_key')
+HOST_FLAG_FIELDS = ('tls', 'tls_verify', 'enabled')
+
+def apply_host_fields(host, data):
+    """Copies the submitted fields onto host. Returns an error message, or None."""
+    if 'name' in data:
+        name = (data.get('name') or '').strip()
+        if not name:
+            return "Name is required."
+        if name == LOCAL_HOST:
+            return f"'{LOCAL_HOST}' is reserved for this server's Docker daemon."
+        if DockerHost.query.filter(DockerHost.name == name, DockerHost.id != host.id).first():
+            return f"A host named '{name}' already exists."
+        host.name = name
+    if 'url' in data:
+        url = (data.get('url') or '').strip()
+        error = validate_host_url(url)
+        if error:
+            return error
+        host.url = url
+    if 'timeout' in data:
+        try:
+            timeout = float(data['timeout']) if data['timeout'] not in (None, '') else None
+        except (TypeError, ValueError):
+            return "timeout must be a number of seconds."
+        if timeout is not None and timeout <= 0:
+            return "timeout must be positive."
+        host.timeout = timeout
+    for field in HOST_FLAG_FIELDS:
+        if field in data:
+            setattr(host, field, bool(data[field]))
+    for field in HOST_TEXT_FIELDS:
+        # PEMs are never sent back; omitting one keeps the stored value, an empty string clears it.
+        if field in data:
+            setattr(host, field, data[field] or None)
+    return None
+
+@docker_hosts_bp.route("/docker-hosts", methods=["GET"])
+@admin_required
+def list_docker_hosts():
+    hosts = DockerHost.query.order_by(DockerHost.id).all()
+    return jsonify([serialize_host(host) for host in hosts])
+
+@docker_hosts_bp.route("/docker-hosts", methods=["POST"])
+@admin_required
+def create_docker_host():
+    data = request.get_json() or {}
+    if not data.get('name') or not data.get('url'):
+        return jsonify({"error": "Name and URL are required."}), 400
+    host = DockerHost()
+    error = apply_host_fields(host, data)
+    if error: return jsonify({"error": error}), 400
+    db.session.add(host)
+    db.session.commit()
+    snapshot_cache.invalidate()
+    return jsonify(serialize_host(host)), 201
+
+@docker_hosts_bp.route("/docker-hosts/<int:host_id>", methods=["PUT"])
+@admin_required
+def update_docker_host(host_id):
+    host = DockerHost.query.get_or_404(host_id, description="Docker host not found")
+    error = apply_host_fields(host, request.get_json() or {})
+    if error: return jsonify({"error": error}), 400
+    db.session.commit()
+    docker_hosts.invalidate(host.id)
+    snapshot_cache.invalidate()
+    return jsonify(serialize_host(host))
+
+@docker_hosts_bp.route("/docker-hosts/<int:host_id>", methods=["DELETE"])
+@admin_required
+def delete_docker_host(host_id):
+    host = DockerHost.query.get_or_404(host_id, description="Docker host not found")
+    db.session.delete(host)
+    db.session.commit()
+    docker_hosts.invalidate(host_id, remove_certs=True)
+    snapshot_cache.invalidate()
+    return jsonify({"message": f"Docker host '{host.name}' removed."})
+
+@docker_hosts_bp.route("/docker-hosts/<int:host_id>/test", methods=["POST"])
+@admin_required
+def test_docker_host(host_id):
+    """Connects to the host and reports its Docker version, or why it can't be reached."""
+    host = DockerHost.query.get_or_404(host_id, description="Docker host not found")
+    try:
+        version = docker_hosts.get(host).version()
+    except Exception as e:
+        # Don't keep a client that may be stuck on a broken connection.
+        docker_hosts.invalidate(host.id)
+        return jsonify({"ok": False, "error": str(e)}), 502
+    return jsonify({
+        "ok": True,
+        "version": version.get('Version'),
+        "api_version": version.get('ApiVersion'),
+        "os": version.get('Os'),
+        "arch": version.get('Arch'),
+    })
@@ -2,36 +2,38 @@ from flask import Blueprint, jsonify, request, session, current_app
 from decorators import login_required
 from models import UserSetting
 from extensions import db
-from qbittorrentapi import Client
+from helpers.qbittorrent import qbittorrent_clients, TORRENT_FILTERS, TORRENT_SORT_FIELDS
 import json
-from urllib.parse import urlparse
 
 download_clients_bp = Blueprint('download_clients', __name__)
 
-def get_qbittorrent_client(user_id):
-    """Helper to get qBittorrent client instance from user settings."""
+DEFAULT_DOWNLOADS_LIMIT = 7
+MAX_DOWNLOADS_LIMIT = 500
+
+def load_qbittorrent_config(user_id):
+    """Helper to read and validate the user's qBittorrent settings."""
     setting = UserSetting.query.filter_by(user_id=user_id, key='downloadClientConfig').first()
     if not setting or not setting.value:
         return None, "qBittorrent settings not configured."
 
     try:
         config = json.loads(setting.value)
-        if config.get('type') != 'qbittorrent':
-            return None, "qBittorrent is not the selected download client."
-
-        qb_url = config.get('url')
-        qb_username = config.get('username')
-        qb_password = config.get('password')
-
-        if not qb_url:
-            return None, "qBittorrent URL is missing."
-
-        parsed_url = urlparse(qb_url)
-        qb = Client(host=parsed_url.hostname, port=parsed_url.port, username=qb_username, password=qb_password)
-        qb.auth_log_in()
-        return qb, None
     except json.JSONDecodeError:
         return None, "Invalid qBittorrent configuration format."
+    if config.get('type') != 'qbittorrent':
+        return None, "qBittorrent is not the selected download client."
+    if not config.get('url'):
+        return None, "qBittorrent URL is missing."
+    return config, None
+
+def get_qbittorrent_client(user_id):
+    """Helper to get the user's pooled qBittorrent client from their settings."""
+    config, error = load_qbittorrent_config(user_id)
+    if error:
+        return None, error
+
+    try:
+        return qbittorrent_clients.get(user_id, config), None
     except Exception as e:
         current_app.logger.error(f"Failed to initialize qBittorrent client: {e}")
         return None, f"Failed to connect to qBittorrent: {e}"
@@ -71,37 +73,62 @@ def set_download_client_settings():
         db.session.add(setting)
     
     db.session.commit()
+    qbittorrent_clients.invalidate(user_id)
     return jsonify({"message": "Download client settings saved successfully."})
 
 @download_clients_bp.route("/download-clients/qbittorrent/downloads", methods=["GET"])
 @login_required
 def get_qbittorrent_downloads():
+    """
+    Lists torrents from the user's cached torrent table. Defaults match the dashboard
+    widget (the 7 downloading torrents furthest along); ?filter=, ?search=, ?sort=,
+    ?order=asc|desc, ?offset= and ?limit= page through the rest. The total number of
+    matches is returned in the X-Total-Count header.
+    """
     user_id = session.get('user_id')
-    qb, error = get_qbittorrent_client(user_id)
+    config, error = load_qbittorrent_config(user_id)
     if error:
         return jsonify({"error": error}), 500
 
+    status_filter = request.args.get('filter', 'downloading')
+    if status_filter not in TORRENT_FILTERS:
+        return jsonify({"error": f"Invalid filter. Use one of: {', '.join(TORRENT_FILTERS)}."}), 400
+    sort = request.args.get('sort', 'progress')
+    if sort not in TORRENT_SORT_FIELDS:
+        return jsonify({"error": f"Invalid sort field. Use one of: {', '.join(TORRENT_SORT_FIELDS)}."}), 400
     try:
-        torrents = qb.torrents_info(status_filter='downloading') # Only get active downloads
-        
-        # Sort by progress (descending) and limit to 7
-        torrents.sort(key=lambda t: t.progress, reverse=True)
-        active_downloads = torrents[:7]
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = max(0, min(int(request.args.get('limit', DEFAULT_DOWNLOADS_LIMIT)), MAX_DOWNLOADS_LIMIT))
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers."}), 400
 
-        result = []
-        for t in active_downloads:
-            result.append({
-                "hash": t.hash,
-                "name": t.name,
-                "progress": round(t.progress * 100, 1), # Convert to percentage
-                "download_speed": t.dlspeed,
-                "upload_speed": t.upspeed,
-                "state": t.state,
-                "size": t.size,
-                "downloaded": t.downloaded,
-                "uploaded": t.uploaded,
-            })
-        return jsonify(result)
+    try:
+        table = qbittorrent_clients.torrent_table(user_id, config)
+        torrents, total = table.query(
+            status_filter=status_filter,
+            search=request.args.get('search'),
+            sort=sort,
+            reverse=request.args.get('order', 'desc') != 'asc',
+            offset=offset,
+            limit=limit,
+        )
     except Exception as e:
         current_app.logger.error(f"Failed to fetch qBittorrent downloads: {e}")
-        return jsonify({"error": f"Failed to fetch qBittorrent downloads: {e}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Failed to fetch qBittorrent downloads: {e}"}), 500
+
+    result = []
+    for t in torrents:
+        result.append({
+            "hash": t.get('hash'),
+            "name": t.get('name'),
+            "progress": round(t.get('progress', 0) * 100, 1), # Convert to percentage
+            "download_speed": t.get('dlspeed', 0),
+            "upload_speed": t.get('upspeed', 0),
+            "state": t.get('state'),
+            "size": t.get('size', 0),
+            "downloaded": t.get('downloaded', 0),
+            "uploaded": t.get('uploaded', 0),
+        })
+    response = jsonify(result)
+    response.headers['X-Total-Count'] = str(total)
+    return response
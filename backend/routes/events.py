@@ -0,0 +1,51 @@
+from flask import Blueprint, jsonify, request, session, Response, stream_with_context
+import json
+import queue
+from extensions import db
+from models import User
+from decorators import login_required
+from helpers.event_bus import event_bus
+
+events_bp = Blueprint('events', __name__)
+
+USER_TOPICS = {'system', 'network', 'notifications'}
+ADMIN_TOPICS = USER_TOPICS | {'containers'}
+HEARTBEAT_INTERVAL = 15
+
+@events_bp.route("/events", methods=["GET"])
+@login_required
+def stream_events():
+    """
+    Server-Sent Events channel pushing dashboard updates: system and network metrics
+    (only the fields that changed, network probes included), container state changes and
+    periodic container stats, and new notifications.
+    """
+    user_id = session.get('user_id')
+    user = User.query.get(user_id)
+    allowed_topics = ADMIN_TOPICS if user and user.role == 'admin' else USER_TOPICS
+    # The stream can stay open for hours; don't hold a pooled connection for all of it.
+    db.session.close()
+
+    requested = request.args.get('topics')
+    topics = set(requested.split(',')) if requested else allowed_topics
+    if not topics <= allowed_topics:
+        return jsonify({"error": f"Unknown or forbidden topics: {', '.join(sorted(topics - allowed_topics))}"}), 403
+
+    def generate():
+        subscription = event_bus.subscribe(topics, user_id=user_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    topic, data = subscription.queue.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {topic}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
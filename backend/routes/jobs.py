@@ -0,0 +1,65 @@
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+import os
+from extensions import db
+from models import DeployJob
+from decorators import admin_required
+from helpers.deploy_jobs import serialize_job, follow_job_log, job_log_path
+
+jobs_bp = Blueprint('jobs', __name__)
+
+def job_stream_response(job_id, offset=0):
+    """
+    Streams a job's log as text/plain and ends with the same success/error marker line
+    the stack deploy stream has always used.
+    """
+    def generate():
+        yield from follow_job_log(job_id, offset)
+        job = db.session.get(DeployJob, job_id)
+        if job and job.status == 'succeeded':
+            yield "\n[DOCKORA_STREAM_SUCCESS]Deployment finished successfully."
+        elif job and job.error:
+            yield f"\n[DOCKORA_STREAM_ERROR]An internal error occurred: {job.error}"
+        else:
+            yield f"\n[DOCKORA_STREAM_ERROR]Deployment failed with exit code {job.exit_code if job else 'unknown'}"
+
+    # follow_job_log only borrows a connection for each status poll, so release the one
+    # the request has been holding rather than keep it for the whole deployment.
+    db.session.close()
+    response = Response(stream_with_context(generate()), mimetype='text/plain')
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@jobs_bp.route("/jobs", methods=["GET"])
+@admin_required
+def list_jobs():
+    query = DeployJob.query
+    if request.args.get('stack'):
+        query = query.filter_by(stack_name=request.args['stack'])
+    try:
+        limit = min(int(request.args.get('limit', 50)), 500)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer."}), 400
+    jobs = query.order_by(DeployJob.created_at.desc()).limit(limit).all()
+    return jsonify([serialize_job(job) for job in jobs])
+
+@jobs_bp.route("/jobs/<job_id>", methods=["GET"])
+@admin_required
+def get_job(job_id):
+    job = DeployJob.query.get_or_404(job_id, description="Job not found")
+    return jsonify(serialize_job(job))
+
+@jobs_bp.route("/jobs/<job_id>/stream", methods=["GET"])
+@admin_required
+def stream_job(job_id):
+    """
+    Follows a job's log until the job finishes. Any number of clients can attach; a
+    client that lost its connection can pass ?offset=<bytes already received> to resume.
+    """
+    DeployJob.query.get_or_404(job_id, description="Job not found")
+    if not os.path.exists(job_log_path(job_id)):
+        return jsonify({"error": "Job log not found"}), 404
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({"error": "offset must be an integer."}), 400
+    return job_stream_response(job_id, offset)
@@ -83,4 +83,6 @@ def execute_ssh_command():
                 client.close()
                 yield "[DOCKORA_STREAM_INFO]SSH connection closed.\n"
 
+    # Commands can run for a long time; don't keep a pooled connection checked out meanwhile.
+    db.session.close()
     return Response(stream_with_context(generate_output()), mimetype='text/plain')
\ No newline at end of file
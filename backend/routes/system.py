@@ -1,29 +1,24 @@
 from flask import Blueprint, jsonify, request, session, current_app, Response, stream_with_context
-import psutil
 import requests
 import json
 import time
 import socket
 from urllib.parse import urlparse, urljoin
 from bs4 import BeautifulSoup
-from models import User, UserSetting, SystemSetting, NetworkUsage
+from models import User, UserSetting, SystemSetting, NetworkUsage, NetworkUsageMonthly
 from decorators import login_required, admin_required
 from extensions import db
-import subprocess
-import re
-from datetime import datetime, date, timedelta
+from helpers.snapshot_cache import snapshot_cache
+from helpers.network_probe import network_prober
+from helpers.network_sampler import network_sampler
+from helpers.system_sampler import system_sampler
+from datetime import date, timedelta
 from sqlalchemy import func
-import os
 import smtplib
 from email.mime.text import MIMEText
 
 system_bp = Blueprint('system', __name__)
 
-last_net_io = psutil.net_io_counters()
-last_time = time.time()
-session_upload_total = 0
-session_download_total = 0
-
 @system_bp.route("/system/url-metadata", methods=["GET"])
 @login_required
 def get_url_metadata():
@@ -96,168 +91,24 @@ def get_smtp_status():
 @system_bp.route("/system/stats", methods=["GET"])
 @login_required
 def system_stats():
-    memory_info = psutil.virtual_memory()
-    disk_info = psutil.disk_usage('/')
-    return jsonify({
-        "cpu_usage": psutil.cpu_percent(interval=1),
-        "memory_usage_percent": memory_info.percent,
-        "memory_total": memory_info.total,
-        "memory_used": memory_info.used,
-        "disk_usage_percent": disk_info.percent,
-        "disk_total": disk_info.total,
-        "disk_used": disk_info.used,
-    })
+    return jsonify(system_sampler.latest())
 
-@system_bp.route("/system/network-stats", methods=["GET"])
+@system_bp.route("/system/stats/history", methods=["GET"])
 @login_required
-def network_stats():
-    global last_net_io, last_time, session_upload_total, session_download_total
-
-    current_time = time.time()
-    current_net_io = psutil.net_io_counters()
-
-    elapsed_time = current_time - last_time
-    if elapsed_time == 0:
-        elapsed_time = 1
-
-    bytes_sent_interval = current_net_io.bytes_sent - last_net_io.bytes_sent
-    bytes_recv_interval = current_net_io.bytes_recv - last_net_io.bytes_recv
-
-    upload_speed = bytes_sent_interval / elapsed_time
-    download_speed = bytes_recv_interval / elapsed_time
-
-    last_net_io = current_net_io
-    last_time = current_time
-
-    session_upload_total += bytes_sent_interval
-    session_download_total += bytes_recv_interval
-
-    public_ip = "N/A"
-    local_ip = "N/A"
-    subnet_mask = "N/A"
-    gateway = "N/A"
-    dns_servers = []
-    connection_type = "unknown"
-    location = "N/A"
-    online_status = False
-    ping_latency = "N/A"
-    packet_loss = "N/A"
-    errors = []
-
-    try:
-        requests.get('http://www.google.com', timeout=1)
-        online_status = True
-    except requests.RequestException as e:
-        current_app.logger.warning(f"Online status check failed: {e}")
-        errors.append("No internet connection")
-        online_status = False
+def system_stats_history():
+    per_core = request.args.get('per_core', 'false').lower() == 'true'
+    return jsonify(system_sampler.history(per_core=per_core))
 
-    if online_status:
-        try:
-            geo_res = requests.get('http://ip-api.com/json/?fields=status,message,country,city,query', timeout=2)
-            geo_res.raise_for_status()
-            geo_data = geo_res.json()
-            if geo_data.get('status') == 'success':
-                public_ip = geo_data.get('query', 'N/A')
-                city = geo_data.get('city')
-                country = geo_data.get('country')
-                if city and country:
-                    location = f"{city}, {country}"
-            else:
-                errors.append(f"Public IP/location API returned status: {geo_data.get('status')}")
-        except requests.RequestException as e:
-            current_app.logger.warning(f"Public IP/location lookup failed: {e}")
-            errors.append(f"Public IP/location lookup failed: {e}")
-            try:
-                s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                s.connect(("8.8.8.8", 80))
-                public_ip = s.getsockname()[0]
-                s.close()
-            except Exception as e:
-                current_app.logger.warning(f"Local IP fallback failed: {e}")
-                errors.append(f"Local IP fallback failed: {e}")
-
-        try:
-            ping_output = subprocess.run(['ping', '-c', '4', '-W', '1', '8.8.8.8'], capture_output=True, text=True, check=True)
-            
-            latency_match = re.search(r'min/avg/max/mdev = [\d.]+/([\d.]+)/[\d.]+/[.\d]+ ms', ping_output.stdout)
-            if latency_match:
-                ping_latency = float(latency_match.group(1))
-            else:
-                errors.append("Ping latency not found in output.")
-
-            loss_match = re.search(r'(\d+)% packet loss', ping_output.stdout)
-            if loss_match:
-                packet_loss = float(loss_match.group(1))
-            else:
-                errors.append("Ping packet loss not found in output.")
-
-        except (subprocess.CalledProcessError, FileNotFoundError, AttributeError) as e:
-            current_app.logger.warning(f"Ping command failed or output not parsed: {e}")
-            errors.append(f"Ping command failed: {e}")
-            ping_latency = "N/A"
-            packet_loss = "N/A"
-        except Exception as e:
-            current_app.logger.error(f"Error during ping: {e}")
-            errors.append(f"Error during ping: {e}")
-            ping_latency = "N/A"
-            packet_loss = "N/A"
-    else:
-        public_ip = "N/A"
-        location = "N/A"
-        ping_latency = "N/A"
-        packet_loss = "N/A"
-
-    try:
-        stats_if = psutil.net_if_stats()
-        addrs = psutil.net_if_addrs()
-        active_interface = None
-        
-        for interface, addr_list in addrs.items():
-            if interface in stats_if and stats_if[interface].isup:
-                for addr in addr_list:
-                    if addr.family == socket.AF_INET and not addr.address.startswith("127."):
-                        active_interface = interface
-                        local_ip = addr.address
-                        subnet_mask = addr.netmask
-                        break
-            if active_interface:
-                break
-        
-        if active_interface:
-            if any(keyword in active_interface.lower() for keyword in ['wlan', 'wi-fi', 'wlp']):
-                connection_type = 'wifi'
-            elif any(keyword in active_interface.lower() for keyword in ['eth', 'enp', 'ethernet']):
-                connection_type = 'lan'
-            
-            try:
-                gateway_output = subprocess.run(['ip', 'route', 'show', 'default'], capture_output=True, text=True, check=True)
-                gateway_match = re.search(r'default via (\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', gateway_output.stdout)
-                if gateway_match:
-                    gateway = gateway_match.group(1)
-                else:
-                    errors.append("Gateway not found in 'ip route show default' output.")
-            except (subprocess.CalledProcessError, FileNotFoundError) as e:
-                current_app.logger.warning(f"Failed to get gateway via 'ip route': {e}")
-                errors.append(f"Failed to get gateway (ip route command failed).")
-            except Exception as e:
-                current_app.logger.warning(f"Failed to get gateway: {e}")
-                errors.append(f"Failed to get gateway: {e}")
+@system_bp.route("/system/cache-stats", methods=["GET"])
+@admin_required
+def cache_stats():
+    return jsonify({"snapshot": snapshot_cache.stats()})
 
-        if os.path.exists('/etc/resolv.conf'):
-            try:
-                with open('/etc/resolv.conf', 'r') as f:
-                    for line in f:
-                        if line.startswith('nameserver'):
-                            parts = line.split()
-                            if len(parts) > 1:
-                                dns_servers.append(parts[1])
-            except Exception as e:
-                current_app.logger.warning(f"Failed to read DNS servers from resolv.conf: {e}")
-                errors.append(f"Failed to read DNS servers: {e}")
-    except Exception as e:
-        current_app.logger.error(f"General network stats collection error: {e}")
-        errors.append(f"General network stats collection error: {e}")
+@system_bp.route("/system/network-stats", methods=["GET"])
+@login_required
+def network_stats():
+    rates = network_sampler.latest()
+    probes = network_prober.snapshot()
 
     user_id = session.get('user_id')
     today = date.today()
@@ -268,48 +119,82 @@ def network_stats():
 
     if user_id:
         daily_usage = NetworkUsage.query.filter_by(user_id=user_id, date=today).first()
-        if not daily_usage:
-            daily_usage = NetworkUsage(user_id=user_id, date=today)
-            db.session.add(daily_usage)
-        
-        daily_usage.uploaded_bytes = (daily_usage.uploaded_bytes or 0) + bytes_sent_interval
-        daily_usage.downloaded_bytes = (daily_usage.downloaded_bytes or 0) + bytes_recv_interval
-        db.session.commit()
-
-        daily_upload_total = daily_usage.uploaded_bytes
-        daily_download_total = daily_usage.downloaded_bytes
-
-        start_of_month = today.replace(day=1)
-        monthly_usage_records = NetworkUsage.query.filter(
-            NetworkUsage.user_id == user_id,
-            NetworkUsage.date >= start_of_month,
-            NetworkUsage.date <= today
-        ).all()
+        if daily_usage:
+            daily_upload_total = daily_usage.uploaded_bytes
+            daily_download_total = daily_usage.downloaded_bytes
 
-        for record in monthly_usage_records:
-            monthly_upload_total += record.uploaded_bytes
-            monthly_download_total += record.downloaded_bytes
+        monthly_usage = NetworkUsageMonthly.query.filter_by(user_id=user_id, month=today.replace(day=1)).first()
+        if monthly_usage:
+            monthly_upload_total = monthly_usage.uploaded_bytes
+            monthly_download_total = monthly_usage.downloaded_bytes
 
     return jsonify({
-        "upload_speed": upload_speed,
-        "download_speed": download_speed,
-        "public_ip": public_ip,
-        "local_ip": local_ip,
-        "subnet_mask": subnet_mask,
-        "gateway": gateway,
-        "dns_servers": dns_servers,
-        "connection_type": connection_type,
-        "location": location,
-        "online_status": online_status,
-        "ping_latency": ping_latency,
-        "packet_loss": packet_loss,
-        "session_upload_total": session_upload_total,
-        "session_download_total": session_download_total,
+        "upload_speed": rates["upload_speed"],
+        "download_speed": rates["download_speed"],
+        "public_ip": probes["public_ip"],
+        "local_ip": probes["local_ip"],
+        "subnet_mask": probes["subnet_mask"],
+        "gateway": probes["gateway"],
+        "dns_servers": probes["dns_servers"],
+        "connection_type": probes["connection_type"],
+        "location": probes["location"],
+        "online_status": probes["online_status"],
+        "ping_latency": probes["ping_latency"],
+        "packet_loss": probes["packet_loss"],
+        "session_upload_total": network_sampler.session_upload_total,
+        "session_download_total": network_sampler.session_download_total,
         "daily_upload_total": daily_upload_total,
         "daily_download_total": daily_download_total,
         "monthly_upload_total": monthly_upload_total,
         "monthly_download_total": monthly_download_total,
-        "errors": errors
+        "errors": probes["errors"]
+    })
+
+@system_bp.route("/system/network-stats/history", methods=["GET"])
+@login_required
+def network_stats_history():
+    interface = request.args.get('interface')
+    history = network_sampler.history(interface)
+    if history is None:
+        return jsonify({"error": f"Unknown network interface '{interface}'."}), 404
+    return jsonify(history)
+
+@system_bp.route("/system/network-usage", methods=["GET"])
+@login_required
+def network_usage_history():
+    user_id = session.get('user_id')
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ('day', 'month'):
+        return jsonify({"error": "granularity must be 'day' or 'month'."}), 400
+
+    today = date.today()
+    default_from = today - timedelta(days=29) if granularity == 'day' else date(today.year - 1, today.month, 1)
+    try:
+        date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else default_from
+        date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else today
+    except ValueError:
+        return jsonify({"error": "from and to must be dates in YYYY-MM-DD format."}), 400
+
+    # Long ranges are served from the monthly rollups rather than by scanning daily rows.
+    if granularity == 'month':
+        model, period_column = NetworkUsageMonthly, NetworkUsageMonthly.month
+        date_from = date_from.replace(day=1)
+    else:
+        model, period_column = NetworkUsage, NetworkUsage.date
+
+    rows = db.session.query(period_column, model.uploaded_bytes, model.downloaded_bytes).filter(
+        model.user_id == user_id,
+        period_column >= date_from,
+        period_column <= date_to
+    ).order_by(period_column).all()
+
+    return jsonify({
+        "granularity": granularity,
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "usage": [{"period": period.isoformat(), "uploaded_bytes": uploaded, "downloaded_bytes": downloaded} for period, uploaded, downloaded in rows],
+        "uploaded_bytes": sum(row[1] for row in rows),
+        "downloaded_bytes": sum(row[2] for row in rows),
     })
 
 @system_bp.route("/system/smtp-settings", methods=["GET"])
@@ -0,0 +1,46 @@
+import pytest
+from flask import Flask
+from extensions import db
+from models import User
+from tests.fake_docker import FakeDockerServer
+
+@pytest.fixture
+def fake_docker():
+    """Starts fake Docker API servers on demand: fake_docker(delay=0) -> FakeDockerServer."""
+    servers = []
+
+    def start(delay=0):
+        server = FakeDockerServer(delay=delay).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+@pytest.fixture
+def app():
+    """A bare app on an in-memory database; tests register the blueprints they exercise."""
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='test',
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        TESTING=True,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_client(app):
+    admin = User(username='admin', password='admin', role='admin')
+    db.session.add(admin)
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = admin.id
+    return client
@@ -0,0 +1,68 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+class FakeDockerServer:
+    """
+    A minimal Docker Engine API over plain HTTP, enough to point a real docker-py client
+    at. Responses are registered per method and path pattern (without the /v1.xx prefix);
+    `delay` makes every answer slow, to simulate a host that hangs.
+    """
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.routes = []
+        self.requests = []
+        self.route('GET', r'/version', {"ApiVersion": "1.41", "Version": "24.0.7", "Os": "linux", "Arch": "amd64"})
+        self.route('GET', r'/_ping', "OK")
+
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def do_POST(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"tcp://127.0.0.1:{self._httpd.server_port}"
+
+    def route(self, method, pattern, body, status=200):
+        """`body` is JSON-serializable, or a callable taking the path's regex match."""
+        self.routes.insert(0, (method, re.compile(pattern), body, status))
+
+    def _handle(self, handler):
+        path = re.sub(r'^/v[\d.]+', '', unquote(urlsplit(handler.path).path))
+        self.requests.append((handler.command, path))
+        if self.delay:
+            time.sleep(self.delay)
+        for method, pattern, body, status in self.routes:
+            match = pattern.fullmatch(path)
+            if method == handler.command and match:
+                payload = json.dumps(body(match) if callable(body) else body).encode('utf-8')
+                break
+        else:
+            status, payload = 404, json.dumps({"message": f"no such route: {path}"}).encode('utf-8')
+        try:
+            handler.send_response(status)
+            handler.send_header('Content-Type', 'application/json')
+            handler.send_header('Content-Length', str(len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+        except OSError:
+            # The client gave up waiting (e.g. the slow-host tests).
+            pass
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+import pytest
+import helpers.deploy_jobs as deploy_jobs_module
+from extensions import db
+from models import DeployJob
+from helpers.deploy_jobs import job_log_path, purge_old_jobs
+
+@pytest.fixture
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(deploy_jobs_module, 'DEPLOY_JOBS_DIR', str(tmp_path))
+    return tmp_path
+
+def add_job(status, finished_days_ago=None):
+    finished_at = datetime.utcnow() - timedelta(days=finished_days_ago) if finished_days_ago is not None else None
+    job = DeployJob(stack_name='web', status=status, finished_at=finished_at)
+    db.session.add(job)
+    db.session.commit()
+    with open(job_log_path(job.id), 'w') as log:
+        log.write("compose output\n")
+    return job.id
+
+def test_only_jobs_finished_before_the_retention_window_are_purged(app, jobs_dir):
+    expired = [add_job('succeeded', 30), add_job('failed', 15)]
+    recent = add_job('succeeded', 1)
+    running = add_job('running')
+
+    assert purge_old_jobs(retention_days=14) == 2
+
+    remaining = {job.id for job in DeployJob.query.all()}
+    assert remaining == {recent, running}
+    assert sorted(p.name for p in jobs_dir.iterdir()) == sorted(f"{job_id}.log" for job_id in (recent, running))
+    assert not any((jobs_dir / f"{job_id}.log").exists() for job_id in expired)
+
+def test_purge_tolerates_missing_logs(app, jobs_dir):
+    job_id = add_job('failed', 30)
+    (jobs_dir / f"{job_id}.log").unlink()
+
+    assert purge_old_jobs(retention_days=14) == 1
+    assert DeployJob.query.count() == 0
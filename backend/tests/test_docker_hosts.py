@@ -0,0 +1,125 @@
+import json
+import socket
+import time
+import docker
+import pytest
+import routes.containers as containers_module
+from extensions import db
+from models import DockerHost
+from helpers.docker_hosts import DockerHostRegistry, HOST_ERRORS_HEADER, LOCAL_HOST
+from helpers.snapshot_cache import snapshot_cache
+
+def unused_url():
+    """A tcp:// URL nothing listens on, so connecting is refused right away."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return f"tcp://127.0.0.1:{port}"
+
+def add_host(name, url, timeout=None):
+    host = DockerHost(name=name, url=url, timeout=timeout)
+    db.session.add(host)
+    db.session.commit()
+    return host
+
+def serve_container(server, container_id, name):
+    image_id = "sha256:" + "f" * 64
+    server.route('GET', r'/containers/json', [{"Id": container_id, "Names": [f"/{name}"]}])
+    server.route('GET', rf'/containers/{container_id}/json', {
+        "Id": container_id,
+        "Name": f"/{name}",
+        "Image": image_id,
+        "State": {"Status": "running"},
+        "Config": {"Labels": {}},
+        "HostConfig": {"NanoCpus": 0, "Memory": 0},
+        "NetworkSettings": {"Ports": {"80/tcp": [{"HostIp": "0.0.0.0", "HostPort": "8080"}]}},
+    })
+    # docker-py looks images up by the bare hex id.
+    server.route('GET', r'/images/(sha256:)?f+/json', {"Id": image_id, "RepoTags": ["nginx:latest"]})
+
+@pytest.fixture(autouse=True)
+def containers_api(app):
+    app.register_blueprint(containers_module.containers_bp, url_prefix='/api')
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = DockerHostRegistry(max_workers=4)
+    monkeypatch.setattr(containers_module, 'docker_hosts', registry)
+    snapshot_cache.invalidate()
+    return registry
+
+def test_fan_out_reports_failed_and_slow_hosts_separately(app, fake_docker, registry):
+    healthy = fake_docker()
+    hanging = fake_docker(delay=3)
+    add_host('healthy', healthy.url)
+    add_host('down', unused_url())
+    add_host('hanging', hanging.url, timeout=0.5)
+
+    started = time.monotonic()
+    results, errors = registry.fan_out(
+        lambda: ['local answer'],
+        lambda host, host_client: [host_client.version()['Version']],
+    )
+    elapsed = time.monotonic() - started
+
+    assert results == {LOCAL_HOST: ['local answer'], 'healthy': ['24.0.7']}
+    assert set(errors) == {'down', 'hanging'}
+    assert errors['hanging'] == "No answer within 0.5s."
+    # The hanging host only costs its own timeout, not the 3s it takes to answer.
+    assert elapsed < 2
+
+def test_fan_out_without_remote_hosts_lets_local_errors_through(app, registry):
+    def fail():
+        raise docker.errors.APIError("daemon unavailable")
+
+    with pytest.raises(docker.errors.APIError):
+        registry.fan_out(fail, lambda host, host_client: [])
+
+def test_container_list_is_merged_and_tagged_by_host(app, admin_client, fake_docker, registry, monkeypatch):
+    local, remote = fake_docker(), fake_docker()
+    serve_container(local, "a" * 64, "local-web")
+    serve_container(remote, "b" * 64, "remote-web")
+    monkeypatch.setattr(containers_module, 'client', docker.DockerClient(base_url=local.url, version='1.41', timeout=5))
+    add_host('remote', remote.url)
+    add_host('down', unused_url())
+
+    response = admin_client.get('/api/containers?stats=false')
+
+    assert response.status_code == 200
+    containers = {c["name"]: c for c in response.get_json()}
+    assert containers["local-web"]["host"] == LOCAL_HOST
+    assert containers["remote-web"]["host"] == 'remote'
+    assert containers["remote-web"]["ports"] == ["0.0.0.0:8080->80/tcp"]
+    assert set(json.loads(response.headers[HOST_ERRORS_HEADER])) == {'down'}
+
+def test_container_list_has_no_error_header_when_all_hosts_answer(app, admin_client, fake_docker, registry, monkeypatch):
+    local, remote = fake_docker(), fake_docker()
+    serve_container(local, "a" * 64, "local-web")
+    serve_container(remote, "b" * 64, "remote-web")
+    monkeypatch.setattr(containers_module, 'client', docker.DockerClient(base_url=local.url, version='1.41', timeout=5))
+    add_host('remote', remote.url)
+
+    response = admin_client.get('/api/containers?stats=false')
+
+    assert [c["host"] for c in response.get_json()] == [LOCAL_HOST, 'remote']
+    assert HOST_ERRORS_HEADER not in response.headers
+
+def test_actions_on_a_remote_container_go_to_its_host(app, admin_client, fake_docker, registry, monkeypatch):
+    local, remote = fake_docker(), fake_docker()
+    container_id = "b" * 64
+    serve_container(remote, container_id, "remote-web")
+    remote.route('POST', rf'/containers/{container_id}/stop', {})
+    monkeypatch.setattr(containers_module, 'client', docker.DockerClient(base_url=local.url, version='1.41', timeout=5))
+    add_host('remote', remote.url)
+
+    response = admin_client.post(f'/api/containers/{container_id}/stop?host=remote')
+
+    assert response.status_code == 200
+    assert ('POST', f'/containers/{container_id}/stop') in remote.requests
+    assert not any(method == 'POST' for method, _ in local.requests)
+
+def test_actions_on_an_unknown_host_are_rejected(app, admin_client, registry):
+    response = admin_client.post(f'/api/containers/{"b" * 64}/stop?host=gone')
+
+    assert response.status_code == 404
+    assert response.get_json()["error"] == "Unknown Docker host 'gone'"
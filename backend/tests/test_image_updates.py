@@ -0,0 +1,64 @@
+import docker
+import pytest
+import helpers.image_service as image_service_module
+from helpers.image_service import ImageService
+
+RUNNING_ID = "sha256:" + "1" * 64
+NEWER_ID = "sha256:" + "2" * 64
+LOCAL_DIGEST = "sha256:" + "a" * 64
+REMOTE_DIGEST = "sha256:" + "b" * 64
+
+@pytest.fixture
+def registry(fake_docker, monkeypatch):
+    """A Docker API whose registry lookups (/distribution) answer with a configurable digest."""
+    server = fake_docker()
+    server.route('GET', r'/images/sha256:1+/json', {"Id": RUNNING_ID, "RepoDigests": [f"nginx@{LOCAL_DIGEST}"]})
+    server.route('GET', r'/images/nginx:latest/json', {"Id": RUNNING_ID, "RepoDigests": [f"nginx@{LOCAL_DIGEST}"]})
+    monkeypatch.setattr(image_service_module, 'client', docker.DockerClient(base_url=server.url, version='1.41', timeout=5))
+    return server
+
+def set_remote_digest(server, digest):
+    server.route('GET', r'/distribution/nginx:latest/json', {
+        "Descriptor": {"mediaType": "application/vnd.oci.image.index.v1+json", "digest": digest, "size": 1000},
+        "Platforms": [{"architecture": "amd64", "os": "linux"}],
+    })
+
+def test_image_matching_registry_digest_is_up_to_date(registry):
+    set_remote_digest(registry, LOCAL_DIGEST)
+
+    result = ImageService()._check_image('nginx:latest', {RUNNING_ID})
+
+    assert result["error"] is None
+    assert result["remote_digest"] == LOCAL_DIGEST
+    assert result["update_available"] is False
+    assert result["pulled"] is False
+
+def test_newer_registry_digest_is_an_update(registry):
+    set_remote_digest(registry, REMOTE_DIGEST)
+
+    result = ImageService()._check_image('nginx:latest', {RUNNING_ID})
+
+    assert result["error"] is None
+    assert result["remote_digest"] == REMOTE_DIGEST
+    assert result["update_available"] is True
+    # The tag still points at the running image, so nothing newer has been pulled yet.
+    assert result["pulled"] is False
+    # Only the manifest is looked up; no layers are pulled.
+    assert ('POST', '/images/create') not in registry.requests
+
+def test_update_already_pulled_is_flagged(registry):
+    set_remote_digest(registry, REMOTE_DIGEST)
+    registry.route('GET', r'/images/nginx:latest/json', {"Id": NEWER_ID, "RepoDigests": [f"nginx@{REMOTE_DIGEST}"]})
+
+    result = ImageService()._check_image('nginx:latest', {RUNNING_ID})
+
+    assert result["update_available"] is True
+    assert result["pulled"] is True
+
+def test_locally_built_image_is_not_compared(registry):
+    registry.route('GET', r'/images/sha256:1+/json', {"Id": RUNNING_ID, "RepoDigests": []})
+
+    result = ImageService()._check_image('nginx:latest', {RUNNING_ID})
+
+    assert result["update_available"] is None
+    assert "never pulled" in result["error"]
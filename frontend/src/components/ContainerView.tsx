@@ -14,6 +14,7 @@ const ContainerView = ({ onCreateStack }) => {
     setFilter,
     isLoading,
     actionLoadingStates,
+    setActionLoadingStates,
     fetchContainers,
     handleAction,
   } = useContainerManagement(); // Use the new hook
@@ -26,7 +27,7 @@ const ContainerView = ({ onCreateStack }) => {
   const handleViewLogs = async (container) => {
     setActionLoadingStates(prev => ({ ...prev, [container.id]: true }));
     try {
-      const res = await getContainerLogs(container.id);
+      const res = await getContainerLogs(container.id, container.host);
       setLogs(res.data.logs);
       setSelectedContainer(container);
     } catch (err) {
@@ -16,9 +16,9 @@ const ImageView = () => {
     }
   }, []);
 
-  const handleRemove = async (id) => {
+  const handleRemove = async (id, host) => {
     try {
-      await removeImage(id);
+      await removeImage(id, host);
       fetchImages();
       toast.success("Image removed.");
     } catch (err) {
@@ -58,13 +58,13 @@ const ImageView = () => {
             {images.length > 0 ? images.map((img) => {
               const isSystemImage = img.tags && img.tags.some(tag => tag.includes('dockora') || tag.includes('postgres'));
               return (
-                <tr key={img.id} className="transition-colors duration-300 hover:shadow-neo-inset">
+                <tr key={`${img.host}-${img.id}`} className="transition-colors duration-300 hover:shadow-neo-inset">
                   <td className="p-4 text-sm break-all text-gray-200">{(img.tags && img.tags.length > 0) ? img.tags.join(', ') : '<none>'}</td>
                   <td className="p-4 font-mono text-xs text-gray-300">{img.id}</td>
                   <td className="p-4 text-sm text-gray-200">{formatSize(img.size)}</td>
                   <td className="p-4 text-right">
                     <button 
-                      onClick={() => handleRemove(img.id)} 
+                      onClick={() => handleRemove(img.id, img.host)} 
                       disabled={isSystemImage}
                       title={isSystemImage ? "This is a system image and cannot be deleted." : "Remove Image"}
                       className={`${iconButtonStyles} text-red-500`}
@@ -87,7 +87,7 @@ const ImageView = () => {
           {images.length > 0 ? images.map((img) => {
             const isSystemImage = img.tags && img.tags.some(tag => tag.includes('dockora') || tag.includes('postgres'));
             return (
-              <div key={img.id} className={`p-4 my-2 rounded-lg ${panelClasses}`}>
+              <div key={`${img.host}-${img.id}`} className={`p-4 my-2 rounded-lg ${panelClasses}`}>
                 <div className="flex justify-between items-start">
                   <div className="flex-1 min-w-0">
                     <div className="flex items-center gap-2 text-sm font-semibold text-gray-200 truncate">
@@ -96,7 +96,7 @@ const ImageView = () => {
                     </div>
                   </div>
                   <button 
-                    onClick={() => handleRemove(img.id)} 
+                    onClick={() => handleRemove(img.id, img.host)} 
                     disabled={isSystemImage}
                     title={isSystemImage ? "This is a system image and cannot be deleted." : "Remove Image"}
                     className={`ml-4 ${iconButtonStyles} text-red-500`}
@@ -67,7 +67,7 @@ const EditContainerModal = ({ container, onClose, onSuccess }) => {
         ports: validPorts,
         cpu_limit: cpuLimit, // Pass new CPU limit
         memory_limit: memoryLimit // Pass new Memory limit
-      });
+      }, container.host);
       onSuccess();
     } catch (err)      {
       setError(err.response?.data?.error || "Failed to update container resources.");
@@ -54,7 +54,7 @@ const EditContainerResourcesModal = ({ container, onClose, onSuccess }) => {
         ports: validPorts,
         cpu_limit: cpuLimit,
         memory_limit: memoryLimit
-      });
+      }, container.host);
       onSuccess();
     } catch (err) {
       setError(err.response?.data?.error || "Failed to update container resources.");
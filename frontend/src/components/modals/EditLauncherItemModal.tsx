@@ -37,7 +37,7 @@ const EditLauncherItemModal = ({ item, onClose, onSaveApp, onSaveBookmark }) =>
       } else {
         // Handle renaming if name changed
         if (name !== item.app.name) {
-          await renameContainer(item.app.id, name);
+          await renameContainer(item.app.id, name, item.app.host);
         }
         // Custom icon URL for apps is no longer supported, so no setting update needed here
         onSaveApp();
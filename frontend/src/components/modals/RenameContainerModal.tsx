@@ -16,7 +16,7 @@ const RenameContainerModal = ({ container, onClose, onSuccess }) => {
     setError("");
     setIsLoading(true);
     try {
-      await renameContainer(container.id, newName);
+      await renameContainer(container.id, newName, container.host);
       onSuccess();
       onClose();
     } catch (err) {
@@ -37,6 +37,8 @@ const AppContextMenu = ({ x, y, item, onShare, onAction, onEdit, onDelete }) =>
   const isRunning = status.includes('running') || status.includes('up');
   const isPaused = status.includes('paused');
   const isStopped = !isRunning && !isPaused;
+  // Sharing works on the apps synced from this server's daemon, not on other Docker hosts' apps.
+  const isShareable = !isBookmark && (!app.host || app.host === 'local');
 
   const handleAction = (action) => {
     onAction(app.id, action);
@@ -94,12 +96,14 @@ const AppContextMenu = ({ x, y, item, onShare, onAction, onEdit, onDelete }) =>
                 </button>
               </li>
             )}
-            <li>
-              <button onClick={onShare} className="w-full flex items-center gap-2 px-3 py-2 text-sm text-gray-200 hover:bg-blue-500/10 rounded-md">
-                <Share2 size={16} />
-                <span>Share...</span>
-              </button>
-            </li>
+            {isShareable && (
+              <li>
+                <button onClick={onShare} className="w-full flex items-center gap-2 px-3 py-2 text-sm text-gray-200 hover:bg-blue-500/10 rounded-md">
+                  <Share2 size={16} />
+                  <span>Share...</span>
+                </button>
+              </li>
+            )}
           </>
         )}
         <li>
@@ -145,7 +145,7 @@ const AppLauncherWidget = ({ isInteracting, isLocked = false }) => {
     ));
 
     try {
-        await manageContainer(appId, action);
+        await manageContainer(appId, action, originalApp.host);
         toast.success(`'${action}' command sent. Verifying status...`, { id: toastId });
         setTimeout(() => fetchApps(), 2000); // Refresh after a delay
     } catch (err) {
@@ -154,10 +154,10 @@ const AppLauncherWidget = ({ isInteracting, isLocked = false }) => {
     }
   };
 
-  const handleDeleteApp = async (appId, appName) => {
+  const handleDeleteApp = async (appId, appName, host) => {
     const toastId = toast.loading(`Deleting application "${appName}"...`);
     try {
-      await manageContainer(appId, 'remove');
+      await manageContainer(appId, 'remove', host);
       toast.success(`Application "${appName}" deleted successfully.`, { id: toastId });
       fetchApps();
     } catch (err) {
@@ -333,7 +333,7 @@ const AppLauncherWidget = ({ isInteracting, isLocked = false }) => {
           onEdit={() => { setItemToEdit(contextMenu.item); setContextMenu(null); }}
           onDelete={() => {
             if (contextMenu.item.type === 'app') {
-              handleDeleteApp(contextMenu.item.app.id, contextMenu.item.app.name);
+              handleDeleteApp(contextMenu.item.app.id, contextMenu.item.app.name, contextMenu.item.app.host);
             } else {
               handleDeleteBookmark(contextMenu.item.app.id);
             }
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Wifi, Server, Globe, ArrowDown, ArrowUp, Loader, MapPin, Signal, WifiOff, Zap } from 'lucide-react';
-import { getNetworkStats } from '../../services/api';
+import { subscribeToEvents } from '../../services/api';
 import { Line } from 'react-chartjs-2';
 import {
   Chart as ChartJS,
@@ -74,28 +74,24 @@ const NetworkingWidget = () => {
   const [isLoading, setIsLoading] = useState(true);
 
   useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const res = await getNetworkStats();
-        setStats(res.data);
+    // The server sends the full state (rates and probe results) on subscribe, then only the changed fields.
+    let latest = {};
+    return subscribeToEvents({
+      network: (data) => {
+        latest = { ...latest, ...data };
+        setStats(latest);
+        setIsLoading(false);
+        if (!('upload_speed' in data) && !('download_speed' in data)) return;
         setHistory(prev => {
           const now = new Date();
           const newLabels = [...prev.labels.slice(1), now.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit', second: '2-digit' })];
-          const newUpload = [...prev.upload.slice(1), (res.data.upload_speed * 8) / 1000000]; // in Mbps
-          const newDownload = [...prev.download.slice(1), (res.data.download_speed * 8) / 1000000]; // in Mbps
+          const newUpload = [...prev.upload.slice(1), (latest.upload_speed * 8) / 1000000]; // in Mbps
+          const newDownload = [...prev.download.slice(1), (latest.download_speed * 8) / 1000000]; // in Mbps
           return { labels: newLabels, upload: newUpload, download: newDownload };
         });
-      } catch (error) {
-        console.error("Failed to fetch network stats:", error);
-      } finally {
-        if (isLoading) setIsLoading(false);
-      }
-    };
-
-    fetchData();
-    const interval = setInterval(fetchData, 2000);
-    return () => clearInterval(interval);
-  }, [isLoading]);
+      },
+    });
+  }, []);
 
   const chartData = {
     labels: history.labels,
@@ -35,6 +35,8 @@ const SystemLogsWidget = () => {
   const logContainerRef = useRef(null);
   const abortControllerRef = useRef(null);
 
+  const selectedHost = availableContainers.find(c => c.id === selectedContainerId)?.host;
+
   const systemLogsWidgetConfig = settings.systemLogsWidgetConfig ? JSON.parse(settings.systemLogsWidgetConfig) : {};
 
   const fetchContainers = useCallback(async () => {
@@ -84,7 +86,7 @@ const SystemLogsWidget = () => {
           if (logContainerRef.current) {
             logContainerRef.current.scrollTop = logContainerRef.current.scrollHeight;
           }
-        });
+        }, selectedHost);
       } catch (err) {
         if (signal.aborted) return;
         const errorMessage = err.message || "Failed to stream logs.";
@@ -106,7 +108,7 @@ const SystemLogsWidget = () => {
         abortControllerRef.current.abort();
       }
     };
-  }, [selectedContainerId]);
+  }, [selectedContainerId, selectedHost]);
 
   const handleContainerChange = async (e) => {
     const newContainerId = e.target.value;
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Cpu, MemoryStick, HardDrive, Loader } from 'lucide-react';
-import { getSystemStats } from '../../services/api';
+import { subscribeToEvents } from '../../services/api';
 import LoadingSpinner from '../LoadingSpinner';
 
 const StatCircle = ({ percentage, label }) => {
@@ -50,18 +50,10 @@ const SystemUsageWidget = ({ isInteracting }) => {
     // Only fetch stats if not interacting
     if (isInteracting) return; 
 
-    const fetchStats = async () => {
-      try {
-        const res = await getSystemStats();
-        setStats(res.data);
-      } catch (error) {
-        console.error("Failed to fetch system stats:", error);
-      }
-    };
-
-    fetchStats();
-    const interval = setInterval(fetchStats, 3000);
-    return () => clearInterval(interval);
+    // The server sends the full current state on subscribe, then only the changed fields.
+    return subscribeToEvents({
+      system: (data) => setStats((prev) => ({ ...prev, ...data })),
+    });
   }, [isInteracting]);
 
   if (isInteracting) {
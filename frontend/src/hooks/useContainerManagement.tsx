@@ -1,7 +1,7 @@
 "use client";
 
 import { useState, useEffect, useCallback } from 'react';
-import { getContainers, manageContainer } from '../services/api';
+import { getContainers, manageContainer, subscribeToEvents } from '../services/api';
 import toast from 'react-hot-toast';
 
 const useContainerManagement = () => {
@@ -14,15 +14,13 @@ const useContainerManagement = () => {
     try {
       const res = await getContainers();
       // Only update state if the data has actually changed
-      if (JSON.stringify(res.data) !== JSON.stringify(containers)) {
-        setContainers(res.data);
-      }
+      setContainers(prev => JSON.stringify(res.data) !== JSON.stringify(prev) ? res.data : prev);
     } catch (err) {
       console.error("Error fetching containers:", err);
     } finally {
       setIsLoading(false);
     }
-  }, [containers]);
+  }, []);
 
   const handleAction = async (id, act) => {
     setActionLoadingStates(prev => ({ ...prev, [id]: true }));
@@ -33,7 +31,6 @@ const useContainerManagement = () => {
       setActionLoadingStates(prev => { const newState = { ...prev }; delete newState[id]; return newState; });
       return;
     }
-    const originalStatus = originalContainer.status;
 
     const getOptimisticStatus = (action) => {
       if (action === 'start' || action === 'unpause' || action === 'restart') return 'running (optimistic)';
@@ -44,34 +41,11 @@ const useContainerManagement = () => {
     setContainers(prev => prev.map(c => c.id === id ? { ...c, status: getOptimisticStatus(act) } : c));
 
     try {
-        await manageContainer(id, act);
-        toast.success(`'${act}' command sent. Verifying status...`, { id: toastId });
-
-        let attempts = 0;
-        const maxAttempts = 10;
-        const pollInterval = 1000;
-
-        const poll = setInterval(async () => {
-            attempts++;
-            try {
-                const res = await getContainers();
-                const updatedContainer = res.data.find(c => c.id === id);
-                if (updatedContainer && updatedContainer.status !== originalStatus) {
-                    clearInterval(poll);
-                    toast.success(`Status for ${updatedContainer.name} updated.`, { id: toastId });
-                    setContainers(res.data);
-                    setActionLoadingStates(prev => { const newState = { ...prev }; delete newState[id]; return newState; });
-                } else if (attempts >= maxAttempts) {
-                    clearInterval(poll);
-                    toast.warn(`Could not verify status change for ${originalContainer.name}. Refreshing list.`, { id: toastId });
-                    fetchContainers();
-                    setActionLoadingStates(prev => { const newState = { ...prev }; delete newState[id]; return newState; });
-                }
-            } catch (pollErr) {
-                // Ignore poll errors
-            }
-        }, pollInterval);
-
+        // The action has completed when this returns, so one refetch shows the new status.
+        await manageContainer(id, act, originalContainer.host);
+        await fetchContainers();
+        toast.success(`'${act}' done for ${originalContainer.name}.`, { id: toastId });
+        setActionLoadingStates(prev => { const newState = { ...prev }; delete newState[id]; return newState; });
     } catch (err) {
         toast.error(err.response?.data?.error || `Failed to send '${act}' command.`, { id: toastId });
         fetchContainers();
@@ -80,13 +54,25 @@ const useContainerManagement = () => {
   };
 
   useEffect(() => {
-    const initialFetch = async () => {
-      await fetchContainers();
-    };
-    initialFetch();
+    fetchContainers();
 
-    const interval = setInterval(fetchContainers, 5000);
-    return () => clearInterval(interval);
+    // Docker events are pushed as they happen; a burst of them (e.g. a stack starting) causes a
+    // single refetch. Stats of local containers arrive on the same topic every few seconds.
+    let refetchTimer = null;
+    const unsubscribe = subscribeToEvents({
+      containers: (event) => {
+        if (event.action === 'stats') {
+          setContainers(prev => prev.map(c => c.host === 'local' && event.stats[c.id] ? { ...c, stats: event.stats[c.id] } : c));
+          return;
+        }
+        clearTimeout(refetchTimer);
+        refetchTimer = setTimeout(fetchContainers, 500);
+      },
+    });
+    return () => {
+      clearTimeout(refetchTimer);
+      unsubscribe();
+    };
   }, [fetchContainers]);
 
   return {
@@ -96,6 +82,7 @@ const useContainerManagement = () => {
     setFilter,
     isLoading,
     actionLoadingStates,
+    setActionLoadingStates,
     fetchContainers,
     handleAction,
   };
@@ -1,5 +1,5 @@
 import { useState, useEffect, createContext, useContext, useCallback } from 'react';
-import { getNotifications as apiGetNotifications, markNotificationsRead as apiMarkNotificationsRead, clearAllNotifications as apiClearAllNotifications } from '../services/api';
+import { getNotifications as apiGetNotifications, markNotificationsRead as apiMarkNotificationsRead, clearAllNotifications as apiClearAllNotifications, subscribeToEvents } from '../services/api';
 import { useAuth } from './useAuth';
 
 const NotificationsContext = createContext(null);
@@ -17,7 +17,10 @@ export const NotificationsProvider = ({ children }) => {
     }
     try {
       const res = await apiGetNotifications();
-      setNotifications(res.data || []);
+      const fetched = res.data || [];
+      const newestFetched = Math.max(0, ...fetched.map(n => n.id));
+      // Keep notifications pushed while the request was in flight.
+      setNotifications(prev => [...prev.filter(n => n.id > newestFetched), ...fetched]);
     } catch (error) {
       console.error("Failed to fetch notifications", error);
       setNotifications([]);
@@ -28,9 +31,14 @@ export const NotificationsProvider = ({ children }) => {
 
   useEffect(() => {
     fetchNotifications();
-    const interval = setInterval(fetchNotifications, 10000); // Poll every 10 seconds
-    return () => clearInterval(interval);
-  }, [fetchNotifications]);
+    if (!isLoggedIn) return;
+    // New notifications are pushed as they are created, so the list is only fetched once.
+    return subscribeToEvents({
+      notifications: (notification) => setNotifications(prev =>
+        prev.some(n => n.id === notification.id) ? prev : [notification, ...prev]
+      ),
+    });
+  }, [fetchNotifications, isLoggedIn]);
 
   const markAsRead = async (ids) => {
     try {
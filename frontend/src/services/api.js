@@ -83,11 +83,28 @@ export const updateAppShares = (containerId, user_ids) => api.post(`/apps/${cont
 
 // Containers
 export const getContainers = () => api.get("/containers");
-export const createContainer = (data) => api.post("/containers/create", data);
-export const manageContainer = (id, action) => api.post(`/containers/${id}/${action}`);
-export const getContainerLogs = (id) => api.get(`/containers/${id}/logs`);
-export const streamContainerLogs = async (id, onChunk) => {
-  const response = await fetch(`${API_URL}/containers/${id}/stream-logs`, {
+// Runs a container. If its image has to be pulled first, the server answers 202 with a pull id;
+// the pull is followed (onPullEvent receives its progress events) until the container is created,
+// so either way this resolves with { data: { id, name } }.
+export const createContainer = async (data, onPullEvent) => {
+  const response = await api.post("/containers/create", data);
+  if (response.status !== 202) return response;
+
+  let done = null;
+  await streamImagePull(response.data.pull_id, (event) => {
+    if (event.type === 'done') done = event;
+    if (onPullEvent) onPullEvent(event);
+  });
+  if (!done) throw new Error(`The pull of ${data.image} ended without a result.`);
+  if (done.status !== 'succeeded') throw new Error(done.error || `Failed to pull ${data.image}.`);
+  if (done.result_error || !done.result) throw new Error(done.result_error || `Failed to create the container for ${data.image}.`);
+  return { ...response, status: 200, data: done.result };
+};
+export const manageContainer = (id, action, host) => api.post(`/containers/${id}/${action}`, null, { params: { host } });
+export const getContainerLogs = (id, host) => api.get(`/containers/${id}/logs`, { params: { host } });
+export const streamContainerLogs = async (id, onChunk, host) => {
+  const query = host ? `?host=${encodeURIComponent(host)}` : '';
+  const response = await fetch(`${API_URL}/containers/${id}/stream-logs${query}`, {
     method: 'GET',
     credentials: 'include',
   });
@@ -110,8 +127,35 @@ export const streamContainerLogs = async (id, onChunk) => {
     throw new Error(`Failed to stream logs with status: ${response.status}`);
   }
 };
-export const renameContainer = (id, name) => api.post(`/containers/${id}/rename`, { name });
-export const recreateContainer = (id, data) => api.post(`/containers/${id}/recreate`, data);
+// Runs one action on many containers; onResult is called with each NDJSON result line as it arrives.
+export const bulkContainerAction = async (ids, action, onResult, parallelism) => {
+  const response = await fetch(`${API_URL}/containers/bulk`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ ids, action, parallelism }),
+    credentials: 'include',
+  });
+
+  if (!response.ok || !response.body) {
+    const data = await response.json().catch(() => ({}));
+    throw new Error(data.error || `Bulk action failed with status: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.filter((line) => line.trim()).forEach((line) => onResult(JSON.parse(line)));
+  }
+};
+export const renameContainer = (id, name, host) => api.post(`/containers/${id}/rename`, { name }, { params: { host } });
+export const recreateContainer = (id, data, host) => api.post(`/containers/${id}/recreate`, data, { params: { host } });
 
 // Stacks
 export const createStack = async (data, onChunk) => {
@@ -140,16 +184,85 @@ export const createStack = async (data, onChunk) => {
     throw new Error(`Deployment failed with status: ${response.status}`);
   }
 };
+export const deployStack = (data) => api.post("/stacks", data);
 export const getStack = (name) => api.get(`/stacks/${name}`);
 export const updateStack = (name, data) => api.put(`/stacks/${name}`, data);
 
+// Jobs
+export const getJobs = (params) => api.get("/jobs", { params });
+export const getJob = (id) => api.get(`/jobs/${id}`);
+// Follows a job's log. Pass the number of bytes already received as `offset` to resume after a disconnect.
+export const streamJob = async (id, onChunk, offset = 0) => {
+  const response = await fetch(`${API_URL}/jobs/${id}/stream?offset=${offset}`, { credentials: 'include' });
+
+  if (!response.ok || !response.body) {
+    throw new Error(`Failed to follow job with status: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    onChunk(decoder.decode(value, { stream: true }));
+  }
+};
+
 // Images
 export const getImages = () => api.get("/images");
-export const removeImage = (id) => api.delete(`/images/${id}`);
+export const removeImage = (id, host) => api.delete(`/images/${id}`, { params: { host } });
+export const getImageInventory = (refresh = false) => api.get("/images/inventory", { params: { refresh } });
+export const pruneImages = (data, host) => api.post("/images/prune", data, { params: { host } });
+export const pullImages = (images) => api.post("/images/pull", { images });
+export const getImagePulls = () => api.get("/images/pulls");
+// Follows a background pull; onEvent receives each NDJSON event (snapshot, progress, status, done).
+export const streamImagePull = async (pullId, onEvent) => {
+  const response = await fetch(`${API_URL}/images/pulls/${pullId}/stream`, { credentials: 'include' });
+
+  if (!response.ok || !response.body) {
+    throw new Error(`Failed to follow pull with status: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.filter((line) => line.trim()).forEach((line) => onEvent(JSON.parse(line)));
+  }
+};
+export const getImageUpdates = () => api.get("/images/updates");
+export const checkImageUpdates = () => api.post("/images/updates/check");
+
+// Docker Hosts
+export const getDockerHosts = () => api.get("/docker-hosts");
+export const createDockerHost = (data) => api.post("/docker-hosts", data);
+export const updateDockerHost = (id, data) => api.put(`/docker-hosts/${id}`, data);
+export const deleteDockerHost = (id) => api.delete(`/docker-hosts/${id}`);
+export const testDockerHost = (id) => api.post(`/docker-hosts/${id}/test`);
 
 // System
 export const getSystemStats = () => api.get("/system/stats");
 export const getNetworkStats = () => api.get("/system/network-stats");
+
+// Opens the /events push channel. `handlers` maps a topic ("system", "network",
+// "containers", "notifications") to a callback receiving the parsed event data.
+// Metric topics send the full state first and then only the fields that changed.
+// Returns a function that closes the connection.
+export const subscribeToEvents = (handlers) => {
+  const topics = Object.keys(handlers).join(',');
+  const source = new EventSource(`${API_URL}/events?topics=${topics}`, { withCredentials: true });
+  Object.entries(handlers).forEach(([topic, handler]) => {
+    source.addEventListener(topic, (event) => handler(JSON.parse(event.data)));
+  });
+  return () => source.close();
+};
 export const getSmtpSettings = () => api.get("/system/smtp-settings");
 export const setSmtpSettings = (data) => api.post("/system/smtp-settings", data);
 export const getSmtpStatus = () => api.get("/system/smtp-status");